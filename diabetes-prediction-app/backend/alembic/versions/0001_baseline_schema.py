@@ -0,0 +1,131 @@
+"""Baseline schema
+
+Matches the tables previously created by ``Base.metadata.create_all``.
+Databases created that way (or from the old ``database/init.sql``) should be
+marked as migrated with ``alembic stamp 0001_baseline`` before upgrading.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column(
+            "role", sa.Enum("doctor", "patient", name="userrole"), nullable=False
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "patients",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("patient_code", sa.String()),
+        sa.Column("date_of_birth", sa.Date()),
+        sa.Column("phone", sa.String()),
+        sa.Column("address", sa.String()),
+        sa.Column("emergency_contact", sa.String()),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_patients_id", "patients", ["id"])
+    op.create_index(
+        "ix_patients_patient_code", "patients", ["patient_code"], unique=True
+    )
+
+    op.create_table(
+        "predictions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "patient_id",
+            sa.Integer(),
+            sa.ForeignKey("patients.id", ondelete="CASCADE"),
+        ),
+        sa.Column("doctor_id", sa.Integer(), sa.ForeignKey("users.id")),
+        # Demographics (7 fields)
+        sa.Column("age", sa.Integer()),
+        sa.Column("gender", sa.String()),
+        sa.Column("ethnicity", sa.String()),
+        sa.Column("education_level", sa.String()),
+        sa.Column("income_level", sa.String()),
+        sa.Column("employment_status", sa.String()),
+        sa.Column("smoking_status", sa.String()),
+        # Lifestyle (5 fields)
+        sa.Column("alcohol_consumption_per_week", sa.Float()),
+        sa.Column("physical_activity_minutes_per_week", sa.Integer()),
+        sa.Column("diet_score", sa.Float()),
+        sa.Column("sleep_hours_per_day", sa.Float()),
+        sa.Column("screen_time_hours_per_day", sa.Float()),
+        # Medical History (3 fields)
+        sa.Column("family_history_diabetes", sa.Boolean()),
+        sa.Column("hypertension_history", sa.Boolean()),
+        sa.Column("cardiovascular_history", sa.Boolean()),
+        # Physical Measurements (5 fields)
+        sa.Column("bmi", sa.Float()),
+        sa.Column("waist_to_hip_ratio", sa.Float()),
+        sa.Column("systolic_bp", sa.Integer()),
+        sa.Column("diastolic_bp", sa.Integer()),
+        sa.Column("heart_rate", sa.Integer()),
+        # Lab Results (9 fields)
+        sa.Column("cholesterol_total", sa.Float()),
+        sa.Column("hdl_cholesterol", sa.Float()),
+        sa.Column("ldl_cholesterol", sa.Float()),
+        sa.Column("triglycerides", sa.Float()),
+        sa.Column("glucose_fasting", sa.Float()),
+        sa.Column("glucose_postprandial", sa.Float()),
+        sa.Column("insulin_level", sa.Float()),
+        sa.Column("hba1c", sa.Float()),
+        sa.Column("diabetes_risk_score", sa.Float()),
+        # Prediction Results
+        sa.Column("risk_probability", sa.Float()),
+        sa.Column("risk_level", sa.String()),
+        sa.Column("prediction_class", sa.Integer()),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+        ),
+    )
+    op.create_index("ix_predictions_id", "predictions", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("predictions")
+    op.drop_table("patients")
+    op.drop_table("users")
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=True)
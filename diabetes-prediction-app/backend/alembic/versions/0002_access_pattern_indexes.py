@@ -0,0 +1,98 @@
+"""Confirmed outcomes and access-pattern indexes
+
+Adds the confirmed diagnosis columns and replaces the single-column indexes
+with composite ones matching the hot queries:
+
+- predictions by patient, newest first: (patient_id, created_at DESC, id DESC)
+- all predictions, newest first: (created_at DESC, id DESC)
+- incremental update watermark: (confirmed_at, id)
+- patient record of a user: patients(user_id)
+- patient list, newest first: (created_at DESC, id DESC)
+
+Indexes on primary keys and those from the old init.sql are dropped.
+
+Revision ID: 0002_access_pattern_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_access_pattern_indexes"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The baseline schema lacks these columns, but databases that the app's
+    # create_all() built before migrations existed may already have them
+    existing = {
+        column["name"]
+        for column in sa.inspect(op.get_bind()).get_columns("predictions")
+    }
+    with op.batch_alter_table("predictions") as batch_op:
+        if "confirmed_diagnosis" not in existing:
+            batch_op.add_column(sa.Column("confirmed_diagnosis", sa.Boolean()))
+        if "confirmed_at" not in existing:
+            batch_op.add_column(sa.Column("confirmed_at", sa.DateTime(timezone=True)))
+
+    # Redundant with the primary keys
+    op.drop_index("ix_users_id", table_name="users", if_exists=True)
+    op.drop_index("ix_patients_id", table_name="patients", if_exists=True)
+    op.drop_index("ix_predictions_id", table_name="predictions", if_exists=True)
+
+    # Left behind by database/init.sql, superseded by the indexes below
+    op.drop_index("idx_users_email", table_name="users", if_exists=True)
+    op.drop_index("idx_patients_code", table_name="patients", if_exists=True)
+    op.drop_index("idx_predictions_patient", table_name="predictions", if_exists=True)
+    op.drop_index("idx_predictions_doctor", table_name="predictions", if_exists=True)
+    op.drop_index("idx_predictions_created", table_name="predictions", if_exists=True)
+    op.drop_index("idx_predictions_confirmed", table_name="predictions", if_exists=True)
+
+    op.create_index(
+        "ix_predictions_patient_id_created_at_id",
+        "predictions",
+        ["patient_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_predictions_created_at_id",
+        "predictions",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_predictions_confirmed_at_id",
+        "predictions",
+        ["confirmed_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index("ix_patients_user_id", "patients", ["user_id"], if_not_exists=True)
+    op.create_index(
+        "ix_patients_created_at_id",
+        "patients",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_patients_created_at_id", table_name="patients")
+    op.drop_index("ix_patients_user_id", table_name="patients")
+    op.drop_index("ix_predictions_confirmed_at_id", table_name="predictions")
+    op.drop_index("ix_predictions_created_at_id", table_name="predictions")
+    op.drop_index("ix_predictions_patient_id_created_at_id", table_name="predictions")
+
+    op.create_index("ix_predictions_id", "predictions", ["id"])
+    op.create_index("ix_patients_id", "patients", ["id"])
+    op.create_index("ix_users_id", "users", ["id"])
+
+    with op.batch_alter_table("predictions") as batch_op:
+        batch_op.drop_column("confirmed_at")
+        batch_op.drop_column("confirmed_diagnosis")
@@ -0,0 +1,71 @@
+"""Prediction daily statistics summary table
+
+Per-day risk level counters for the global, per-doctor and per-patient
+scopes, backfilled from the existing predictions.
+
+Revision ID: 0003_prediction_daily_stats
+Revises: 0002_access_pattern_indexes
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_prediction_daily_stats"
+down_revision: Union[str, None] = "0002_access_pattern_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "prediction_daily_stats",
+        sa.Column("scope_type", sa.String(), primary_key=True),
+        sa.Column("scope_id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("risk_level", sa.String(), primary_key=True),
+        sa.Column("prediction_count", sa.Integer(), nullable=False),
+        sa.Column("probability_sum", sa.Float(), nullable=False),
+    )
+
+    # Backfill from existing predictions, bucketed by UTC day
+    if op.get_bind().dialect.name == "postgresql":
+        day = "CAST(created_at AT TIME ZONE 'UTC' AS DATE)"
+    else:
+        day = "date(created_at)"
+
+    op.execute(
+        f"""
+        INSERT INTO prediction_daily_stats
+            (scope_type, scope_id, day, risk_level,
+             prediction_count, probability_sum)
+        SELECT 'global', 0, {day}, risk_level, COUNT(*), SUM(risk_probability)
+        FROM predictions
+        WHERE risk_level IS NOT NULL
+        GROUP BY {day}, risk_level
+        """
+    )
+    for scope_type, scope_column in [
+        ("doctor", "doctor_id"),
+        ("patient", "patient_id"),
+    ]:
+        op.execute(
+            f"""
+            INSERT INTO prediction_daily_stats
+                (scope_type, scope_id, day, risk_level,
+                 prediction_count, probability_sum)
+            SELECT '{scope_type}', {scope_column}, {day}, risk_level,
+                   COUNT(*), SUM(risk_probability)
+            FROM predictions
+            WHERE {scope_column} IS NOT NULL AND risk_level IS NOT NULL
+            GROUP BY {scope_column}, {day}, risk_level
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("prediction_daily_stats")
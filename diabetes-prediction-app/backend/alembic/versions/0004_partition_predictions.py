@@ -0,0 +1,175 @@
+"""Monthly partitions for predictions and the archive manifest
+
+On PostgreSQL, ``predictions`` becomes a table range-partitioned by
+``created_at`` with one partition per month and a default partition.
+Existing rows are copied into the new partitions. The primary key becomes
+(id, created_at) because a partitioned table's key must include the
+partition column; ids still come from the same sequence. The ORM keeps
+mapping ``id`` alone as the identity (see app/models/prediction.py).
+
+The partition naming and DDL are copied here from app/core/partitions.py as
+they were when this revision was written, so later changes to the app do
+not change what this migration does.
+
+``created_at`` becomes NOT NULL on every database, and the
+``prediction_archives`` table records partitions exported to Parquet.
+
+Revision ID: 0004_partition_predictions
+Revises: 0003_prediction_daily_stats
+Create Date: 2026-10-18 00:00:00
+
+"""
+
+from datetime import datetime, timezone
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_partition_predictions"
+down_revision: Union[str, None] = "0003_prediction_daily_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    (
+        "ix_predictions_patient_id_created_at_id",
+        ["patient_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    ),
+    ("ix_predictions_created_at_id", [sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("ix_predictions_confirmed_at_id", ["confirmed_at", "id"]),
+]
+
+DEFAULT_PARTITION = "predictions_default"
+PARTITIONS_AHEAD = 3  # future monthly partitions created with the table
+
+
+def _month_start(value: datetime) -> datetime:
+    """First instant (UTC) of the month containing ``value``"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _create_partitions(since: Optional[datetime]) -> None:
+    """Monthly partitions from ``since`` (default: this month) to PARTITIONS_AHEAD"""
+    now = _month_start(datetime.now(timezone.utc))
+    month = _month_start(since) if since is not None else now
+    while month <= _add_months(now, PARTITIONS_AHEAD):
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE predictions_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF predictions FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+
+def _rebuild_predictions(partitioned: bool) -> None:
+    """Replace predictions with a (non-)partitioned copy of itself"""
+    bind = op.get_bind()
+    columns = ", ".join(
+        f'"{column["name"]}"' for column in sa.inspect(bind).get_columns("predictions")
+    )
+
+    op.execute("ALTER SEQUENCE predictions_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE predictions RENAME TO predictions_old")
+    op.execute("ALTER INDEX predictions_pkey RENAME TO predictions_old_pkey")
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name="predictions_old")
+
+    partition_by = " PARTITION BY RANGE (created_at)" if partitioned else ""
+    op.execute(
+        "CREATE TABLE predictions (LIKE predictions_old INCLUDING DEFAULTS)"
+        + partition_by
+    )
+    op.create_primary_key(
+        "predictions_pkey",
+        "predictions",
+        ["id", "created_at"] if partitioned else ["id"],
+    )
+    op.create_foreign_key(
+        "predictions_patient_id_fkey",
+        "predictions",
+        "patients",
+        ["patient_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "predictions_doctor_id_fkey", "predictions", "users", ["doctor_id"], ["id"]
+    )
+
+    if partitioned:
+        op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF predictions DEFAULT")
+        first = bind.scalar(sa.text("SELECT min(created_at) FROM predictions_old"))
+        _create_partitions(since=first)
+
+    op.execute(
+        f"INSERT INTO predictions ({columns}) SELECT {columns} FROM predictions_old"
+    )
+    op.execute("DROP TABLE predictions_old")
+    op.execute("ALTER SEQUENCE predictions_id_seq OWNED BY predictions.id")
+
+    for name, columns in INDEXES:
+        op.create_index(name, "predictions", columns)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "prediction_archives",
+        sa.Column("partition_name", sa.String(), primary_key=True),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("range_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("range_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("min_id", sa.BigInteger()),
+        sa.Column("max_id", sa.BigInteger()),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+        ),
+    )
+
+    # The partition key cannot be NULL
+    op.execute(
+        "UPDATE predictions SET created_at = CURRENT_TIMESTAMP "
+        "WHERE created_at IS NULL"
+    )
+
+    if op.get_bind().dialect.name != "postgresql":
+        with op.batch_alter_table("predictions") as batch_op:
+            batch_op.alter_column(
+                "created_at",
+                existing_type=sa.DateTime(timezone=True),
+                existing_server_default=sa.func.now(),
+                nullable=False,
+            )
+        return
+
+    op.alter_column("predictions", "created_at", nullable=False)
+    _rebuild_predictions(partitioned=True)
+
+
+def downgrade() -> None:
+    # Partitions already archived to Parquet are not restored
+    if op.get_bind().dialect.name == "postgresql":
+        _rebuild_predictions(partitioned=False)
+        op.alter_column("predictions", "created_at", nullable=True)
+    else:
+        with op.batch_alter_table("predictions") as batch_op:
+            batch_op.alter_column(
+                "created_at",
+                existing_type=sa.DateTime(timezone=True),
+                existing_server_default=sa.func.now(),
+                nullable=True,
+            )
+
+    op.drop_table("prediction_archives")
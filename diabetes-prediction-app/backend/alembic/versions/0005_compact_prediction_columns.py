@@ -0,0 +1,145 @@
+"""Compact storage for prediction rows
+
+Categorical prediction inputs and the risk level are stored as smallint codes
+(their position in the vocabularies of app/models/prediction.py) instead of
+text, and bounded integer inputs become smallint. The ORM maps codes back to
+the original strings, so the API is unchanged. The vocabularies are copied
+here as they were when this revision was written.
+
+Revision ID: 0005_compact_prediction_columns
+Revises: 0004_partition_predictions
+Create Date: 2026-10-18 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_compact_prediction_columns"
+down_revision: Union[str, None] = "0004_partition_predictions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GENDERS = ("Male", "Female", "Other")
+ETHNICITIES = ("White", "Black", "Asian", "Hispanic", "Other")
+EDUCATION_LEVELS = ("No formal", "Highschool", "Graduate", "Postgraduate")
+INCOME_LEVELS = ("Low", "Lower-Middle", "Middle", "Upper-Middle", "High")
+EMPLOYMENT_STATUSES = ("Employed", "Unemployed", "Retired", "Student")
+SMOKING_STATUSES = ("Never", "Former", "Current")
+RISK_LEVELS = ("Low", "Medium", "High")
+
+CODED_COLUMNS = {
+    "gender": GENDERS,
+    "ethnicity": ETHNICITIES,
+    "education_level": EDUCATION_LEVELS,
+    "income_level": INCOME_LEVELS,
+    "employment_status": EMPLOYMENT_STATUSES,
+    "smoking_status": SMOKING_STATUSES,
+    "risk_level": RISK_LEVELS,
+}
+SMALLINT_COLUMNS = [
+    "age",
+    "physical_activity_minutes_per_week",
+    "systolic_bp",
+    "diastolic_bp",
+    "heart_rate",
+    "prediction_class",
+]
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _to_code(column: str, values: Sequence[str]) -> str:
+    cases = " ".join(
+        f"WHEN {_quote(value)} THEN {code}" for code, value in enumerate(values)
+    )
+    return f"CASE {column} {cases} END"
+
+
+def _to_value(column: str, values: Sequence[str]) -> str:
+    cases = " ".join(
+        f"WHEN {code} THEN {_quote(value)}" for code, value in enumerate(values)
+    )
+    return f"CASE {column} {cases} END"
+
+
+def _check_vocabularies() -> None:
+    """Refuse to migrate values that have no code (they would become NULL)"""
+    bind = op.get_bind()
+    for column, values in CODED_COLUMNS.items():
+        unknown = bind.scalars(
+            sa.text(
+                f"SELECT DISTINCT {column} FROM predictions "
+                f"WHERE {column} IS NOT NULL "
+                f"AND {column} NOT IN ({', '.join(map(_quote, values))})"
+            )
+        ).all()
+        if unknown:
+            raise RuntimeError(
+                f"predictions.{column} has values outside {values}: {unknown}"
+            )
+
+
+def upgrade() -> None:
+    _check_vocabularies()
+
+    if op.get_bind().dialect.name == "postgresql":
+        # One ALTER TABLE so the table (and each partition) is rewritten once
+        changes = [
+            f"ALTER COLUMN {column} TYPE smallint USING {_to_code(column, values)}"
+            for column, values in CODED_COLUMNS.items()
+        ] + [
+            f"ALTER COLUMN {column} TYPE smallint USING {column}::smallint"
+            for column in SMALLINT_COLUMNS
+        ]
+        op.execute(f"ALTER TABLE predictions {', '.join(changes)}")
+        return
+
+    op.execute(
+        "UPDATE predictions SET "
+        + ", ".join(
+            f"{column} = {_to_code(column, values)}"
+            for column, values in CODED_COLUMNS.items()
+        )
+    )
+    with op.batch_alter_table("predictions") as batch_op:
+        for column in CODED_COLUMNS:
+            batch_op.alter_column(
+                column, existing_type=sa.String(), type_=sa.SmallInteger()
+            )
+        for column in SMALLINT_COLUMNS:
+            batch_op.alter_column(
+                column, existing_type=sa.Integer(), type_=sa.SmallInteger()
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        changes = [
+            f"ALTER COLUMN {column} TYPE varchar USING {_to_value(column, values)}"
+            for column, values in CODED_COLUMNS.items()
+        ] + [f"ALTER COLUMN {column} TYPE integer" for column in SMALLINT_COLUMNS]
+        op.execute(f"ALTER TABLE predictions {', '.join(changes)}")
+        return
+
+    op.execute(
+        "UPDATE predictions SET "
+        + ", ".join(
+            f"{column} = {_to_value(column, values)}"
+            for column, values in CODED_COLUMNS.items()
+        )
+    )
+    with op.batch_alter_table("predictions") as batch_op:
+        for column in CODED_COLUMNS:
+            batch_op.alter_column(
+                column, existing_type=sa.SmallInteger(), type_=sa.String()
+            )
+        for column in SMALLINT_COLUMNS:
+            batch_op.alter_column(
+                column, existing_type=sa.SmallInteger(), type_=sa.Integer()
+            )
@@ -0,0 +1,48 @@
+"""Covering index for each patient's latest prediction
+
+On PostgreSQL, ix_predictions_patient_id_created_at_id also carries the
+risk level, probability and class, so the patient roster's latest-prediction
+lookup is answered from the index alone. Other databases keep the plain
+index, which still finds the newest entry directly.
+
+Revision ID: 0006_latest_prediction_index
+Revises: 0005_compact_prediction_columns
+Create Date: 2026-10-19 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_latest_prediction_index"
+down_revision: Union[str, None] = "0005_compact_prediction_columns"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_predictions_patient_id_created_at_id"
+INDEX_COLUMNS = ["patient_id", sa.text("created_at DESC"), sa.text("id DESC")]
+INCLUDED_COLUMNS = ["risk_level", "risk_probability", "prediction_class"]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.drop_index(INDEX_NAME, table_name="predictions")
+    op.create_index(
+        INDEX_NAME,
+        "predictions",
+        INDEX_COLUMNS,
+        postgresql_include=INCLUDED_COLUMNS,
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.drop_index(INDEX_NAME, table_name="predictions")
+    op.create_index(INDEX_NAME, "predictions", INDEX_COLUMNS)
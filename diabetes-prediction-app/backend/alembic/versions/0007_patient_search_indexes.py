@@ -0,0 +1,74 @@
+"""Indexes for patient search
+
+Patient code, phone and the linked user's full name get an index on their
+lower-cased value in byte order (``COLLATE "C"`` on PostgreSQL) for prefix
+matching, both as a range condition and in index order. On PostgreSQL with
+the pg_trgm extension available, they also get trigram GIN indexes for
+substring matching; without it substring searches fall back to scanning.
+
+Revision ID: 0007_patient_search_indexes
+Revises: 0006_latest_prediction_index
+Create Date: 2026-10-19 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_patient_search_indexes"
+down_revision: Union[str, None] = "0006_latest_prediction_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = [
+    ("patients", "patient_code"),
+    ("patients", "phone"),
+    ("users", "full_name"),
+]
+
+
+def _has_trigram_indexes() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    return bool(
+        bind.scalar(
+            sa.text(
+                "SELECT EXISTS (SELECT 1 FROM pg_available_extensions "
+                "WHERE name = 'pg_trgm')"
+            )
+        )
+    )
+
+
+def upgrade() -> None:
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    for table, column in SEARCH_COLUMNS:
+        expression = f"lower({column})"
+        if postgresql:
+            expression = f'({expression} COLLATE "C")'
+        op.create_index(f"ix_{table}_{column}_prefix", table, [sa.text(expression)])
+
+    if not _has_trigram_indexes():
+        if postgresql:
+            print("Warning: pg_trgm is not available, substring search will scan")
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, column in SEARCH_COLUMNS:
+        op.create_index(
+            f"ix_{table}_{column}_trgm",
+            table,
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for table, column in SEARCH_COLUMNS:
+        op.drop_index(f"ix_{table}_{column}_trgm", table_name=table, if_exists=True)
+        op.drop_index(f"ix_{table}_{column}_prefix", table_name=table)
@@ -0,0 +1,37 @@
+"""Cohort quantile tables
+
+Precomputed quantiles of lab values and risk per age band/gender cohort,
+filled by ``python -m app.utils.cohort_analytics``.
+
+Revision ID: 0008_cohort_quantiles
+Revises: 0007_patient_search_indexes
+Create Date: 2026-10-19 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_cohort_quantiles"
+down_revision: Union[str, None] = "0007_patient_search_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cohort_quantiles",
+        sa.Column("metric", sa.String(), primary_key=True),
+        sa.Column("age_band", sa.String(), primary_key=True),
+        sa.Column("gender", sa.String(), primary_key=True),
+        sa.Column("observations", sa.Integer(), nullable=False),
+        sa.Column("quantiles", sa.JSON(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cohort_quantiles")
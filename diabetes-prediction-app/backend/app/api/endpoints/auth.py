@@ -1,8 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from datetime import timedelta
+from typing import Optional
 import uuid
 from app.core.database import get_db
+from app.core.identity_cache import authentications, patient_ids, users
 from app.core.security import (
     create_access_token,
     verify_password,
@@ -11,15 +17,44 @@ from app.core.security import (
 )
 from app.core.config import settings
 from app.schemas.user import UserCreate, UserLogin, Token, User
-from app.models.user import User as UserModel
+from app.models.user import User as UserModel, UserRole
 from app.models.patient import Patient as PatientModel
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+# Columns kept in the identity cache; the password hash stays in the database
+CACHED_USER_COLUMNS = [
+    column.key
+    for column in UserModel.__table__.columns
+    if column.key != "hashed_password"
+]
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[UserModel]:
+    """User with this email (token subject)
+
+    Served from the identity cache for USER_CACHE_SECONDS after a lookup.
+    Each call gets its own transient copy, never attached to a session.
+    Missing users are not cached.
+    """
+    values = users.get(email)
+    if values is not None:
+        authentications["cache"] += 1
+        return UserModel(**values)
+
+    authentications["database"] += 1
+    user = await db.scalar(select(UserModel).where(UserModel.email == email))
+    if user is None:
+        return None
+    values = {key: getattr(user, key) for key in CACHED_USER_COLUMNS}
+    users.set(email, values)
+    return UserModel(**values)
+
+
 # Helper function - defined first before being used
-def get_current_user(
-    authorization: str = Header(None), db: Session = Depends(get_db)
+async def get_current_user(
+    authorization: str = Header(None), db: AsyncSession = Depends(get_db)
 ) -> UserModel:
     """Get current user from JWT token"""
     if not authorization or not authorization.startswith("Bearer "):
@@ -47,7 +82,21 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(UserModel).filter(UserModel.email == email).first()
+    if settings.AUTH_STATELESS and "uid" in payload and "role" in payload:
+        # The signature vouches for the claims; tokens issued before the uid
+        # claim existed fall through to the lookup
+        try:
+            role = UserRole(payload["role"])
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        authentications["claims"] += 1
+        return UserModel(id=payload["uid"], email=email, role=role)
+
+    user = await get_user_by_email(db, email)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -57,51 +106,105 @@ def get_current_user(
     return user
 
 
+@event.listens_for(UserModel, "after_update")
+@event.listens_for(UserModel, "after_delete")
+def _mark_user_stale(mapper, connection, target):
+    """Evict updated or deleted users from the identity caches
+
+    Evicted at flush and again after commit, in case a concurrent request
+    cached the old row in between. Bulk UPDATE/DELETE statements skip these
+    events; their changes show once the entries expire.
+    """
+    emails = {target.email, *inspect(target).attrs.email.history.deleted}
+    for email in emails:
+        users.invalidate(email)
+    patient_ids.invalidate(target.id)
+    object_session(target).info.setdefault("stale_users", set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_stale_users(session):
+    for email in session.info.pop("stale_users", ()):
+        users.invalidate(email)
+
+
+async def get_own_patient_id(db: AsyncSession, user: UserModel) -> Optional[int]:
+    """Id of the patient record linked to a patient user
+
+    Cached per user, so repeated requests skip the lookup. Users without a
+    patient record are not cached: ensure-patient may create one at any time.
+    """
+    patient_id = patient_ids.get(user.id)
+    if patient_id is None:
+        patient_id = await db.scalar(
+            select(PatientModel.id).where(PatientModel.user_id == user.id)
+        )
+        if patient_id is not None:
+            patient_ids.set(user.id, patient_id)
+    return patient_id
+
+
 # API Endpoints
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
-    # Check if user already exists
-    existing_user = (
-        db.query(UserModel).filter(UserModel.email == user_data.email).first()
-    )
-    if existing_user:
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+    """Register a new user
+
+    The user and, for patients, their patient record are inserted with
+    RETURNING and committed together. Duplicate emails are caught by the
+    unique constraint instead of a pre-check query.
+    """
+    # Hash the password (bcrypt is CPU-bound, keep it off the event loop)
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
+
+    try:
+        new_user = await db.scalar(
+            insert(UserModel)
+            .values(
+                email=user_data.email,
+                hashed_password=hashed_password,
+                full_name=user_data.full_name,
+                role=user_data.role,
+            )
+            .returning(UserModel)
+        )
+    except IntegrityError as e:
+        await db.rollback()
+        # Both PostgreSQL and SQLite name the column or its index
+        if "email" not in str(e.orig):
+            raise
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    new_user = UserModel(
-        email=user_data.email,
-        hashed_password=hashed_password,
-        full_name=user_data.full_name,
-        role=user_data.role,
-    )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-
     # Auto-create patient record for patient users
+    patient_id = None
     if new_user.role.value == "patient":
-        patient_code = f"PAT-{uuid.uuid4().hex[:8].upper()}"
-        new_patient = PatientModel(
-            user_id=new_user.id,
-            patient_code=patient_code,
+        patient_id = await db.scalar(
+            insert(PatientModel)
+            .values(
+                user_id=new_user.id,
+                patient_code=f"PAT-{uuid.uuid4().hex[:8].upper()}",
+            )
+            .returning(PatientModel.id)
         )
-        db.add(new_patient)
-        db.commit()
+
+    await db.commit()
+    if patient_id is not None:
+        patient_ids.set(new_user.id, patient_id)
 
     return new_user
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login user and return JWT token"""
     # Find user
-    user = db.query(UserModel).filter(UserModel.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    user = await db.scalar(
+        select(UserModel).where(UserModel.email == credentials.email)
+    )
+    if not user or not await run_in_threadpool(
+        verify_password, credentials.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -111,7 +214,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "role": user.role.value},
+        data={"sub": user.email, "role": user.role.value, "uid": user.id},
         expires_delta=access_token_expires,
     )
 
@@ -119,14 +222,26 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=User)
-def get_current_user_info(current_user: UserModel = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """Get current user information"""
+    if current_user.full_name is None:
+        # Stateless mode: the token claims do not carry the full profile
+        current_user = await get_user_by_email(db, current_user.email)
+        if current_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
     return current_user
 
 
 @router.post("/me/ensure-patient")
-def ensure_patient_record(
-    current_user: UserModel = Depends(get_current_user), db: Session = Depends(get_db)
+async def ensure_patient_record(
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """Ensure a patient record exists for the current patient user.
     This fixes existing patient accounts that were created before auto-creation was added.
@@ -138,24 +253,27 @@ def ensure_patient_record(
         )
 
     # Check if patient record already exists
-    existing_patient = (
-        db.query(PatientModel).filter(PatientModel.user_id == current_user.id).first()
+    existing_patient = await db.scalar(
+        select(PatientModel).where(PatientModel.user_id == current_user.id)
     )
 
     if existing_patient:
+        patient_ids.set(current_user.id, existing_patient.id)
         return {
             "message": "Patient record already exists",
             "patient_id": existing_patient.id,
         }
 
     # Create new patient record
-    patient_code = f"PAT-{uuid.uuid4().hex[:8].upper()}"
-    new_patient = PatientModel(
-        user_id=current_user.id,
-        patient_code=patient_code,
+    patient_id = await db.scalar(
+        insert(PatientModel)
+        .values(
+            user_id=current_user.id,
+            patient_code=f"PAT-{uuid.uuid4().hex[:8].upper()}",
+        )
+        .returning(PatientModel.id)
     )
-    db.add(new_patient)
-    db.commit()
-    db.refresh(new_patient)
+    await db.commit()
+    patient_ids.set(current_user.id, patient_id)
 
-    return {"message": "Patient record created", "patient_id": new_patient.id}
+    return {"message": "Patient record created", "patient_id": patient_id}
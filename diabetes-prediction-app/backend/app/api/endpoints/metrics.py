@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.core.database import async_engine, engine, replica_router
+from app.core.config import settings
+from app.core.db_metrics import get_pool_status
+from app.core.identity_cache import authentications, patient_ids, users
+from app.core.query_metrics import query_metrics
+from app.utils.prediction_journal import prediction_journal
+from app.models.user import User as UserModel
+from app.api.endpoints.auth import get_current_user
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+def require_doctor(current_user: UserModel = Depends(get_current_user)) -> UserModel:
+    """Restrict operational metrics to doctor accounts"""
+    if current_user.role.value != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can view metrics",
+        )
+    return current_user
+
+
+@router.get("/db-pool")
+def get_db_pool_metrics(current_user: UserModel = Depends(require_doctor)):
+    """Pool state, checkout wait times and invalidations per engine, and replica health"""
+    # async serves API requests, sync serves scripts and background jobs
+    return {
+        "async": get_pool_status(async_engine.sync_engine),
+        "sync": get_pool_status(engine),
+        "read_replicas": replica_router.status(),
+    }
+
+
+@router.get("/prediction-journal")
+def get_prediction_journal_metrics(current_user: UserModel = Depends(require_doctor)):
+    """Write-behind journal backlog and drain counters"""
+    return prediction_journal.status()
+
+
+@router.get("/queries")
+def get_query_metrics(
+    reset: bool = False, current_user: UserModel = Depends(require_doctor)
+):
+    """Statements per route, the most expensive statements, slow queries and N+1 suspects"""
+    snapshot = query_metrics.snapshot()
+    if reset:
+        query_metrics.reset()
+    return snapshot
+
+
+@router.get("/identity-cache")
+def get_identity_cache_metrics(current_user: UserModel = Depends(require_doctor)):
+    """How authenticated requests found their user, and identity cache hit rates"""
+    total = sum(authentications.values())
+    return {
+        "stateless": settings.AUTH_STATELESS,
+        "authentications": {
+            source: authentications[source]
+            for source in ("claims", "cache", "database")
+        },
+        "database_rate": (
+            round(authentications["database"] / total, 4) if total else None
+        ),
+        "users": users.status(),
+        "patient_ids": patient_ids.status(),
+    }
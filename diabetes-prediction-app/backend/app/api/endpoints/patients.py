@@ -1,69 +1,285 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
-from app.schemas.patient import PatientCreate, PatientUpdate, Patient as PatientSchema
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, case, func, insert, or_, select, true, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.identity_cache import patient_ids
+from app.schemas.patient import (
+    LatestPrediction,
+    PatientCreate,
+    PatientUpdate,
+    Patient as PatientSchema,
+    PatientSearchResult,
+    PatientWithLatestRisk,
+)
 from app.models.patient import Patient as PatientModel
+from app.models.prediction import Prediction as PredictionModel
 from app.models.user import User as UserModel
-from app.api.endpoints.auth import get_current_user
+from app.schemas.prediction import RiskTrend
+from app.api.endpoints.auth import get_current_user, get_own_patient_id
+from app.utils.pagination import keyset_paginate, set_next_cursor
+from app.utils.prediction_archive import get_archived_patient_records
+from app.utils.prediction_stats import record_predictions
+from app.utils.risk_trend import TREND_METRICS, bucket_series
 
 router = APIRouter(prefix="/patients", tags=["Patients"])
 
+# Columns returned by the list endpoint, fetched as plain rows
+PATIENT_LIST_COLUMNS = [
+    getattr(PatientModel, field) for field in PatientSchema.model_fields
+]
+
+# Fields matched by the search endpoint, each with a prefix index (and a
+# trigram index on PostgreSQL with pg_trgm, see migration 0007)
+SEARCH_COLUMNS = [PatientModel.patient_code, PatientModel.phone, UserModel.full_name]
+
+# Trigram indexes need three characters; shorter queries only match prefixes
+SEARCH_SUBSTRING_MIN_LENGTH = 3
+
+# Prediction columns summarised by the roster endpoint, all covered by
+# ix_predictions_patient_id_created_at_id on PostgreSQL
+LATEST_PREDICTION_FIELDS = list(LatestPrediction.model_fields)
+
+
+def _latest_prediction_columns(dialect_name: str):
+    """Columns of each patient's latest prediction (by field) and their join
+
+    PostgreSQL uses a LATERAL top-1 subquery per patient; other databases
+    join the prediction whose id a correlated subquery picks. Both walk
+    ix_predictions_patient_id_created_at_id from the newest entry, so the
+    cost does not grow with the length of a patient's history.
+    """
+    if dialect_name == "postgresql":
+        latest = (
+            select(*(getattr(PredictionModel, f) for f in LATEST_PREDICTION_FIELDS))
+            .where(PredictionModel.patient_id == PatientModel.id)
+            .order_by(PredictionModel.created_at.desc(), PredictionModel.id.desc())
+            .limit(1)
+            .lateral("latest")
+        )
+        columns = {field: latest.c[field] for field in LATEST_PREDICTION_FIELDS}
+        return columns, latest, true()
+
+    newest = aliased(PredictionModel)
+    latest_id = (
+        select(newest.id)
+        .where(newest.patient_id == PatientModel.id)
+        .order_by(newest.created_at.desc(), newest.id.desc())
+        .limit(1)
+        .correlate(PatientModel)
+        .scalar_subquery()
+    )
+    columns = {
+        field: getattr(PredictionModel, field) for field in LATEST_PREDICTION_FIELDS
+    }
+    return columns, PredictionModel, PredictionModel.id == latest_id
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Query parameter as an aware UTC datetime (naive values are UTC)"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_key(column, dialect_name: str):
+    """Lower-cased column in byte order, the expression of its prefix index"""
+    key = func.lower(column)
+    if dialect_name == "postgresql":
+        key = key.collate("C")
+    return key
+
+
+def _prefix_match(column, term: str, dialect_name: str):
+    """Case-insensitive prefix condition that can use the column's prefix index
+
+    A range rather than LIKE, so prepared statements with generic plans can
+    use the index too.
+    """
+    key = _search_key(column, dialect_name)
+    return and_(key >= term, key < term + "\U0010ffff")
+
+
+def _search_candidates(term: str, limit: int, dialect_name: str):
+    """Ids of up to ``limit`` matching patients per field and match type"""
+    substring = f"%{_escape_like(term)}%"
+    branches = []
+    for column in SEARCH_COLUMNS:
+        base = select(PatientModel.id)
+        if column.class_ is UserModel:
+            base = base.join(UserModel, UserModel.id == PatientModel.user_id)
+
+        # Index order, so short prefixes stop after ``limit`` entries
+        branches.append(
+            base.where(_prefix_match(column, term, dialect_name))
+            .order_by(_search_key(column, dialect_name))
+            .limit(limit)
+        )
+        if len(term) >= SEARCH_SUBSTRING_MIN_LENGTH:
+            branches.append(
+                base.where(column.ilike(substring, escape="\\")).limit(limit)
+            )
+
+    # Wrapped, since SQLite rejects LIMIT inside a compound SELECT
+    return union(*(select(branch.subquery().c.id) for branch in branches))
+
 
 @router.post("/", response_model=PatientSchema, status_code=status.HTTP_201_CREATED)
-def create_patient(
+async def create_patient(
     patient_data: PatientCreate,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new patient profile"""
-    # Check if patient code already exists
-    existing_patient = (
-        db.query(PatientModel)
-        .filter(PatientModel.patient_code == patient_data.patient_code)
-        .first()
-    )
-
-    if existing_patient:
+    # Duplicate patient codes are rejected by the unique constraint
+    try:
+        new_patient = await db.scalar(
+            insert(PatientModel)
+            .values(**patient_data.model_dump())
+            .returning(PatientModel)
+        )
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        # Both PostgreSQL and SQLite name the column or its index
+        if "patient_code" not in str(e.orig):
+            raise
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Patient code already exists",
         )
 
-    new_patient = PatientModel(**patient_data.model_dump())
-    db.add(new_patient)
-    db.commit()
-    db.refresh(new_patient)
-
     return new_patient
 
 
 @router.get("/", response_model=List[PatientSchema])
-def list_patients(
-    skip: int = 0,
-    limit: int = 100,
+async def list_patients(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """List all patients (doctors) or own profile (patients)
+
+    Newest first; the ``X-Next-Cursor`` response header carries the token
+    for the next page.
+    """
+    query = select(*PATIENT_LIST_COLUMNS)
+    if current_user.role.value != "doctor":
+        query = query.where(PatientModel.user_id == current_user.id)
+
+    result = await db.execute(keyset_paginate(query, PatientModel, cursor, limit))
+    return set_next_cursor(response, result.all(), limit)
+
+
+@router.get("/with-latest-risk", response_model=List[PatientWithLatestRisk])
+async def list_patients_with_latest_risk(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    risk_level: Optional[str] = Query(None, pattern="^(Low|Medium|High)$"),
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Patient roster with each patient's most recent prediction, in one query
+
+    Paginated like the patient list. With ``risk_level``, only patients
+    whose latest prediction has that level are returned. Predictions already
+    archived to Parquet are not considered.
+    """
+    columns, latest, on_clause = _latest_prediction_columns(db.bind.dialect.name)
+    query = select(
+        *PATIENT_LIST_COLUMNS,
+        *(column.label(f"latest_{field}") for field, column in columns.items()),
+    ).outerjoin(latest, on_clause)
+    if current_user.role.value != "doctor":
+        query = query.where(PatientModel.user_id == current_user.id)
+    if risk_level is not None:
+        query = query.where(columns["risk_level"] == risk_level)
+
+    result = await db.execute(keyset_paginate(query, PatientModel, cursor, limit))
+    rows = set_next_cursor(response, result.all(), limit)
+
+    return [
+        PatientWithLatestRisk(
+            **{column.key: getattr(row, column.key) for column in PATIENT_LIST_COLUMNS},
+            latest_prediction=(
+                LatestPrediction(
+                    **{
+                        field: getattr(row, f"latest_{field}")
+                        for field in LATEST_PREDICTION_FIELDS
+                    }
+                )
+                if row.latest_id is not None
+                else None
+            ),
+        )
+        for row in rows
+    ]
+
+
+@router.get("/search", response_model=List[PatientSearchResult])
+async def search_patients(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List all patients (doctors) or own profile (patients)"""
-    if current_user.role.value == "doctor":
-        patients = db.query(PatientModel).offset(skip).limit(limit).all()
-    else:
-        patients = (
-            db.query(PatientModel).filter(PatientModel.user_id == current_user.id).all()
+    """Find patients by code, phone or linked user name (doctors only)
+
+    Case-insensitive. Prefix matches come first, ordered by patient code,
+    followed by substring matches for queries of at least
+    SEARCH_SUBSTRING_MIN_LENGTH characters.
+    """
+    if current_user.role.value != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can search patients",
         )
 
-    return patients
+    term = q.strip().lower()
+    if not term:
+        return []
+
+    dialect_name = db.bind.dialect.name
+    is_prefix_match = or_(
+        *(_prefix_match(column, term, dialect_name) for column in SEARCH_COLUMNS)
+    )
+    query = (
+        select(*PATIENT_LIST_COLUMNS, UserModel.full_name)
+        .outerjoin(UserModel, UserModel.id == PatientModel.user_id)
+        .where(PatientModel.id.in_(_search_candidates(term, limit, dialect_name)))
+        .order_by(
+            case((is_prefix_match, 0), else_=1),
+            PatientModel.patient_code,
+            PatientModel.id,
+        )
+        .limit(limit)
+    )
+
+    result = await db.execute(query)
+    return result.all()
 
 
 @router.get("/{patient_id}", response_model=PatientSchema)
-def get_patient(
+async def get_patient(
     patient_id: int,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get patient details by ID"""
-    patient = db.query(PatientModel).filter(PatientModel.id == patient_id).first()
+    patient = await db.get(PatientModel, patient_id)
 
     if not patient:
         raise HTTPException(
@@ -79,15 +295,79 @@ def get_patient(
     return patient
 
 
+@router.get("/{patient_id}/risk-trend", response_model=RiskTrend)
+async def get_risk_trend(
+    patient_id: int,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    points: int = Query(
+        settings.TREND_DEFAULT_POINTS, ge=1, le=settings.TREND_MAX_POINTS
+    ),
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Risk probability, HbA1c and fasting glucose over time, downsampled
+
+    The patient's predictions between ``from`` and ``to`` (default: their
+    whole history, archived partitions included) are summarised into at
+    most ``points`` time buckets with the mean, min and max of each metric.
+    """
+    start, end = _as_utc(start), _as_utc(end)
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be before 'to'",
+        )
+
+    # Check access
+    if current_user.role.value == "patient":
+        if await get_own_patient_id(db, current_user) != patient_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+            )
+    elif await db.get(PatientModel, patient_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
+        )
+
+    columns = ["created_at", *TREND_METRICS]
+    query = select(*(getattr(PredictionModel, column) for column in columns)).where(
+        PredictionModel.patient_id == patient_id
+    )
+    if start is not None:
+        query = query.where(PredictionModel.created_at >= start)
+    if end is not None:
+        query = query.where(PredictionModel.created_at <= end)
+
+    result = await db.execute(query)
+    records = [row._asdict() for row in result]
+    records += await get_archived_patient_records(db, patient_id, columns, start, end)
+
+    buckets = bucket_series(
+        [record["created_at"] for record in records],
+        {metric: [record[metric] for record in records] for metric in TREND_METRICS},
+        points,
+        start,
+        end,
+    )
+    return RiskTrend(
+        patient_id=patient_id,
+        start=buckets[0]["start"] if buckets else start,
+        end=buckets[-1]["end"] if buckets else end,
+        total=len(records),
+        buckets=buckets,
+    )
+
+
 @router.put("/{patient_id}", response_model=PatientSchema)
-def update_patient(
+async def update_patient(
     patient_id: int,
     patient_update: PatientUpdate,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update patient information"""
-    patient = db.query(PatientModel).filter(PatientModel.id == patient_id).first()
+    patient = await db.get(PatientModel, patient_id)
 
     if not patient:
         raise HTTPException(
@@ -105,17 +385,17 @@ def update_patient(
     for field, value in update_data.items():
         setattr(patient, field, value)
 
-    db.commit()
-    db.refresh(patient)
+    await db.commit()
+    await db.refresh(patient)
 
     return patient
 
 
 @router.delete("/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_patient(
+async def delete_patient(
     patient_id: int,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a patient (doctors only)"""
     if current_user.role.value != "doctor":
@@ -124,14 +404,35 @@ def delete_patient(
             detail="Only doctors can delete patients",
         )
 
-    patient = db.query(PatientModel).filter(PatientModel.id == patient_id).first()
+    patient = await db.get(PatientModel, patient_id)
 
     if not patient:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
         )
 
-    db.delete(patient)
-    db.commit()
-
+    # Take the cascaded and the archived predictions out of the statistics
+    columns = [
+        "created_at",
+        "doctor_id",
+        "patient_id",
+        "risk_level",
+        "risk_probability",
+    ]
+    predictions = (
+        await db.execute(
+            select(*(getattr(PredictionModel, column) for column in columns)).where(
+                PredictionModel.patient_id == patient_id
+            )
+        )
+    ).all()
+    predictions += [
+        PredictionModel(**record)
+        for record in await get_archived_patient_records(db, patient_id, columns)
+    ]
+    await record_predictions(db, predictions, sign=-1)
 
+    await db.delete(patient)
+    await db.commit()
+    if patient.user_id is not None:
+        patient_ids.invalidate(patient.user_id)
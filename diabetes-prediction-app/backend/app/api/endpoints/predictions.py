@@ -1,30 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.core.config import settings
+from app.core.bulk_insert import bulk_insert
+from app.core.database import get_db, get_read_db, replica_router
 from app.schemas.prediction import (
+    CohortComparison,
     PredictionCreate,
     PredictionResponse,
     PredictionDetail,
+    PredictionOutcome,
+    PredictionStats,
 )
 from app.models.prediction import Prediction as PredictionModel
 from app.models.patient import Patient as PatientModel
 from app.models.user import User as UserModel
-from app.api.endpoints.auth import get_current_user
+from app.api.endpoints.auth import get_current_user, get_own_patient_id
 from app.ml.predictor import get_predictor
+from app.utils.cohort_analytics import cohort_analytics
 from app.utils.pdf_generator import generate_prediction_report
+from app.utils.pagination import decode_cursor, keyset_paginate, set_next_cursor
+from app.utils.prediction_archive import (
+    get_archived_patient_predictions,
+    get_archived_prediction,
+)
+from app.utils.prediction_journal import get_pending_prediction, prediction_journal
+from app.utils.prediction_stats import (
+    SCOPE_DOCTOR,
+    SCOPE_GLOBAL,
+    SCOPE_PATIENT,
+    get_prediction_stats,
+    record_predictions,
+)
 
 router = APIRouter(prefix="/predictions", tags=["Predictions"])
 
+# Only the columns PredictionResponse needs, fetched as plain rows rather
+# than identity-mapped ORM objects with all 29 inputs
+PREDICTION_LIST_COLUMNS = [
+    getattr(PredictionModel, field)
+    for field in PredictionResponse.model_fields
+    if field != "risk_interpretation"
+]
+
+
+def _build_list_response(rows) -> List[PredictionResponse]:
+    """Build list responses straight from projected rows"""
+    predictor = get_predictor()
+    return [
+        PredictionResponse(
+            **{
+                column.key: getattr(row, column.key)
+                for column in PREDICTION_LIST_COLUMNS
+            },
+            risk_interpretation=predictor._get_risk_interpretation(
+                row.risk_level, row.risk_probability / 100
+            ),
+        )
+        for row in rows
+    ]
+
 
 @router.post(
     "/", response_model=PredictionResponse, status_code=status.HTTP_201_CREATED
 )
-def create_prediction(
+async def create_prediction(
     prediction_data: PredictionCreate,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new diabetes prediction"""
 
@@ -34,11 +82,10 @@ def create_prediction(
     # Convert prediction data to dict
     input_dict = prediction_data.model_dump(exclude={"patient_id"})
 
-    # Make prediction
-    result = predictor.predict(input_dict)
+    # Make prediction (CPU-bound, keep it off the event loop)
+    result = await run_in_threadpool(predictor.predict, input_dict)
 
-    # Create prediction record
-    new_prediction = PredictionModel(
+    values = dict(
         patient_id=prediction_data.patient_id,
         doctor_id=current_user.id if current_user.role.value == "doctor" else None,
         **input_dict,
@@ -47,9 +94,25 @@ def create_prediction(
         prediction_class=result["prediction_class"],
     )
 
-    db.add(new_prediction)
-    db.commit()
-    db.refresh(new_prediction)
+    if prediction_journal.enabled:
+        # Write-behind: acknowledge once journaled, the insert happens later
+        patient_id = await db.scalar(
+            select(PatientModel.id).where(PatientModel.id == values["patient_id"])
+        )
+        if patient_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found"
+            )
+        values["created_at"] = datetime.now(timezone.utc)
+        new_prediction = await prediction_journal.append(db, values)
+        replica_router.pin(db.info.get("pin_key"))
+    else:
+        # Create prediction record; RETURNING brings back id and created_at
+        new_prediction = await db.scalar(
+            insert(PredictionModel).values(**values).returning(PredictionModel)
+        )
+        await record_predictions(db, [new_prediction])
+        await db.commit()
 
     # Add risk interpretation to response
     response_dict = {
@@ -60,60 +123,159 @@ def create_prediction(
     return PredictionResponse(**response_dict)
 
 
+@router.post(
+    "/batch",
+    response_model=List[PredictionResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_predictions_batch(
+    predictions_data: List[PredictionCreate],
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Score and store many predictions at once (doctors only)"""
+    if current_user.role.value != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can create batch predictions",
+        )
+
+    if len(predictions_data) > settings.MAX_PREDICTION_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.MAX_PREDICTION_BATCH} predictions per batch",
+        )
+
+    if not predictions_data:
+        return []
+
+    predictor = get_predictor()
+    inputs = [data.model_dump(exclude={"patient_id"}) for data in predictions_data]
+
+    # Score the whole batch in one vectorized pass off the event loop
+    results = await run_in_threadpool(predictor.predict_batch, inputs)
+
+    # Stamped here rather than by the server default, so large batches can be
+    # written with COPY, which returns nothing
+    created_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "patient_id": data.patient_id,
+            "doctor_id": current_user.id,
+            "created_at": created_at,
+            **input_dict,
+            "risk_probability": result["risk_probability"],
+            "risk_level": result["risk_level"],
+            "prediction_class": result["prediction_class"],
+        }
+        for data, input_dict, result in zip(predictions_data, inputs, results)
+    ]
+    inserted = await bulk_insert(
+        db, PredictionModel, rows, returning=["id", "created_at"]
+    )
+
+    responses = [
+        PredictionResponse(
+            id=row.id,
+            created_at=row.created_at,
+            patient_id=values["patient_id"],
+            doctor_id=values["doctor_id"],
+            risk_probability=values["risk_probability"],
+            risk_level=values["risk_level"],
+            prediction_class=values["prediction_class"],
+            risk_interpretation=result["risk_interpretation"],
+        )
+        for row, values, result in zip(inserted, rows, results)
+    ]
+    await record_predictions(db, responses)
+    await db.commit()
+
+    return responses
+
+
 @router.get("/", response_model=List[PredictionResponse])
-def list_predictions(
-    skip: int = 0,
-    limit: int = 100,
+async def list_predictions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List all predictions (filtered by role)"""
-    query = db.query(PredictionModel)
+    """List all predictions (filtered by role)
+
+    Newest first; the ``X-Next-Cursor`` response header carries the token
+    for the next page.
+    """
+    query = select(*PREDICTION_LIST_COLUMNS)
 
     # If patient, show only their predictions
     if current_user.role.value == "patient":
         # Find patient record for this user
-        from app.models.patient import Patient
-
-        patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-        if patient:
-            query = query.filter(PredictionModel.patient_id == patient.id)
+        patient_id = await get_own_patient_id(db, current_user)
+        if patient_id is not None:
+            query = query.where(PredictionModel.patient_id == patient_id)
         else:
             return []
 
-    predictions = (
-        query.order_by(PredictionModel.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    result = await db.execute(keyset_paginate(query, PredictionModel, cursor, limit))
+    rows = set_next_cursor(response, result.all(), limit)
 
-    # Add risk interpretation
-    predictor = get_predictor()
-    results = []
-    for pred in predictions:
-        results.append(
-            PredictionResponse(
-                **pred.__dict__,
-                risk_interpretation=predictor._get_risk_interpretation(
-                    pred.risk_level, pred.risk_probability / 100
-                ),
-            )
+    return _build_list_response(rows)
+
+
+@router.get("/stats", response_model=PredictionStats)
+async def get_stats(
+    doctor_id: Optional[int] = None,
+    patient_id: Optional[int] = None,
+    days: int = Query(30, ge=1, le=366),
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Risk level counts, daily volumes and mean probability
+
+    Global by default; pass ``doctor_id`` or ``patient_id`` to narrow the
+    scope. Patients always get the statistics of their own predictions.
+    """
+    if doctor_id is not None and patient_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Filter by either doctor_id or patient_id, not both",
         )
 
-    return results
+    if current_user.role.value == "patient":
+        own_patient_id = await get_own_patient_id(db, current_user)
+        if own_patient_id is None or doctor_id is not None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+            )
+        if patient_id is not None and patient_id != own_patient_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+            )
+        patient_id = own_patient_id
+
+    if patient_id is not None:
+        scope_type, scope_id = SCOPE_PATIENT, patient_id
+    elif doctor_id is not None:
+        scope_type, scope_id = SCOPE_DOCTOR, doctor_id
+    else:
+        scope_type, scope_id = SCOPE_GLOBAL, 0
+
+    return await get_prediction_stats(db, scope_type, scope_id, days)
 
 
 @router.get("/{prediction_id}", response_model=PredictionDetail)
-def get_prediction(
+async def get_prediction(
     prediction_id: int,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get prediction details by ID"""
-    prediction = (
-        db.query(PredictionModel).filter(PredictionModel.id == prediction_id).first()
-    )
+    prediction = await db.get(PredictionModel, prediction_id)
+    if not prediction:
+        prediction = await get_pending_prediction(db, prediction_id)
+    if not prediction:
+        prediction = await get_archived_prediction(db, prediction_id)
 
     if not prediction:
         raise HTTPException(
@@ -122,14 +284,85 @@ def get_prediction(
 
     # Check access
     if current_user.role.value == "patient":
-        from app.models.patient import Patient
+        own_patient_id = await get_own_patient_id(db, current_user)
+        if own_patient_id is None or prediction.patient_id != own_patient_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
+            )
+
+    predictor = get_predictor()
+    return PredictionDetail(
+        **prediction.__dict__,
+        risk_interpretation=predictor._get_risk_interpretation(
+            prediction.risk_level, prediction.risk_probability / 100
+        ),
+    )
+
 
-        patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-        if not patient or prediction.patient_id != patient.id:
+@router.get("/{prediction_id}/cohort", response_model=CohortComparison)
+async def get_prediction_cohort(
+    prediction_id: int,
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Percentile ranks of a prediction's lab values and risk in its cohort
+
+    Cohorts are age band and gender; ranks come from precomputed quantiles
+    (see app/utils/cohort_analytics.py).
+    """
+    prediction = await db.get(PredictionModel, prediction_id)
+    if not prediction:
+        prediction = await get_pending_prediction(db, prediction_id)
+    if not prediction:
+        prediction = await get_archived_prediction(db, prediction_id)
+
+    if not prediction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Prediction not found"
+        )
+
+    # Check access
+    if current_user.role.value == "patient":
+        own_patient_id = await get_own_patient_id(db, current_user)
+        if own_patient_id is None or prediction.patient_id != own_patient_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
             )
 
+    return CohortComparison(
+        prediction_id=prediction.id,
+        computed_at=cohort_analytics.computed_at,
+        ranks=cohort_analytics.ranks(prediction),
+    )
+
+
+@router.put("/{prediction_id}/outcome", response_model=PredictionDetail)
+async def record_prediction_outcome(
+    prediction_id: int,
+    outcome: PredictionOutcome,
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Record the confirmed diagnosis for a prediction (doctors only)"""
+    if current_user.role.value != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can record outcomes",
+        )
+
+    prediction = await db.get(PredictionModel, prediction_id)
+
+    if not prediction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Prediction not found"
+        )
+
+    prediction.confirmed_diagnosis = outcome.diagnosed
+    prediction.confirmed_at = func.now()
+
+    await db.commit()
+    await db.refresh(prediction)
+
     predictor = get_predictor()
     return PredictionDetail(
         **prediction.__dict__,
@@ -140,56 +373,62 @@ def get_prediction(
 
 
 @router.get("/patient/{patient_id}", response_model=List[PredictionResponse])
-def get_patient_predictions(
+async def get_patient_predictions(
     patient_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get all predictions for a specific patient"""
+    """Get predictions for a specific patient, newest first, one page at a time"""
     # Check access
     if current_user.role.value == "patient":
-        from app.models.patient import Patient
-
-        patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-        if not patient or patient.id != patient_id:
+        own_patient_id = await get_own_patient_id(db, current_user)
+        if own_patient_id != patient_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Access denied"
             )
 
-    predictions = (
-        db.query(PredictionModel)
-        .filter(PredictionModel.patient_id == patient_id)
-        .order_by(PredictionModel.created_at.desc())
-        .all()
+    query = select(*PREDICTION_LIST_COLUMNS).where(
+        PredictionModel.patient_id == patient_id
     )
+    result = await db.execute(keyset_paginate(query, PredictionModel, cursor, limit))
+    rows = result.all()
 
-    predictor = get_predictor()
-    results = []
-    for pred in predictions:
-        results.append(
-            PredictionResponse(
-                **pred.__dict__,
-                risk_interpretation=predictor._get_risk_interpretation(
-                    pred.risk_level, pred.risk_probability / 100
-                ),
-            )
+    # Continue into archived partitions once the database runs out of rows
+    if len(rows) <= limit:
+        if rows:
+            before = (rows[-1].created_at, rows[-1].id)
+        else:
+            before = decode_cursor(cursor) if cursor else None
+        rows += await get_archived_patient_predictions(
+            db,
+            patient_id,
+            before,
+            limit + 1 - len(rows),
+            [column.key for column in PREDICTION_LIST_COLUMNS],
         )
 
-    return results
+    rows = set_next_cursor(response, rows, limit)
+
+    return _build_list_response(rows)
 
 
 @router.get("/{prediction_id}/report")
-def download_prediction_report(
+async def download_prediction_report(
     prediction_id: int,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Download PDF report for a specific prediction"""
 
     # Get prediction
-    prediction = (
-        db.query(PredictionModel).filter(PredictionModel.id == prediction_id).first()
-    )
+    prediction = await db.get(PredictionModel, prediction_id)
+    if not prediction:
+        prediction = await get_pending_prediction(db, prediction_id)
+    if not prediction:
+        prediction = await get_archived_prediction(db, prediction_id)
 
     if not prediction:
         raise HTTPException(
@@ -199,21 +438,15 @@ def download_prediction_report(
     # Check authorization
     if current_user.role.value == "patient":
         # Patients can only download their own predictions
-        patient = (
-            db.query(PatientModel)
-            .filter(PatientModel.id == prediction.patient_id)
-            .first()
-        )
-        if not patient or patient.user_id != current_user.id:
+        own_patient_id = await get_own_patient_id(db, current_user)
+        if own_patient_id is None or prediction.patient_id != own_patient_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to access this prediction",
             )
 
     # Get patient data
-    patient = (
-        db.query(PatientModel).filter(PatientModel.id == prediction.patient_id).first()
-    )
+    patient = await db.get(PatientModel, prediction.patient_id)
 
     if not patient:
         raise HTTPException(
@@ -272,7 +505,12 @@ def download_prediction_report(
     }
 
     # Generate PDF
-    pdf_buffer = generate_prediction_report(prediction_dict, patient_dict)
+    pdf_buffer = await run_in_threadpool(
+        generate_prediction_report,
+        prediction_dict,
+        patient_dict,
+        cohort_analytics.ranks(prediction),
+    )
 
     # Return PDF as streaming response
     filename = f"diabetes_report_{patient.patient_code}_{prediction.id}.pdf"
@@ -282,4 +520,3 @@ def download_prediction_report(
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
-
@@ -0,0 +1,150 @@
+"""
+Bulk persistence for high-volume writes
+
+Rows are written in batches instead of one ``add`` + ``commit`` + ``refresh``
+per object:
+
+- ``COPY`` on PostgreSQL (asyncpg) for large batches. COPY returns nothing,
+  so ids are reserved from the table's sequence beforehand (as the
+  prediction journal does); any other returned column must be supplied in
+  the rows
+- multi-row ``INSERT ... RETURNING`` when the caller needs generated columns
+  back (ids, server defaults)
+- plain ``executemany`` elsewhere, with a row-by-row fallback for databases
+  that cannot return generated columns from a multi-row insert (older SQLite)
+
+The caller owns the transaction and commits once at the end.
+"""
+
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+def _batches(rows: Sequence[Dict[str, Any]], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _can_copy(dialect, rows: Sequence[Dict[str, Any]], returning) -> bool:
+    if not (
+        dialect.name == "postgresql"
+        and dialect.driver == "asyncpg"
+        and len(rows) >= settings.BULK_COPY_THRESHOLD
+    ):
+        return False
+    # Only ids can be generated up front
+    return all(name == "id" or name in rows[0] for name in returning or ())
+
+
+async def _reserve_ids(db: AsyncSession, table, count: int) -> List[int]:
+    ids = await db.scalars(
+        text(
+            "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+            "FROM generate_series(1, :count)"
+        ),
+        {"table": table.name, "count": count},
+    )
+    return sorted(ids)
+
+
+async def _copy_rows(
+    db: AsyncSession, table, rows: Sequence[Dict[str, Any]], batch_size: int
+) -> int:
+    """Stream rows into ``table`` with PostgreSQL COPY (asyncpg)"""
+    columns = list(rows[0])
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+
+    # COPY bypasses SQLAlchemy, so apply column type conversions (e.g. coded
+    # strings) here
+    processors = [
+        table.c[column].type.bind_processor(connection.dialect) for column in columns
+    ]
+
+    def to_record(row: Dict[str, Any]) -> tuple:
+        return tuple(
+            process(row[column]) if process else row[column]
+            for column, process in zip(columns, processors)
+        )
+
+    for batch in _batches(rows, batch_size):
+        await driver_connection.copy_records_to_table(
+            table.name,
+            schema_name=table.schema,
+            columns=columns,
+            records=[to_record(row) for row in batch],
+        )
+    return len(rows)
+
+
+async def bulk_insert(
+    db: AsyncSession,
+    model,
+    rows: Sequence[Dict[str, Any]],
+    returning: Optional[Sequence[str]] = None,
+    batch_size: Optional[int] = None,
+) -> List[Any]:
+    """
+    Insert many rows of ``model`` in batches
+
+    Args:
+        db: Database session; the caller commits
+        model: ORM model class to insert into
+        rows: Column/value dictionaries, all with the same keys
+        returning: Column names to return for each inserted row, in input order
+        batch_size: Rows per statement (defaults to BULK_INSERT_BATCH_SIZE)
+
+    Returns:
+        The returned rows (with attribute access) when ``returning`` is
+        given, otherwise an empty list
+    """
+    if not rows:
+        return []
+
+    table = model.__table__
+    batch_size = batch_size or settings.BULK_INSERT_BATCH_SIZE
+    dialect = db.bind.dialect
+
+    if _can_copy(dialect, rows, returning):
+        if returning is not None and "id" in returning and "id" not in rows[0]:
+            ids = await _reserve_ids(db, table, len(rows))
+            rows = [dict(row, id=row_id) for row, row_id in zip(rows, ids)]
+        await _copy_rows(db, table, rows, settings.BULK_COPY_BATCH_SIZE)
+        if returning is None:
+            return []
+        Returned = namedtuple("Returned", returning)
+        return [Returned(*(row[name] for name in returning)) for row in rows]
+
+    if returning is None:
+        for batch in _batches(rows, batch_size):
+            await db.execute(insert(table), batch)
+        return []
+
+    returning_columns = [table.c[name] for name in returning]
+
+    if not dialect.insert_executemany_returning_sort_by_parameter_order:
+        # No ordered multi-row RETURNING: insert one row at a time
+        results = []
+        for row in rows:
+            result = await db.execute(insert(table).returning(*returning_columns), row)
+            results.append(result.one())
+        return results
+
+    statement = insert(table).returning(
+        *returning_columns, sort_by_parameter_order=True
+    )
+    results = []
+    for batch in _batches(rows, batch_size):
+        result = await db.execute(
+            statement,
+            batch,
+            execution_options={"insertmanyvalues_page_size": batch_size},
+        )
+        results.extend(result.all())
+    return results
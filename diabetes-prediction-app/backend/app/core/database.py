@@ -1,24 +1,221 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from typing import Sequence
+from sqlalchemy import DateTime, SmallInteger, TypeDecorator, create_engine, event, exc
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.db_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
+from app.core.embedded import (
+    EmbeddedSession,
+    configure_sqlite,
+    ensure_database_directory,
+    is_embedded,
+)
+from app.core.query_metrics import instrument_queries
+from app.core.replicas import ReplicaRouter
 
-# Create database engine
-engine = create_engine(settings.DATABASE_URL)
+# Async driver equivalents of the sync DATABASE_URL drivers
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
 
-# Create session factory
+
+def get_async_database_url(url: str) -> str:
+    """Map DATABASE_URL to the equivalent URL for its async driver"""
+    parsed = make_url(url)
+    if parsed.drivername in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername])
+    return parsed.render_as_string(hide_password=False)
+
+
+# Embedded mode: a local SQLite file instead of a database server
+EMBEDDED = is_embedded(settings.DATABASE_URL)
+if EMBEDDED:
+    ensure_database_directory(settings.DATABASE_URL)
+
+# A local file cannot drop connections, so skip the ping on each checkout
+pool_pre_ping = settings.DB_POOL_PRE_PING and not EMBEDDED
+
+# Sync engine for schema creation, scripts and background jobs
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=pool_pre_ping,
+)
+instrument_engine(engine, "sync")
+instrument_queries(engine)
+
+# Async engine serving API requests. In embedded mode it is the single
+# writer connection, and requests queue for it in the pool.
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=1 if EMBEDDED else settings.DB_POOL_SIZE,
+    max_overflow=0 if EMBEDDED else settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=pool_pre_ping,
+)
+instrument_engine(async_engine.sync_engine, "async")
+instrument_queries(async_engine.sync_engine)
+
+# Read-only connections serving reads in embedded mode
+embedded_reader = None
+if EMBEDDED:
+    configure_sqlite(engine, begin="BEGIN IMMEDIATE")
+    configure_sqlite(async_engine.sync_engine, begin="BEGIN IMMEDIATE")
+    embedded_reader = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=pool_pre_ping,
+    )
+    configure_sqlite(embedded_reader.sync_engine, read_only=True)
+    instrument_queries(embedded_reader.sync_engine)
+
+# Async engines for read-only handlers, when replicas are configured
+read_engines = [
+    create_async_engine(
+        get_async_database_url(url),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    for url in settings.read_database_urls
+]
+for read_engine in read_engines:
+    instrument_queries(read_engine.sync_engine)
+replica_router = ReplicaRouter(
+    read_engines,
+    retry_after=settings.READ_REPLICA_RETRY_SECONDS,
+    pin_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if EMBEDDED:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=EmbeddedSession,
+        reader=embedded_reader.sync_engine,
+    )
+else:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
 
 # Create base class for models
 Base = declarative_base()
 
+# Timestamp column type used as a keyset pagination key. SQLite stores
+# CURRENT_TIMESTAMP as 'YYYY-MM-DD HH:MM:SS', so bound values use the same
+# text format there to keep (created_at, id) comparisons ordered correctly.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d "
+        "%(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+
+class CodedString(TypeDecorator):
+    """String from a fixed vocabulary stored as a smallint code
+
+    The code of each value is its position in ``values``, so new values may
+    only be appended.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, values: Sequence[str]):
+        super().__init__()
+        self.values = tuple(values)
+        self._codes = dict(enumerate(self.values))
 
-def get_db():
+    @property
+    def python_type(self):
+        return str
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self.values.index(value)
+        except ValueError:
+            raise ValueError(f"{value!r} is not one of {self.values}")
+
+    def process_result_value(self, value, dialect):
+        return self._codes.get(value)
+
+    def result_processor(self, dialect, coltype):
+        # Plain dict lookup (None maps to None), skipping the per-value
+        # TypeDecorator wrapper on large result sets
+        return self._codes.get
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_after_write(session):
+    """Keep a client's reads on the primary right after it commits"""
+    replica_router.pin(session.info.get("pin_key"))
+
+
+async def get_db(request: Request):
     """
     Dependency to get database session
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal(
+        info={"pin_key": request.headers.get("Authorization")}
+    ) as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """
+    Dependency to get a session for read-only handlers
+
+    Uses the next healthy read replica, or the primary when no replica is
+    configured or reachable, or the client wrote within the last
+    READ_YOUR_WRITES_SECONDS.
+    """
+    for engine in replica_router.candidates(request.headers.get("Authorization")):
+        db = AsyncSessionLocal(bind=engine)
+        try:
+            # Connect eagerly so an unreachable replica falls through
+            await db.connection()
+        except (exc.DBAPIError, OSError) as e:
+            await db.close()
+            replica_router.mark_down(engine)
+            print(f"Warning: read replica {engine.url!r} unavailable: {e}")
+            continue
+
+        async with db:
+            yield db
+        return
+
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """Thread-safe counters for connection pool activity"""
+
+    def __init__(self, sample_size: int = 1000):
+        self._lock = threading.Lock()
+        self._wait_samples = deque(maxlen=sample_size)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.in_use = 0
+            self.peak_in_use = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.waits = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self._wait_samples.clear()
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.waits += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._wait_samples.append(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def on_checkin(self, *args):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def on_invalidate(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters with checkout wait statistics in milliseconds"""
+        with self._lock:
+            samples = sorted(self._wait_samples)
+            p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0.0
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checkout_wait_ms": {
+                    "avg": (
+                        round(self.total_wait / self.waits * 1000, 3)
+                        if self.waits
+                        else 0.0
+                    ),
+                    "p95": round(p95 * 1000, 3),
+                    "max": round(self.max_wait * 1000, 3),
+                },
+            }
+
+
+# Counters of each instrumented engine's pool, by engine name
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+class _CheckoutTimingMixin:
+    """Records how long each pool checkout waits in the pool's ``metrics``"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        if self.metrics is None:
+            return super().connect()
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # dispose() swaps in a new pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    """QueuePool that records checkout wait times"""
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    """Async-adapted QueuePool that records checkout wait times"""
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolMetrics:
+    """Attach pool event hooks that feed ``pool_metrics[name]``"""
+    metrics = pool_metrics[name] = PoolMetrics()
+    engine.pool.metrics = metrics
+    event.listen(engine, "connect", metrics.on_connect)
+    event.listen(engine, "checkout", metrics.on_checkout)
+    event.listen(engine, "checkin", metrics.on_checkin)
+    event.listen(engine, "invalidate", metrics.on_invalidate)
+    event.listen(engine, "soft_invalidate", metrics.on_invalidate)
+    return metrics
+
+
+def get_pool_status(engine: Engine) -> Dict[str, Any]:
+    """Current state of the engine's pool combined with its own counters"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                # overflow() counts up from -size; only positive values are extra connections
+                "overflow": max(pool.overflow(), 0),
+            }
+        )
+    if getattr(pool, "metrics", None) is not None:
+        status.update(pool.metrics.snapshot())
+    return status
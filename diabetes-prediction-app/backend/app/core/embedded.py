@@ -0,0 +1,109 @@
+"""
+Embedded single-node mode on SQLite
+
+With ``DATABASE_URL=sqlite:///path/to/file.db`` the API runs without a
+database server. Every connection opens the file in WAL mode with the
+SQLITE_* pragmas, so readers never block the writer (or each other).
+
+SQLite still allows only one write transaction at a time, and a transaction
+that reads first and writes later fails with "database is locked" when
+another connection committed in between. Writes therefore go through a
+single writer connection that starts its transactions with BEGIN IMMEDIATE.
+Requests queue for it in its connection pool, so they wait in order instead
+of failing. ``EmbeddedSession`` sends each statement of a session to a pool of
+read-only connections until the session writes, then sticks to the writer for
+the rest of that transaction so it reads its own writes.
+
+Other processes (workers, cron jobs) wait up to SQLITE_BUSY_TIMEOUT_MS for the
+write lock.
+"""
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import settings
+
+
+def is_embedded(url: str) -> bool:
+    """True when ``url`` points at an SQLite database file"""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def ensure_database_directory(url: str):
+    """Create the directory of an SQLite database file"""
+    directory = os.path.dirname(os.path.abspath(make_url(url).database))
+    os.makedirs(directory, exist_ok=True)
+
+
+def configure_sqlite(engine: Engine, begin: str = "BEGIN", read_only: bool = False):
+    """
+    Apply the embedded mode pragmas to every connection of ``engine``
+
+    Args:
+        engine: Sync engine (``AsyncEngine.sync_engine`` for async ones)
+        begin: Statement that starts each transaction
+        read_only: Refuse writes on these connections (PRAGMA query_only)
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        # Take over transaction control from the driver, so the BEGIN below
+        # is the only one issued and pragmas run outside a transaction
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024**2}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        # On the DBAPI cursor: the driver's implicit BEGIN is not counted as a
+        # statement on other databases either
+        cursor = connection.connection.cursor()
+        cursor.execute(begin)
+        cursor.close()
+
+
+class EmbeddedSession(Session):
+    """Session that reads from ``reader`` until it writes through its bind
+
+    Sessions explicitly bound to another database (e.g. a read replica chosen
+    by ``get_read_db``) use that bind for everything.
+    """
+
+    def __init__(self, *args, reader: Engine = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if reader is not None and self.bind is not None and self.bind.url != reader.url:
+            reader = None
+        self.reader = reader
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.reader is None or self.info.get("writing"):
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["writing"] = True
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return self.reader
+
+
+@event.listens_for(EmbeddedSession, "after_transaction_end")
+def _release_writer(session, transaction):
+    """Send the next transaction's reads back to the read-only pool"""
+    if transaction.parent is None:
+        session.info.pop("writing", None)
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.config import settings
+
+
+class TTLCache:
+    """
+    Bounded in-process cache whose entries expire after ``ttl`` seconds
+
+    Least recently used entries are evicted once ``maxsize`` is reached.
+    Each worker process has its own copy, so invalidation only reaches the
+    current process; the TTL bounds how long other workers see stale data.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for ``key``, None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def status(self) -> Dict[str, Any]:
+        """Size and hit rate of this process's copy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# Token subject (email) -> column values of that user, without the password hash
+users = TTLCache(settings.IDENTITY_CACHE_SIZE, settings.USER_CACHE_SECONDS)
+
+# User id -> id of that user's patient record
+patient_ids = TTLCache(settings.IDENTITY_CACHE_SIZE, settings.PATIENT_ID_CACHE_SECONDS)
+
+# How authenticated requests found their user: "claims" (AUTH_STATELESS),
+# "cache" or "database"
+authentications: Counter = Counter()
@@ -0,0 +1,164 @@
+"""
+Monthly range partitions of the predictions table (PostgreSQL only)
+
+``predictions`` is partitioned by ``created_at`` into one partition per UTC
+calendar month, named ``predictions_yYYYYmMM``, plus a default partition that
+catches rows outside the created range. Partitions are created ahead of time
+so inserts never land in the default partition under normal operation.
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PARENT_TABLE = "predictions"
+DEFAULT_PARTITION = "predictions_default"
+
+_PARTITION_NAME = re.compile(r"^predictions_y(\d{4})m(\d{2})$")
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant (UTC) of the month containing ``value``"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Shift a month start by a number of months"""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    """Month start encoded in a partition name, None for other tables"""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """Whether ``predictions`` is a partitioned table on this database"""
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(
+        connection.scalar(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table))"
+            ),
+            {"table": PARENT_TABLE},
+        )
+    )
+
+
+def list_partitions(connection: Connection) -> List[str]:
+    """Names of the monthly partitions currently attached, oldest first"""
+    names = connection.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": PARENT_TABLE},
+    ).all()
+    return sorted(name for name in names if partition_month(name) is not None)
+
+
+def create_partition(connection: Connection, month: datetime):
+    """
+    Create the partition for one month if it does not exist yet
+
+    Rows that already landed in the default partition for that month are
+    moved into the new partition.
+    """
+    name = partition_name(month)
+    if connection.scalar(text("SELECT to_regclass(:name)"), {"name": name}):
+        return
+
+    bounds = {"lower": month, "upper": add_months(month, 1)}
+    bound_sql = (
+        f"FOR VALUES FROM ('{bounds['lower'].isoformat()}') "
+        f"TO ('{bounds['upper'].isoformat()}')"
+    )
+    stranded = connection.scalar(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :lower AND created_at < :upper)"
+        ),
+        bounds,
+    )
+
+    if not stranded:
+        connection.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bound_sql}")
+        )
+        return
+
+    connection.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+    )
+    connection.execute(
+        text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bound_sql}")
+    )
+    connection.execute(
+        text(
+            f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :lower AND created_at < :upper"
+        ),
+        bounds,
+    )
+    connection.execute(
+        text(
+            f"DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= :lower AND created_at < :upper"
+        ),
+        bounds,
+    )
+    connection.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    )
+
+
+def ensure_partitions(
+    connection: Connection, months_ahead: int, since: Optional[datetime] = None
+) -> List[str]:
+    """
+    Create monthly partitions from ``since`` (default: this month) up to
+    ``months_ahead`` months in the future, plus partitions for any months
+    whose rows ended up in the default partition (e.g. backfills)
+
+    Returns:
+        Names of the partitions that were created
+    """
+    now = month_start(datetime.now(timezone.utc))
+    month = month_start(since) if since is not None else now
+    months = set()
+    while month <= add_months(now, months_ahead):
+        months.add(month)
+        month = add_months(month, 1)
+
+    stranded = connection.scalars(
+        text(
+            "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') "
+            f"FROM {DEFAULT_PARTITION}"
+        )
+    )
+    months.update(month_start(value.replace(tzinfo=timezone.utc)) for value in stranded)
+
+    existing = set(list_partitions(connection))
+    created = []
+    for month in sorted(months):
+        name = partition_name(month)
+        if name not in existing:
+            create_partition(connection, month)
+            created.append(name)
+    return created
@@ -0,0 +1,320 @@
+"""
+Per-request SQL instrumentation
+
+Cursor execution events on each engine count statements and their time
+against the request that issued them (found through a context variable set by
+``QueryMetricsMiddleware``). Statements slower than SLOW_QUERY_MS are logged
+with their route, and a statement shape repeated N_PLUS_ONE_THRESHOLD times
+within one request is flagged as a likely N+1 query.
+
+With QUERY_BUDGET_STRICT (for tests), a request to a route listed in
+``QUERY_BUDGETS`` that repeats a statement shape that often, or issues more
+statements than its budget, fails with ``QueryBudgetExceeded``. Routes
+without a budget are only logged.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statements each route may issue per request on cold identity caches: the
+# user lookup of authenticated routes, the patient id lookup of patient users,
+# then the handler's own queries. Strict mode fails requests that
+# exceed them. The batch endpoint scales with its input and has no budget.
+QUERY_BUDGETS: Dict[str, int] = {
+    "POST /api/auth/register": 2,
+    "POST /api/auth/login": 1,
+    "GET /api/auth/me": 1,
+    "POST /api/auth/me/ensure-patient": 3,
+    "POST /api/patients/": 2,
+    "GET /api/patients/": 2,
+    "GET /api/patients/with-latest-risk": 2,
+    "GET /api/patients/search": 2,
+    "GET /api/patients/{patient_id}": 2,
+    "GET /api/patients/{patient_id}/risk-trend": 4,
+    "PUT /api/patients/{patient_id}": 4,
+    "DELETE /api/patients/{patient_id}": 6,
+    "POST /api/predictions/": 3,
+    "GET /api/predictions/": 3,
+    "GET /api/predictions/stats": 3,
+    "GET /api/predictions/{prediction_id}": 4,
+    "GET /api/predictions/patient/{patient_id}": 4,
+    "GET /api/predictions/{prediction_id}/cohort": 4,
+    "GET /api/predictions/{prediction_id}/report": 4,
+    "PUT /api/predictions/{prediction_id}/outcome": 4,
+}
+
+# Distinct statement shapes kept in the aggregates
+MAX_STATEMENT_SHAPES = 1000
+
+_PARAMETER_LIST = re.compile(r"\((?:\s*(?:\$\d+|\?|%\(\w+\)s)\s*,?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a request issues unexpected queries"""
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with whitespace and expanded IN lists collapsed"""
+    return _PARAMETER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestQueries:
+    """Statements issued while serving one request"""
+
+    def __init__(self, route: str, budget: Optional[int] = None, scope=None):
+        self.route = route
+        self.budget = budget
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.repeated = set()
+        self._scope = scope
+
+    def add(self, other: "RequestQueries"):
+        """Count the statements of a nested request in this one too"""
+        self.count += other.count
+        self.seconds += other.seconds
+        self.shapes.update(other.shapes)
+        self.repeated.update(other.repeated)
+
+    def resolve_route(self):
+        """Switch to the matched route template once the router has run"""
+        if self._scope is None:
+            return
+        route = self._scope.get("route")
+        if route is not None:
+            self.route = f"{self._scope['method']} {route.path}"
+            self.budget = QUERY_BUDGETS.get(self.route)
+            self._scope = None
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar(
+    "current_request_queries", default=None
+)
+
+
+class QueryMetrics:
+    """Thread-safe aggregates of statements per route and per shape"""
+
+    def __init__(self, sample_size: int = 50):
+        self._lock = threading.Lock()
+        self._slow = deque(maxlen=sample_size)
+        self._n_plus_one = deque(maxlen=sample_size)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes: Dict[str, Dict[str, Any]] = {}
+            self.statements: Dict[str, Dict[str, Any]] = {}
+            self._slow.clear()
+            self._n_plus_one.clear()
+
+    def record_statement(self, shape: str, seconds: float, route: Optional[str]):
+        with self._lock:
+            stats = self.statements.get(shape)
+            if stats is None:
+                if len(self.statements) >= MAX_STATEMENT_SHAPES:
+                    return
+                stats = self.statements[shape] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+            stats["count"] += 1
+            stats["total_ms"] += seconds * 1000
+            stats["max_ms"] = max(stats["max_ms"], seconds * 1000)
+
+            if seconds * 1000 >= settings.SLOW_QUERY_MS:
+                self._slow.append(
+                    {
+                        "route": route,
+                        "ms": round(seconds * 1000, 3),
+                        "statement": shape,
+                    }
+                )
+
+    def record_n_plus_one(self, route: str, shape: str, count: int):
+        with self._lock:
+            self._n_plus_one.append(
+                {"route": route, "statement": shape, "count": count}
+            )
+
+    def record_request(self, queries: RequestQueries):
+        with self._lock:
+            stats = self.routes.setdefault(
+                queries.route,
+                {
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_ms": 0.0,
+                    "max_db_ms": 0.0,
+                    "n_plus_one": 0,
+                    "over_budget": 0,
+                },
+            )
+            stats["requests"] += 1
+            stats["queries"] += queries.count
+            stats["max_queries"] = max(stats["max_queries"], queries.count)
+            stats["db_ms"] += queries.seconds * 1000
+            stats["max_db_ms"] = max(stats["max_db_ms"], queries.seconds * 1000)
+            stats["n_plus_one"] += bool(queries.repeated)
+            if queries.budget is not None and queries.count > queries.budget:
+                stats["over_budget"] += 1
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        """Per-route totals, the most expensive statements and recent outliers"""
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": stats["requests"],
+                    "avg_queries": round(stats["queries"] / stats["requests"], 2),
+                    "max_queries": stats["max_queries"],
+                    "budget": QUERY_BUDGETS.get(route),
+                    "avg_db_ms": round(stats["db_ms"] / stats["requests"], 3),
+                    "max_db_ms": round(stats["max_db_ms"], 3),
+                    "n_plus_one_requests": stats["n_plus_one"],
+                    "over_budget_requests": stats["over_budget"],
+                }
+                for route, stats in sorted(self.routes.items())
+            }
+            statements = sorted(
+                self.statements.items(),
+                key=lambda item: item[1]["total_ms"],
+                reverse=True,
+            )[:top]
+            return {
+                "slow_query_ms": settings.SLOW_QUERY_MS,
+                "routes": routes,
+                "top_statements": [
+                    {
+                        "statement": shape,
+                        "count": stats["count"],
+                        "total_ms": round(stats["total_ms"], 3),
+                        "avg_ms": round(stats["total_ms"] / stats["count"], 3),
+                        "max_ms": round(stats["max_ms"], 3),
+                    }
+                    for shape, stats in statements
+                ],
+                "slow_queries": list(self._slow),
+                "n_plus_one": list(self._n_plus_one),
+            }
+
+
+query_metrics = QueryMetrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start"].pop()
+    shape = statement_shape(statement)
+    queries = _current.get()
+    if queries is not None:
+        queries.resolve_route()
+    route = queries.route if queries is not None else None
+
+    query_metrics.record_statement(shape, seconds, route)
+    if seconds * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s", seconds * 1000, route or "-", shape
+        )
+
+    if queries is None:
+        return
+    queries.count += 1
+    queries.seconds += seconds
+    queries.shapes[shape] += 1
+
+    repeats = queries.shapes[shape]
+    if repeats == settings.N_PLUS_ONE_THRESHOLD:
+        queries.repeated.add(shape)
+        query_metrics.record_n_plus_one(route, shape, repeats)
+        logger.warning(
+            "Possible N+1 on %s: statement ran %d times: %s", route, repeats, shape
+        )
+        if settings.QUERY_BUDGET_STRICT and queries.budget is not None:
+            raise QueryBudgetExceeded(
+                f"{route} ran the same statement {repeats} times: {shape}"
+            )
+
+    if (
+        settings.QUERY_BUDGET_STRICT
+        and queries.budget is not None
+        and queries.count > queries.budget
+    ):
+        raise QueryBudgetExceeded(
+            f"{route} issued {queries.count} statements, budget is {queries.budget}"
+        )
+
+
+def instrument_queries(engine: Engine):
+    """Attach the cursor execution hooks that feed ``query_metrics``"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries(max_queries: Optional[int] = None):
+    """
+    Count the statements issued inside the block (for tests and scripts)
+
+    Args:
+        max_queries: Raise QueryBudgetExceeded when more are issued
+
+    Yields:
+        The RequestQueries being filled in
+    """
+    queries = RequestQueries("count_queries", max_queries)
+    token = _current.set(queries)
+    try:
+        yield queries
+    finally:
+        _current.reset(token)
+    if max_queries is not None and queries.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{queries.count} statements issued, expected at most {max_queries}"
+        )
+
+
+class QueryMetricsMiddleware:
+    """ASGI middleware that attributes statements to the current request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # The router adds the matched route to this (shared) scope later
+        queries = RequestQueries(f"{scope['method']} {scope['path']}", scope=scope)
+        # An enclosing count_queries() block (in-process test clients)
+        outer = _current.get()
+        token = _current.set(queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            if queries.count:
+                queries.resolve_route()
+                query_metrics.record_request(queries)
+            if outer is not None:
+                outer.add(queries)
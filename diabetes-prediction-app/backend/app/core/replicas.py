@@ -0,0 +1,75 @@
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class ReplicaRouter:
+    """
+    Round-robin selection of read replicas
+
+    Replicas that fail to connect are skipped for ``retry_after`` seconds.
+    Callers that recently wrote are pinned to the primary for
+    ``pin_seconds`` so they read their own writes despite replication lag.
+    """
+
+    def __init__(
+        self, engines: List[AsyncEngine], retry_after: float, pin_seconds: float
+    ):
+        self.engines = engines
+        self.retry_after = retry_after
+        self.pin_seconds = pin_seconds
+        self._lock = threading.Lock()
+        self._next = 0
+        self._down_until: Dict[int, float] = {}
+        self._pins: Dict[str, float] = {}
+
+    def candidates(self, pin_key: Optional[str] = None) -> Iterator[AsyncEngine]:
+        """Healthy replicas in round-robin order; none while pinned"""
+        if not self.engines or self.is_pinned(pin_key):
+            return
+
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.engines)
+
+        now = time.monotonic()
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self._down_until.get(index, 0.0) <= now:
+                yield self.engines[index]
+
+    def mark_down(self, engine: AsyncEngine):
+        """Skip a replica until its retry window has passed"""
+        index = self.engines.index(engine)
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_after
+
+    def pin(self, pin_key: Optional[str]):
+        """Route reads for ``pin_key`` to the primary for a short window"""
+        if not pin_key or not self.engines:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._pins) > 1000:
+                self._pins = {
+                    key: until for key, until in self._pins.items() if until > now
+                }
+            self._pins[pin_key] = now + self.pin_seconds
+
+    def is_pinned(self, pin_key: Optional[str]) -> bool:
+        if not pin_key:
+            return False
+        return self._pins.get(pin_key, 0.0) > time.monotonic()
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Health of each configured replica"""
+        now = time.monotonic()
+        return [
+            {
+                "url": engine.url.render_as_string(hide_password=True),
+                "healthy": self._down_until.get(index, 0.0) <= now,
+            }
+            for index, engine in enumerate(self.engines)
+        ]
@@ -1,9 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import Base, engine
-from app.api.endpoints import auth, patients, predictions
+from app.core.database import engine
+from app.core.partitions import ensure_partitions, is_partitioned
+from app.core.query_metrics import QueryMetricsMiddleware
+from app.api.endpoints import auth, patients, predictions, metrics
 from app.ml.load_models import get_ml_models
+from app.utils.cohort_analytics import cohort_analytics
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.prediction_journal import prediction_journal
 
 # Load models globally
 try:
@@ -13,9 +18,6 @@ try:
 except Exception as e:
     print(f"Warning: Could not preload models: {e}")
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -31,12 +33,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Attribute SQL statements to the request (and route) that issued them
+app.add_middleware(QueryMetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(patients.router, prefix="/api")
 app.include_router(predictions.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
 
 
 @app.on_event("startup")
@@ -44,9 +51,30 @@ async def startup_event():
     """Load ML models on startup"""
     print("🚀 Starting Diabetes Prediction API...")
     get_ml_models()  # Load models
+
+    # Keep the upcoming monthly prediction partitions ready (PostgreSQL)
+    try:
+        with engine.begin() as connection:
+            if is_partitioned(connection):
+                ensure_partitions(connection, settings.PREDICTION_PARTITIONS_AHEAD)
+    except Exception as e:
+        print(f"Warning: Could not create prediction partitions: {e}")
+
+    # Replay and start draining the write-behind journal, when enabled
+    await prediction_journal.start()
+
+    # Load (and periodically refresh) the cohort quantile tables
+    cohort_analytics.start()
     print("✅ Application ready!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain journaled predictions before exiting"""
+    await cohort_analytics.stop()
+    await prediction_journal.stop()
+
+
 @app.get("/")
 def root():
     """Root endpoint"""
@@ -0,0 +1,279 @@
+"""
+Incremental model updates from confirmed diagnoses
+
+Refits the logistic regression on the predictions labelled since the last
+update plus a replay sample of earlier labelled rows, with an L2 penalty on
+the distance from the active coefficients so the update refines the current
+model instead of replacing it. The candidate is scored against the active
+model on a holdout split and only written as a new versioned artifact set
+under ``ML_MODELS_PATH/versions`` when it does at least as well. The API
+picks up the new version on its next start.
+
+Run on a schedule (e.g. nightly cron) from the backend directory:
+
+    python -m app.ml.incremental_update
+"""
+
+import copy
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import expit
+from sklearn.metrics import log_loss
+from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_sample_weight
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.ml.load_models import get_ml_models
+from app.ml.predictor import get_predictor
+from app.models.prediction import Prediction as PredictionModel
+from app.schemas.prediction import PredictionInput
+
+INPUT_FIELDS = list(PredictionInput.model_fields)
+
+
+def fetch_labelled_delta(
+    db: Session, since_at: Optional[datetime], since_id: int
+) -> List[Any]:
+    """Fetch predictions labelled after the (confirmed_at, id) watermark"""
+    query = db.query(
+        PredictionModel.id,
+        PredictionModel.confirmed_at,
+        PredictionModel.confirmed_diagnosis,
+        *[getattr(PredictionModel, field) for field in INPUT_FIELDS],
+    ).filter(PredictionModel.confirmed_diagnosis.isnot(None))
+
+    if since_at is not None:
+        key = tuple_(PredictionModel.confirmed_at, PredictionModel.id)
+        bound = tuple_(since_at, since_id, types=[c.type for c in key.clauses])
+        query = query.filter(key > bound)
+
+    return query.order_by(PredictionModel.confirmed_at, PredictionModel.id).all()
+
+
+def fetch_replay_sample(
+    db: Session, through_at: Optional[datetime], through_id: int, limit: int
+) -> List[Any]:
+    """Fetch the most recent predictions labelled up to the watermark"""
+    if through_at is None or limit <= 0:
+        return []
+
+    key = tuple_(PredictionModel.confirmed_at, PredictionModel.id)
+    bound = tuple_(through_at, through_id, types=[c.type for c in key.clauses])
+    return (
+        db.query(
+            PredictionModel.id,
+            PredictionModel.confirmed_at,
+            PredictionModel.confirmed_diagnosis,
+            *[getattr(PredictionModel, field) for field in INPUT_FIELDS],
+        )
+        .filter(PredictionModel.confirmed_diagnosis.isnot(None))
+        .filter(key <= bound)
+        .order_by(PredictionModel.confirmed_at.desc(), PredictionModel.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def fit_anchored(model, X: np.ndarray, y: np.ndarray, C: float, max_iter: int):
+    """
+    Fit a copy of a logistic regression anchored to its current coefficients
+
+    Minimizes ``C * sum(w_i * logloss_i) + 0.5 * ||coef - coef_prev||^2``,
+    with the model's class weights as ``w_i``. The intercept is not penalized,
+    matching scikit-learn.
+
+    Args:
+        model: Fitted binary LogisticRegression to start from
+        X: Scaled feature matrix
+        y: Labels (0/1)
+        C: Weight of the new data relative to staying near ``coef_prev``
+        max_iter: L-BFGS iteration limit
+
+    Returns:
+        A new fitted model; ``model`` is left unchanged
+    """
+    coef_prev = model.coef_.ravel().astype(float)
+    start = np.append(coef_prev, model.intercept_[0])
+    signs = np.where(y == model.classes_[1], 1.0, -1.0)
+    weights = compute_sample_weight(model.class_weight, y)
+
+    def objective(params):
+        coef, intercept = params[:-1], params[-1]
+        margin = signs * (X @ coef + intercept)
+        loss = C * np.dot(weights, np.logaddexp(0.0, -margin))
+        diff = coef - coef_prev
+        loss += 0.5 * np.dot(diff, diff)
+
+        dz = -C * weights * signs * expit(-margin)
+        grad = np.append(X.T @ dz + diff, dz.sum())
+        return loss, grad
+
+    result = minimize(
+        objective,
+        start,
+        jac=True,
+        method="L-BFGS-B",
+        options={"maxiter": max_iter},
+    )
+
+    updated = copy.deepcopy(model)
+    updated.coef_ = result.x[:-1].reshape(1, -1)
+    updated.intercept_ = result.x[-1:].copy()
+    updated.n_iter_ = np.array([result.nit], dtype=np.int32)
+    return updated
+
+
+def holdout_loss(model, X: np.ndarray, y: np.ndarray) -> float:
+    """Log loss of a model on held-out labelled rows (lower is better)"""
+    return float(log_loss(y, model.predict_proba(X)[:, 1], labels=[0, 1]))
+
+
+def write_artifact_set(model, manifest: Dict[str, Any]) -> str:
+    """Write a versioned artifact set and make it the active version"""
+    ml_models = get_ml_models()
+    base_path = settings.ML_MODELS_PATH
+    version_path = os.path.join(base_path, "versions", manifest["version"])
+    os.makedirs(version_path, exist_ok=True)
+
+    joblib.dump(
+        model, os.path.join(version_path, "logistic_regression_diabetes_model.pkl")
+    )
+    joblib.dump(ml_models.scaler, os.path.join(version_path, "robust_scaler.pkl"))
+    joblib.dump(ml_models.encoder, os.path.join(version_path, "onehot_encoder.pkl"))
+    joblib.dump(
+        ml_models.feature_columns, os.path.join(version_path, "feature_columns.pkl")
+    )
+    joblib.dump(ml_models.poly, os.path.join(version_path, "poly.pkl"))
+    if ml_models.clip_bounds is not None:
+        joblib.dump(
+            ml_models.clip_bounds, os.path.join(version_path, "clip_bounds.pkl")
+        )
+
+    with open(os.path.join(version_path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Switch the active version atomically
+    current_path = os.path.join(base_path, "CURRENT")
+    with open(current_path + ".tmp", "w") as f:
+        f.write(manifest["version"])
+    os.replace(current_path + ".tmp", current_path)
+
+    return version_path
+
+
+def run_incremental_update(db: Session) -> Optional[str]:
+    """
+    Update the active model with newly labelled predictions
+
+    Args:
+        db: Database session
+
+    Returns:
+        The new version name, or None when there was not enough new data or
+        the candidate did worse than the active model on the holdout rows
+    """
+    start = time.perf_counter()
+    ml_models = get_ml_models()
+    predictor = get_predictor()
+
+    manifest = ml_models.manifest or {}
+    since_at = manifest.get("labelled_through_at")
+    if since_at is not None:
+        since_at = datetime.fromisoformat(since_at)
+    since_id = manifest.get("labelled_through_id", 0)
+
+    rows = fetch_labelled_delta(db, since_at, since_id)
+    if len(rows) < settings.INCREMENTAL_UPDATE_MIN_ROWS:
+        print(
+            f"Skipping incremental update: {len(rows)} newly labelled rows "
+            f"(minimum {settings.INCREMENTAL_UPDATE_MIN_ROWS})"
+        )
+        return None
+
+    y_new = np.array([int(row.confirmed_diagnosis) for row in rows])
+    if len(np.unique(y_new)) < 2:
+        print("Skipping incremental update: new labels contain a single class")
+        return None
+
+    replay = fetch_replay_sample(
+        db, since_at, since_id, settings.INCREMENTAL_UPDATE_REPLAY_ROWS
+    )
+    labelled = rows + replay
+    y = np.array([int(row.confirmed_diagnosis) for row in labelled])
+
+    records = [
+        {field: getattr(row, field) for field in INPUT_FIELDS} for row in labelled
+    ]
+    X = predictor.prepare_features(predictor.preprocessor.preprocess_batch(records))
+
+    try:
+        X_train, X_holdout, y_train, y_holdout = train_test_split(
+            X,
+            y,
+            test_size=settings.INCREMENTAL_UPDATE_HOLDOUT_FRACTION,
+            random_state=42,
+            stratify=y,
+        )
+    except ValueError as e:
+        print(f"Skipping incremental update: cannot build a holdout split ({e})")
+        return None
+
+    # Refine the active coefficients instead of refitting from scratch
+    model = fit_anchored(
+        ml_models.model,
+        X_train,
+        y_train,
+        C=settings.INCREMENTAL_UPDATE_C,
+        max_iter=settings.INCREMENTAL_UPDATE_MAX_ITER,
+    )
+
+    current_loss = holdout_loss(ml_models.model, X_holdout, y_holdout)
+    candidate_loss = holdout_loss(model, X_holdout, y_holdout)
+    if candidate_loss > current_loss:
+        print(
+            f"Keeping the active model: candidate holdout log loss "
+            f"{candidate_loss:.4f} is worse than {current_loss:.4f}"
+        )
+        return None
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    new_manifest = {
+        "version": version,
+        "parent_version": manifest.get("version"),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "labelled_through_at": rows[-1].confirmed_at.isoformat(),
+        "labelled_through_id": rows[-1].id,
+        "rows": len(rows),
+        "replay_rows": len(replay),
+        "holdout_rows": len(y_holdout),
+        "holdout_log_loss": round(candidate_loss, 6),
+        "parent_holdout_log_loss": round(current_loss, 6),
+        "update_time_s": round(time.perf_counter() - start, 4),
+    }
+    version_path = write_artifact_set(model, new_manifest)
+
+    print(
+        f"✅ Model version {version} trained on {len(rows)} new rows "
+        f"(+{len(replay)} replayed) in {new_manifest['update_time_s']}s, "
+        f"holdout log loss {current_loss:.4f} -> {candidate_loss:.4f}, "
+        f"saved to {version_path}"
+    )
+    return version
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        run_incremental_update(db)
+    finally:
+        db.close()
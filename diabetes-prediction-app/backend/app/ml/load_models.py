@@ -1,4 +1,5 @@
 import joblib
+import json
 import os
 from app.core.config import settings
 
@@ -14,6 +15,9 @@ class MLModels:
     encoder = None
     poly = None
     feature_columns = None
+    clip_bounds = None
+    manifest = None
+    models_path = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -25,7 +29,7 @@ class MLModels:
         if self._models_loaded:
             return
 
-        models_path = settings.ML_MODELS_PATH
+        models_path = resolve_models_path()
 
         try:
             # Load the trained model
@@ -47,6 +51,21 @@ class MLModels:
             # Load the fitted polynomial features transformer
             self.poly = joblib.load(os.path.join(models_path, "poly.pkl"))
 
+            # Load the outlier clip bounds (absent in artifact sets exported
+            # before clipping was applied at serving time)
+            clip_bounds_path = os.path.join(models_path, "clip_bounds.pkl")
+            if os.path.exists(clip_bounds_path):
+                self.clip_bounds = joblib.load(clip_bounds_path)
+
+            # Load the version manifest written by incremental updates
+            manifest_path = os.path.join(models_path, "manifest.json")
+            self.manifest = {}
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    self.manifest = json.load(f)
+
+            self.models_path = models_path
+
             self._models_loaded = True
             print("✅ ML models loaded successfully")
         except Exception as e:
@@ -54,6 +73,22 @@ class MLModels:
             raise
 
 
+def resolve_models_path() -> str:
+    """Return the directory of the active artifact set
+
+    ``ML_MODELS_PATH/CURRENT`` names the active version under
+    ``ML_MODELS_PATH/versions``. Without it the base artifacts are used.
+    """
+    base_path = settings.ML_MODELS_PATH
+    current_path = os.path.join(base_path, "CURRENT")
+    if os.path.exists(current_path):
+        with open(current_path) as f:
+            version = f.read().strip()
+        if version:
+            return os.path.join(base_path, "versions", version)
+    return base_path
+
+
 # Create global instance
 ml_models = MLModels()
 
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Tuple
 import numpy as np
 from app.ml.load_models import get_ml_models
 from app.ml.preprocessor import DiabetesPreprocessor
@@ -12,7 +12,9 @@ class DiabetesPredictor:
     def __init__(self):
         self.ml_models = get_ml_models()
         self.preprocessor = DiabetesPreprocessor(
-            encoder=self.ml_models.encoder, poly=self.ml_models.poly
+            encoder=self.ml_models.encoder,
+            poly=self.ml_models.poly,
+            clip_bounds=self.ml_models.clip_bounds,
         )
 
     def predict(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -25,9 +27,51 @@ class DiabetesPredictor:
         Returns:
             Dictionary containing prediction results
         """
-        # Preprocess the data
-        processed_data = self.preprocessor.preprocess(input_data)
+        return self.predict_batch([input_data])[0]
+
+    def predict_batch(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Make predictions for many inputs in one vectorized pass
+
+        Args:
+            records: List of dictionaries containing all 29 input fields
 
+        Returns:
+            List of prediction result dictionaries, in input order
+        """
+        # Preprocess the data
+        processed_data = self.preprocessor.preprocess_batch(records)
+        scaled_data = self.prepare_features(processed_data)
+
+        # Make predictions
+        prediction_classes = self.ml_models.model.predict(scaled_data)
+        prediction_probas = self.ml_models.model.predict_proba(scaled_data)[:, 1]
+
+        results = []
+        for prediction_class, prediction_proba in zip(
+            prediction_classes, prediction_probas
+        ):
+            prediction_proba = float(prediction_proba)
+
+            # Determine risk level
+            risk_level = self._calculate_risk_level(prediction_proba)
+
+            results.append(
+                {
+                    "prediction_class": int(prediction_class),
+                    "risk_probability": round(
+                        prediction_proba * 100, 2
+                    ),  # Convert to percentage
+                    "risk_level": risk_level,
+                    "risk_interpretation": self._get_risk_interpretation(
+                        risk_level, prediction_proba
+                    ),
+                }
+            )
+        return results
+
+    def prepare_features(self, processed_data) -> np.ndarray:
+        """Align preprocessed data with the training columns and scale it"""
         # Ensure columns match training data
         # Reorder columns to match feature_columns from training
         feature_cols = self.ml_models.feature_columns
@@ -41,25 +85,7 @@ class DiabetesPredictor:
         processed_data = processed_data[feature_cols]
 
         # Scale the features
-        scaled_data = self.ml_models.scaler.transform(processed_data)
-
-        # Make prediction
-        prediction_class = int(self.ml_models.model.predict(scaled_data)[0])
-        prediction_proba = float(self.ml_models.model.predict_proba(scaled_data)[0][1])
-
-        # Determine risk level
-        risk_level = self._calculate_risk_level(prediction_proba)
-
-        return {
-            "prediction_class": prediction_class,
-            "risk_probability": round(
-                prediction_proba * 100, 2
-            ),  # Convert to percentage
-            "risk_level": risk_level,
-            "risk_interpretation": self._get_risk_interpretation(
-                risk_level, prediction_proba
-            ),
-        }
+        return self.ml_models.scaler.transform(processed_data)
 
     def _calculate_risk_level(self, probability: float) -> str:
         """Calculate risk level from probability"""
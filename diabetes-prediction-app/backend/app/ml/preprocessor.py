@@ -1,6 +1,41 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+# Percentiles bounding the numeric features, in training and at serving time
+CLIP_QUANTILES = [0.01, 0.99]
+
+
+def compute_clip_bounds(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """1st and 99th percentile of each column, in one vectorized pass"""
+    return df[columns].quantile(CLIP_QUANTILES)
+
+
+def clip_outliers(
+    df: pd.DataFrame, clip_bounds: Optional[pd.DataFrame]
+) -> pd.DataFrame:
+    """
+    Clip numeric columns to the percentile bounds of training
+
+    Args:
+        df: Raw records; modified in place
+        clip_bounds: Rows of lower and upper bounds, one column per clipped
+            feature (as from compute_clip_bounds). None leaves df unchanged.
+
+    Returns:
+        The clipped DataFrame
+    """
+    if clip_bounds is None:
+        return df
+
+    columns = list(clip_bounds.columns)
+    values = df[columns].to_numpy(dtype=float)
+    df[columns] = np.clip(
+        values,
+        clip_bounds.iloc[0].to_numpy(dtype=float),
+        clip_bounds.iloc[1].to_numpy(dtype=float),
+    )
+    return df
 
 
 class DiabetesPreprocessor:
@@ -9,10 +44,13 @@ class DiabetesPreprocessor:
     Applies the same transformations as the original model training
     """
 
-    def __init__(self, encoder, poly):
+    def __init__(self, encoder, poly, clip_bounds=None):
         self.encoder = encoder
         self.poly = poly
 
+        # Outlier clip bounds from training (rows: 1st and 99th percentile)
+        self.clip_bounds = clip_bounds
+
     def preprocess(self, input_data: Dict[str, Any]) -> pd.DataFrame:
         """
         Preprocess raw input data for prediction
@@ -23,8 +61,23 @@ class DiabetesPreprocessor:
         Returns:
             DataFrame ready for model prediction
         """
+        return self.preprocess_batch([input_data])
+
+    def preprocess_batch(self, records: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Preprocess several raw input records at once
+
+        Args:
+            records: List of dictionaries containing all 29 input fields
+
+        Returns:
+            DataFrame with one row per record ready for model prediction
+        """
         # Create DataFrame from input
-        df = pd.DataFrame([input_data])
+        df = pd.DataFrame(records)
+
+        # Handle outliers the same way as training
+        df = clip_outliers(df, self.clip_bounds)
 
         # Feature Engineering
         df["hba1c_glucose_interaction"] = df["hba1c"] * df["glucose_postprandial"]
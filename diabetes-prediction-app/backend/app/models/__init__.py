@@ -1,5 +1,16 @@
 from app.models.user import User, UserRole
 from app.models.patient import Patient
 from app.models.prediction import Prediction
+from app.models.prediction_stats import PredictionDailyStats
+from app.models.prediction_archive import PredictionArchive
+from app.models.cohort_quantiles import CohortQuantiles
 
-__all__ = ["User", "UserRole", "Patient", "Prediction"]
+__all__ = [
+    "User",
+    "UserRole",
+    "Patient",
+    "Prediction",
+    "PredictionDailyStats",
+    "PredictionArchive",
+    "CohortQuantiles",
+]
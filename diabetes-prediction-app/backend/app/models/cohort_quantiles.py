@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, JSON
+from app.core.database import Base, Timestamp
+
+
+class CohortQuantiles(Base):
+    """Quantiles of one metric within an age band/gender cohort
+
+    Recomputed on a schedule by app/utils/cohort_analytics.py; the age band
+    and gender are both "all" for the whole population.
+    """
+
+    __tablename__ = "cohort_quantiles"
+
+    metric = Column(String, primary_key=True)
+    age_band = Column(String, primary_key=True)  # e.g. "40-49", "80+"
+    gender = Column(String, primary_key=True)
+
+    observations = Column(Integer, nullable=False)
+    # Evenly spaced quantiles, from the minimum to the maximum
+    quantiles = Column(JSON, nullable=False)
+    computed_at = Column(Timestamp, nullable=False)
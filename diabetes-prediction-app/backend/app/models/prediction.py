@@ -1,27 +1,41 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, SmallInteger, Float, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, CodedString, Timestamp
+
+# Categorical vocabularies, stored as smallint codes by position.
+# Append new values only; reordering would change the meaning of stored rows.
+GENDERS = ("Male", "Female", "Other")
+ETHNICITIES = ("White", "Black", "Asian", "Hispanic", "Other")
+EDUCATION_LEVELS = ("No formal", "Highschool", "Graduate", "Postgraduate")
+INCOME_LEVELS = ("Low", "Lower-Middle", "Middle", "Upper-Middle", "High")
+EMPLOYMENT_STATUSES = ("Employed", "Unemployed", "Retired", "Student")
+SMOKING_STATUSES = ("Never", "Former", "Current")
+RISK_LEVELS = ("Low", "Medium", "High")
 
 
 class Prediction(Base):
     __tablename__ = "predictions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # The identity is ``id`` alone, also on PostgreSQL where the table's
+    # primary key is (id, created_at) because it is partitioned. Ids come from
+    # one sequence, so they are unique even though only the composite key is
+    # enforced there; session.get() by id and the identity map stay valid.
+    id = Column(Integer, primary_key=True)
     patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"))
     doctor_id = Column(Integer, ForeignKey("users.id"))
 
     # Demographics (7 fields)
-    age = Column(Integer)
-    gender = Column(String)
-    ethnicity = Column(String)
-    education_level = Column(String)
-    income_level = Column(String)
-    employment_status = Column(String)
-    smoking_status = Column(String)
+    age = Column(SmallInteger)
+    gender = Column(CodedString(GENDERS))
+    ethnicity = Column(CodedString(ETHNICITIES))
+    education_level = Column(CodedString(EDUCATION_LEVELS))
+    income_level = Column(CodedString(INCOME_LEVELS))
+    employment_status = Column(CodedString(EMPLOYMENT_STATUSES))
+    smoking_status = Column(CodedString(SMOKING_STATUSES))
 
     # Lifestyle (5 fields)
     alcohol_consumption_per_week = Column(Float)
-    physical_activity_minutes_per_week = Column(Integer)
+    physical_activity_minutes_per_week = Column(SmallInteger)
     diet_score = Column(Float)
     sleep_hours_per_day = Column(Float)
     screen_time_hours_per_day = Column(Float)
@@ -34,9 +48,9 @@ class Prediction(Base):
     # Physical Measurements (5 fields)
     bmi = Column(Float)
     waist_to_hip_ratio = Column(Float)
-    systolic_bp = Column(Integer)
-    diastolic_bp = Column(Integer)
-    heart_rate = Column(Integer)
+    systolic_bp = Column(SmallInteger)
+    diastolic_bp = Column(SmallInteger)
+    heart_rate = Column(SmallInteger)
 
     # Lab Results (9 fields)
     cholesterol_total = Column(Float)
@@ -51,7 +65,28 @@ class Prediction(Base):
 
     # Prediction Results
     risk_probability = Column(Float)
-    risk_level = Column(String)  # Low, Medium, High
-    prediction_class = Column(Integer)  # 0 or 1
+    risk_level = Column(CodedString(RISK_LEVELS))
+    prediction_class = Column(SmallInteger)  # 0 or 1
+
+    # Confirmed outcome, recorded once the patient has been diagnosed
+    confirmed_diagnosis = Column(Boolean, nullable=True)
+    confirmed_at = Column(Timestamp, nullable=True)
+
+    # Partition key on PostgreSQL; see app/core/partitions.py
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        # Per-patient history, newest first (keyset pagination); also finds
+        # each patient's latest prediction, without a heap fetch on PostgreSQL
+        Index(
+            "ix_predictions_patient_id_created_at_id",
+            patient_id,
+            created_at.desc(),
+            id.desc(),
+            postgresql_include=["risk_level", "risk_probability", "prediction_class"],
+        ),
+        # Global listing, newest first (keyset pagination)
+        Index("ix_predictions_created_at_id", created_at.desc(), id.desc()),
+        # Incremental update watermark scans
+        Index("ix_predictions_confirmed_at_id", confirmed_at, id),
+    )
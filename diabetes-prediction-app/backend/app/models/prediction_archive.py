@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, BigInteger
+from sqlalchemy.sql import func
+from app.core.database import Base, Timestamp
+
+
+class PredictionArchive(Base):
+    """A detached predictions partition exported to a Parquet file"""
+
+    __tablename__ = "prediction_archives"
+
+    partition_name = Column(String, primary_key=True)
+    path = Column(String, nullable=False)
+
+    # created_at range covered by the partition, [range_start, range_end)
+    range_start = Column(Timestamp, nullable=False)
+    range_end = Column(Timestamp, nullable=False)
+
+    # Id range, used to find the file holding a given prediction
+    min_id = Column(BigInteger)
+    max_id = Column(BigInteger)
+    row_count = Column(Integer, nullable=False)
+
+    archived_at = Column(Timestamp, server_default=func.now())
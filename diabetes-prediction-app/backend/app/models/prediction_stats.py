@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, Date
+from app.core.database import Base
+
+
+class PredictionDailyStats(Base):
+    """Per-day prediction counts for one scope (global, doctor or patient)
+
+    Maintained incrementally alongside inserts into ``predictions`` so
+    statistics never need to scan the predictions table.
+    """
+
+    __tablename__ = "prediction_daily_stats"
+
+    scope_type = Column(String, primary_key=True)  # global, doctor or patient
+    scope_id = Column(Integer, primary_key=True)  # 0 for the global scope
+    day = Column(Date, primary_key=True)
+    risk_level = Column(String, primary_key=True)
+
+    prediction_count = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)
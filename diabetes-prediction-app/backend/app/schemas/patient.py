@@ -28,3 +28,25 @@ class Patient(PatientBase):
 
     class Config:
         from_attributes = True
+
+
+class PatientSearchResult(Patient):
+    """Patient found by search, with the linked user's name"""
+
+    full_name: Optional[str] = None
+
+
+class LatestPrediction(BaseModel):
+    """Summary of a patient's most recent prediction"""
+
+    id: int
+    risk_level: str
+    risk_probability: float
+    prediction_class: int
+    created_at: datetime
+
+
+class PatientWithLatestRisk(Patient):
+    """Patient with their most recent prediction, if any"""
+
+    latest_prediction: Optional[LatestPrediction] = None
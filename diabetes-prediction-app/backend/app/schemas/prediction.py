@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import date, datetime
 
 
 class PredictionInput(BaseModel):
@@ -58,6 +58,12 @@ class PredictionCreate(PredictionInput):
     patient_id: int
 
 
+class PredictionOutcome(BaseModel):
+    """Schema for recording the confirmed diagnosis of a prediction"""
+
+    diagnosed: bool
+
+
 class PredictionResponse(BaseModel):
     """Schema for prediction response"""
 
@@ -111,5 +117,71 @@ class PredictionDetail(PredictionResponse):
     hba1c: float
     diabetes_risk_score: float
 
+    # Confirmed outcome
+    confirmed_diagnosis: Optional[bool] = None
+    confirmed_at: Optional[datetime] = None
+
+
+class CohortRank(BaseModel):
+    """Percentile of one value within the patient's cohort"""
+
+    metric: str
+    value: float
+    percentile: float
+    cohort: str  # e.g. "Female, 40-49", or "all" for the whole population
+    observations: int
+
+
+class CohortComparison(BaseModel):
+    """Where a prediction's lab values and risk fall within its cohort"""
+
+    prediction_id: int
+    computed_at: Optional[datetime] = None  # when the quantiles were computed
+    ranks: List[CohortRank]
+
+
+class TrendStats(BaseModel):
+    """Mean, minimum and maximum of one metric within a trend bucket"""
+
+    mean: float
+    min: float
+    max: float
+
+
+class TrendBucket(BaseModel):
+    """Predictions made within one time bucket of a trend"""
+
+    start: datetime
+    end: datetime
+    count: int
+    risk_probability: Optional[TrendStats] = None
+    hba1c: Optional[TrendStats] = None
+    glucose_fasting: Optional[TrendStats] = None
+
+
+class RiskTrend(BaseModel):
+    """Downsampled risk trend of one patient"""
+
+    patient_id: int
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    total: int  # predictions summarised
+    buckets: List[TrendBucket]
+
+
+class DailyVolume(BaseModel):
+    """Number of predictions made on one day"""
+
+    day: date
+    count: int
+
 
+class PredictionStats(BaseModel):
+    """Schema for aggregate risk statistics"""
 
+    scope: str  # global, doctor or patient
+    scope_id: Optional[int] = None
+    total: int
+    risk_counts: Dict[str, int]
+    mean_probability: Optional[float] = None
+    daily_volumes: List[DailyVolume]
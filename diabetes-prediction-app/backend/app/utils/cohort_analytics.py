@@ -0,0 +1,352 @@
+"""
+Cohort analytics: where a patient's values fall within their cohort
+
+Predictions are grouped into cohorts by age band and gender. For each cohort
+and metric (HbA1c, BMI, triglycerides, fasting glucose, risk probability),
+COHORT_QUANTILES evenly spaced quantiles are precomputed into
+``cohort_quantiles``, along with the same for the whole population. Each
+worker keeps a copy of these tables in memory, so a percentile rank is a
+binary search over the cohort's quantiles rather than a scan of
+``predictions``. Cohorts smaller than COHORT_MIN_SIZE are not stored and
+ranks use the population instead.
+
+Workers reload the tables every COHORT_RELOAD_SECONDS and recompute them
+once they are older than COHORT_REFRESH_SECONDS (one worker at a time on
+PostgreSQL). With in-process refresh disabled, recompute on a schedule:
+
+    python -m app.utils.cohort_analytics
+"""
+
+import asyncio
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Float, case, delete, func, insert, literal, select, text
+from sqlalchemy import tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models.cohort_quantiles import CohortQuantiles
+from app.models.prediction import Prediction as PredictionModel
+
+COHORT_METRICS = (
+    "hba1c",
+    "bmi",
+    "triglycerides",
+    "glucose_fasting",
+    "risk_probability",
+)
+
+# Lower bounds of the age bands; the last band is open ended
+AGE_BANDS = (18, 30, 40, 50, 60, 70, 80)
+
+# Age band and gender of the whole population
+ALL = "all"
+
+# Serializes refreshes across workers (pg_try_advisory_xact_lock key)
+_REFRESH_LOCK_KEY = 4808
+
+
+def _band_label(index: int) -> str:
+    if index == len(AGE_BANDS) - 1:
+        return f"{AGE_BANDS[index]}+"
+    return f"{AGE_BANDS[index]}-{AGE_BANDS[index + 1] - 1}"
+
+
+def age_band(age: Optional[int]) -> Optional[str]:
+    """Label of the age band containing ``age``, e.g. "40-49" or "80+" """
+    if age is None or age < AGE_BANDS[0]:
+        return None
+    return _band_label(bisect_right(AGE_BANDS, age) - 1)
+
+
+def _age_band_expression():
+    return case(
+        *(
+            (PredictionModel.age >= AGE_BANDS[index], _band_label(index))
+            for index in reversed(range(len(AGE_BANDS)))
+        ),
+        else_=None,
+    )
+
+
+def _quantile_levels() -> List[float]:
+    count = settings.COHORT_QUANTILES
+    if count == 1:
+        return [0.5]  # the median alone
+    return [i / (count - 1) for i in range(count)]
+
+
+# Computing
+
+QuantileRow = Tuple[str, str, str, int, List[float]]
+
+
+def _compute_in_database(db: Session) -> List[QuantileRow]:
+    """Quantiles with PostgreSQL ordered-set aggregates, in one scan"""
+    band = _age_band_expression()
+    levels = literal(_quantile_levels(), ARRAY(Float))
+    metrics = []
+    for metric in COHORT_METRICS:
+        column = getattr(PredictionModel, metric)
+        metrics += [
+            func.count(column),
+            type_coerce(
+                func.percentile_cont(levels).within_group(column), ARRAY(Float)
+            ),
+        ]
+
+    rows = db.execute(
+        select(band, PredictionModel.gender, *metrics)
+        .where(PredictionModel.age >= AGE_BANDS[0])
+        .where(PredictionModel.gender.is_not(None))
+        # Each cohort plus the whole population (NULL band and gender)
+        .group_by(func.grouping_sets(tuple_(band, PredictionModel.gender), text("()")))
+    )
+
+    results = []
+    for row in rows:
+        band_label, gender = row[0] or ALL, row[1] or ALL
+        for i, metric in enumerate(COHORT_METRICS):
+            count, quantiles = row[2 + 2 * i], row[3 + 2 * i]
+            results.append((metric, band_label, gender, count, quantiles))
+    return results
+
+
+def _compute_in_python(db: Session, batch_size: int = 10000) -> List[QuantileRow]:
+    """Quantiles with NumPy over the projected columns (other databases)"""
+    result = db.execute(
+        select(
+            PredictionModel.age,
+            PredictionModel.gender,
+            *(getattr(PredictionModel, metric) for metric in COHORT_METRICS),
+        )
+        .where(PredictionModel.age >= AGE_BANDS[0])
+        .where(PredictionModel.gender.is_not(None))
+        .execution_options(yield_per=batch_size)
+    )
+
+    # Fetched batch by batch into one float list per metric, not kept as rows
+    cohorts = defaultdict(list)
+    metric_values = [[] for _ in COHORT_METRICS]
+    count = 0
+    for age, gender, *values in result:
+        cohorts[(age_band(age), gender)].append(count)
+        for column, value in zip(metric_values, values):
+            column.append(np.nan if value is None else value)
+        count += 1
+    if not count:
+        return []
+    cohorts[(ALL, ALL)] = list(range(count))
+
+    levels = _quantile_levels()
+    results = []
+    for metric, values in zip(COHORT_METRICS, metric_values):
+        values = np.array(values, dtype=float)
+        for (band_label, gender), indexes in cohorts.items():
+            cohort = values[indexes]
+            cohort = cohort[~np.isnan(cohort)]
+            quantiles = np.quantile(cohort, levels).tolist() if cohort.size else []
+            results.append((metric, band_label, gender, int(cohort.size), quantiles))
+    return results
+
+
+def refresh_cohort_quantiles(db: Session) -> Optional[int]:
+    """
+    Recompute every cohort quantile table
+
+    Args:
+        db: Sync database session
+
+    Returns:
+        Number of tables stored, None when another worker is refreshing
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        locked = db.scalar(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": _REFRESH_LOCK_KEY},
+        )
+        if not locked:
+            return None
+        rows = _compute_in_database(db)
+    else:
+        rows = _compute_in_python(db)
+
+    computed_at = datetime.now(timezone.utc)
+    params = [
+        {
+            "metric": metric,
+            "age_band": band_label,
+            "gender": gender,
+            "observations": count,
+            "quantiles": quantiles,
+            "computed_at": computed_at,
+        }
+        for metric, band_label, gender, count, quantiles in rows
+        if count >= settings.COHORT_MIN_SIZE
+    ]
+
+    db.execute(delete(CohortQuantiles))
+    if params:
+        db.execute(insert(CohortQuantiles), params)
+    db.commit()
+    return len(params)
+
+
+def _refresh():
+    db = SessionLocal()
+    try:
+        return refresh_cohort_quantiles(db)
+    finally:
+        db.close()
+
+
+# Lookups
+
+
+def percentile_rank(quantiles: Sequence[float], value: float) -> float:
+    """Percentile (0-100) of ``value`` among evenly spaced quantiles, O(log n)"""
+    last = len(quantiles) - 1
+    low = bisect_left(quantiles, value)
+    high = bisect_right(quantiles, value)
+    if last == 0:
+        # A single quantile (the median) only tells below, at or above
+        return 50.0 if low < high else 100.0 * low
+    if low < high:
+        # Equal to one or more quantiles: the middle of that run
+        return 100 * (low + high - 1) / 2 / last
+    if low == 0:
+        return 0.0
+    if low > last:
+        return 100.0
+    below, above = quantiles[low - 1], quantiles[low]
+    return 100 * (low - 1 + (value - below) / (above - below)) / last
+
+
+class CohortAnalytics:
+    """In-memory copy of the cohort quantile tables"""
+
+    def __init__(self, reload_seconds: float, refresh_seconds: float):
+        self.reload_seconds = reload_seconds
+        self.refresh_seconds = refresh_seconds
+        self.computed_at: Optional[datetime] = None
+        self._tables: Dict[Tuple[str, str, str], Tuple[List[float], int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._refreshed_at: Optional[float] = None  # by this process, monotonic
+
+    async def reload(self, db: AsyncSession):
+        rows = (await db.scalars(select(CohortQuantiles))).all()
+        self._tables = {
+            (row.metric, row.age_band, row.gender): (row.quantiles, row.observations)
+            for row in rows
+        }
+        self.computed_at = max((row.computed_at for row in rows), default=None)
+
+    def _is_stale(self) -> bool:
+        if not self.refresh_seconds:
+            return False
+        # Also throttles retries when there is nothing to store yet
+        if (
+            self._refreshed_at is not None
+            and time.monotonic() - self._refreshed_at < self.refresh_seconds
+        ):
+            return False
+        if self.computed_at is None:
+            return True
+        computed_at = self.computed_at
+        if computed_at.tzinfo is None:
+            computed_at = computed_at.replace(tzinfo=timezone.utc)
+        age = datetime.now(timezone.utc) - computed_at
+        return age > timedelta(seconds=self.refresh_seconds)
+
+    async def _run(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.reload(db)
+                    if self._is_stale():
+                        self._refreshed_at = time.monotonic()
+                        stored = await run_in_threadpool(_refresh)
+                        if stored is not None:
+                            print(f"✅ Cohort quantiles refreshed ({stored} tables)")
+                        await self.reload(db)
+            except Exception as e:
+                print(f"Warning: cohort quantiles refresh failed: {e}")
+            await asyncio.sleep(self.reload_seconds)
+
+    def start(self):
+        """Load the tables and keep them fresh in the background"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def rank(
+        self, metric: str, value: Optional[float], age: Optional[int], gender: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Percentile rank of a value within its age band/gender cohort
+
+        Args:
+            metric: One of COHORT_METRICS
+            value: Value to rank
+            age: Age, selects the age band
+            gender: Gender
+
+        Returns:
+            Percentile, cohort label and its size; None without quantiles
+        """
+        if value is None:
+            return None
+        band_label = age_band(age)
+        for key in [(metric, band_label, gender), (metric, ALL, ALL)]:
+            table = self._tables.get(key)
+            if table is not None:
+                quantiles, observations = table
+                cohort = ALL if key[1] == ALL else f"{gender}, {band_label}"
+                return {
+                    "metric": metric,
+                    "value": value,
+                    "percentile": round(percentile_rank(quantiles, value), 1),
+                    "cohort": cohort,
+                    "observations": observations,
+                }
+        return None
+
+    def ranks(self, prediction) -> List[Dict[str, Any]]:
+        """Percentile ranks of every cohort metric of a prediction"""
+        ranks = [
+            self.rank(
+                metric, getattr(prediction, metric), prediction.age, prediction.gender
+            )
+            for metric in COHORT_METRICS
+        ]
+        return [rank for rank in ranks if rank is not None]
+
+
+cohort_analytics = CohortAnalytics(
+    settings.COHORT_RELOAD_SECONDS, settings.COHORT_REFRESH_SECONDS
+)
+
+
+if __name__ == "__main__":
+    stored = _refresh()
+    if stored is None:
+        print("Cohort quantiles are being refreshed by another process")
+    else:
+        print(f"✅ Cohort quantiles refreshed ({stored} tables)")
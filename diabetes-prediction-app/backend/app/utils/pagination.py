@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque continuation token"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a continuation token produced by ``encode_cursor``"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def keyset_paginate(query: Select, model, cursor: Optional[str], limit: int) -> Select:
+    """
+    Apply newest-first keyset pagination on (created_at, id)
+
+    One extra row is fetched so ``set_next_cursor`` can tell whether
+    another page exists.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        key = tuple_(model.created_at, model.id)
+        bound = tuple_(created_at, row_id, types=[c.type for c in key.clauses])
+        query = query.where(key < bound)
+
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def set_next_cursor(response: Response, rows: List[Any], limit: int) -> List[Any]:
+    """Trim the look-ahead row and expose the next page token as a header"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
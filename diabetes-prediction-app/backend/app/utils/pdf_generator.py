@@ -13,11 +13,22 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from io import BytesIO
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+# Report labels of the cohort analytics metrics
+COHORT_METRIC_LABELS = {
+    "hba1c": "HbA1c:",
+    "bmi": "BMI:",
+    "triglycerides": "Triglycerides:",
+    "glucose_fasting": "Fasting Glucose:",
+    "risk_probability": "Risk Probability:",
+}
 
 
 def generate_prediction_report(
-    prediction_data: Dict[str, Any], patient_data: Dict[str, Any]
+    prediction_data: Dict[str, Any],
+    patient_data: Dict[str, Any],
+    cohort_ranks: Optional[List[Dict[str, Any]]] = None,
 ) -> BytesIO:
     """
     Generate a comprehensive PDF report for diabetes risk prediction
@@ -25,6 +36,7 @@ def generate_prediction_report(
     Args:
         prediction_data: Dictionary containing prediction details (all 29 fields + results)
         patient_data: Dictionary containing patient personal information
+        cohort_ranks: Percentile ranks within the patient's cohort, if available
 
     Returns:
         BytesIO: PDF file as bytes stream
@@ -234,6 +246,22 @@ def generate_prediction_report(
     elements.append(lab_table)
     elements.append(Spacer(1, 0.2 * inch))
 
+    # Comparison with the patient's age/gender cohort
+    if cohort_ranks:
+        elements.append(Paragraph("Comparison with Similar Patients", subheading_style))
+        cohort_data = [
+            [
+                COHORT_METRIC_LABELS.get(rank["metric"], rank["metric"]),
+                f"{_ordinal(round(rank['percentile']))} percentile "
+                f"({rank['cohort']}, n={rank['observations']})",
+            ]
+            for rank in cohort_ranks
+        ]
+        cohort_table = Table(cohort_data, colWidths=[2.5 * inch, 3.5 * inch])
+        cohort_table.setStyle(_get_table_style())
+        elements.append(cohort_table)
+        elements.append(Spacer(1, 0.2 * inch))
+
     # Lifestyle Factors
     elements.append(Paragraph("Lifestyle Factors", subheading_style))
     lifestyle_data = [
@@ -318,6 +346,15 @@ def generate_prediction_report(
     return buffer
 
 
+def _ordinal(number: int) -> str:
+    """1 -> 1st, 22 -> 22nd, 13 -> 13th"""
+    if 10 <= number % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
+
+
 def _get_table_style():
     """Helper function to return consistent table styling"""
     return TableStyle(
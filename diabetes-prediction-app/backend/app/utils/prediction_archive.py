@@ -0,0 +1,295 @@
+"""
+Archival of cold prediction partitions (PostgreSQL)
+
+Monthly partitions older than PREDICTION_RETENTION_MONTHS are exported to
+zstd-compressed Parquet files under PREDICTION_ARCHIVE_PATH, recorded in
+``prediction_archives``, then detached and dropped. Archived predictions
+stay readable through the API: lookups that run out of rows in the database
+continue in the archive files.
+
+Archive files are never rewritten. Rows of patients deleted since their
+partition was archived are skipped on read instead.
+
+Run on a schedule (e.g. daily cron) from the backend directory; it also
+creates the upcoming monthly partitions:
+
+    python -m app.utils.prediction_archive
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.partitions import (
+    PARENT_TABLE,
+    add_months,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    partition_month,
+)
+from app.models.patient import Patient as PatientModel
+from app.models.prediction import Prediction as PredictionModel
+from app.models.prediction_archive import PredictionArchive
+
+# Rows per Parquet row group; row group statistics let id and patient
+# lookups skip most of a file
+ROW_GROUP_SIZE = 10000
+
+_ARROW_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    datetime: pa.timestamp("us", tz="UTC"),
+}
+
+ARCHIVE_COLUMNS = [column.name for column in PredictionModel.__table__.columns]
+ARCHIVE_SCHEMA = pa.schema(
+    [
+        pa.field(column.name, _ARROW_TYPES.get(column.type.python_type, pa.string()))
+        for column in PredictionModel.__table__.columns
+    ]
+)
+
+
+def _archive_file(archive_path: str) -> str:
+    return os.path.join(settings.PREDICTION_ARCHIVE_PATH, archive_path)
+
+
+def export_partition(db: Session, name: str, path: str) -> Dict[str, Any]:
+    """
+    Write every row of a partition to a Parquet file
+
+    Returns:
+        Row count and id range of the exported rows
+    """
+    # Typed columns so coded values are exported as their strings
+    query = text(f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {name} ORDER BY id")
+    result = db.execute(
+        query.columns(*PredictionModel.__table__.columns),
+        execution_options={"yield_per": ROW_GROUP_SIZE},
+    )
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    stats = {"row_count": 0, "min_id": None, "max_id": None}
+
+    with pq.ParquetWriter(tmp_path, ARCHIVE_SCHEMA, compression="zstd") as writer:
+        for rows in result.partitions():
+            batch = pa.Table.from_pylist(
+                [row._asdict() for row in rows], schema=ARCHIVE_SCHEMA
+            )
+            writer.write_table(batch, row_group_size=ROW_GROUP_SIZE)
+            if stats["min_id"] is None:
+                stats["min_id"] = rows[0].id
+            stats["max_id"] = rows[-1].id
+            stats["row_count"] += len(rows)
+
+    if pq.read_metadata(tmp_path).num_rows != stats["row_count"]:
+        raise RuntimeError(f"Archive of {name} is incomplete, keeping the partition")
+    os.replace(tmp_path, path)
+    return stats
+
+
+def archive_partition(db: Session, name: str) -> PredictionArchive:
+    """Export one partition, record it in the manifest, then drop it"""
+    month = partition_month(name)
+    file_name = f"{name}.parquet"
+    stats = export_partition(db, name, _archive_file(file_name))
+
+    archive = PredictionArchive(
+        partition_name=name,
+        path=file_name,
+        range_start=month,
+        range_end=add_months(month, 1),
+        **stats,
+    )
+    db.add(archive)
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    db.execute(text(f"DROP TABLE {name}"))
+    db.commit()
+    return archive
+
+
+def run_retention(db: Session) -> List[str]:
+    """
+    Create upcoming partitions and archive those past the retention window
+
+    Args:
+        db: Sync database session
+
+    Returns:
+        Names of the archived partitions
+    """
+    if not is_partitioned(db.connection()):
+        print("Skipping prediction archival: predictions is not partitioned")
+        return []
+
+    created = ensure_partitions(db.connection(), settings.PREDICTION_PARTITIONS_AHEAD)
+    db.commit()
+    if created:
+        print(f"Created partitions: {', '.join(created)}")
+
+    cutoff = add_months(
+        month_start(datetime.now(timezone.utc)), -settings.PREDICTION_RETENTION_MONTHS
+    )
+    archived = []
+    for name in list_partitions(db.connection()):
+        if add_months(partition_month(name), 1) <= cutoff:
+            archive = archive_partition(db, name)
+            print(f"Archived {archive.row_count} predictions from {name}")
+            archived.append(name)
+    return archived
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Timezone-aware UTC timestamp; naive values (SQLite) are UTC already"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def _patient_exists(db: AsyncSession, patient_id: Optional[int]) -> bool:
+    """Whether archived rows of this patient may still be served"""
+    if patient_id is None:
+        return True
+    found = await db.scalar(
+        select(PatientModel.id).where(PatientModel.id == patient_id)
+    )
+    return found is not None
+
+
+def _read_archive(
+    archive_path: str, filters: List[Tuple], columns: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    table = pq.read_table(
+        _archive_file(archive_path),
+        columns=list(columns) if columns else None,
+        filters=filters,
+    )
+    return table.to_pylist()
+
+
+async def get_archived_prediction(
+    db: AsyncSession, prediction_id: int
+) -> Optional[PredictionModel]:
+    """Look up a prediction that is no longer in the database"""
+    archives = await db.scalars(
+        select(PredictionArchive).where(
+            PredictionArchive.min_id <= prediction_id,
+            PredictionArchive.max_id >= prediction_id,
+        )
+    )
+    for archive in archives:
+        records = await run_in_threadpool(
+            _read_archive, archive.path, [("id", "=", prediction_id)]
+        )
+        if records:
+            if not await _patient_exists(db, records[0]["patient_id"]):
+                return None
+            # Transient instance, never added to the session
+            return PredictionModel(**records[0])
+    return None
+
+
+async def get_archived_patient_predictions(
+    db: AsyncSession,
+    patient_id: int,
+    before: Optional[Tuple[datetime, int]],
+    limit: int,
+    columns: Optional[Sequence[str]] = None,
+) -> List[PredictionModel]:
+    """
+    Continue a patient's newest-first history in the archive files
+
+    Args:
+        db: Database session
+        patient_id: Patient whose predictions to read
+        before: Only rows older than this (created_at, id) position
+        limit: Maximum number of rows to return
+        columns: Columns to read (all when None)
+
+    Returns:
+        Transient Prediction instances, newest first; none for deleted patients
+    """
+    query = select(PredictionArchive.path).order_by(
+        PredictionArchive.range_start.desc()
+    )
+    if before is not None:
+        before = (_as_utc(before[0]), before[1])
+        query = query.where(PredictionArchive.range_start <= before[0])
+
+    rows: List[PredictionModel] = []
+    for archive_path in await db.scalars(query):
+        records = await run_in_threadpool(
+            _read_archive, archive_path, [("patient_id", "=", patient_id)], columns
+        )
+        if records and not rows and not await _patient_exists(db, patient_id):
+            return []
+        for record in records:
+            record["created_at"] = _as_utc(record["created_at"])
+        if before is not None:
+            records = [r for r in records if (r["created_at"], r["id"]) < before]
+        records.sort(key=lambda r: (r["created_at"], r["id"]), reverse=True)
+        rows.extend(PredictionModel(**record) for record in records)
+        if len(rows) >= limit:
+            break
+    return rows[:limit]
+
+
+async def get_archived_patient_records(
+    db: AsyncSession,
+    patient_id: int,
+    columns: Sequence[str],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Selected columns of a patient's archived predictions within a time range
+
+    Args:
+        db: Database session
+        patient_id: Patient whose predictions to read
+        columns: Columns to read
+        start: Only rows created at or after this time
+        end: Only rows created at or before this time
+
+    Callers check that the patient still exists.
+
+    Returns:
+        Column/value dictionaries, in no particular order
+    """
+    query = select(PredictionArchive.path)
+    filters = [("patient_id", "=", patient_id)]
+    if start is not None:
+        query = query.where(PredictionArchive.range_end > start)
+        filters.append(("created_at", ">=", start))
+    if end is not None:
+        query = query.where(PredictionArchive.range_start <= end)
+        filters.append(("created_at", "<=", end))
+
+    records: List[Dict[str, Any]] = []
+    for archive_path in await db.scalars(query):
+        records += await run_in_threadpool(
+            _read_archive, archive_path, filters, columns
+        )
+    return records
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        archived = run_retention(db)
+        print(f"✅ Archived {len(archived)} prediction partitions")
+    finally:
+        db.close()
@@ -0,0 +1,400 @@
+"""
+Write-behind persistence of predictions (PostgreSQL)
+
+With PREDICTION_WRITE_BEHIND enabled, create_prediction does not wait for the
+INSERT and commit. The new row takes its id from a block reserved on the
+predictions id sequence, is appended to a local fsync'd journal and returned.
+A background task drains the journal into the database in batched
+transactions every PREDICTION_JOURNAL_FLUSH_SECONDS, and on startup replays
+whatever an earlier process left behind, so acknowledged predictions survive
+a crash.
+
+The journal is a directory of JSON lines segments. Draining inserts with
+ON CONFLICT DO NOTHING and only counts the rows it actually inserted in the
+statistics, so replaying a segment that was already written is harmless.
+Rows the database rejects (e.g. their patient was deleted meanwhile) are
+moved to ``rejected.jsonl``.
+
+One worker process owns the journal (file lock); the others keep writing
+synchronously, but every worker on the host finds journaled predictions by id.
+Lookups read an in-memory index of the records not drained yet. The owner
+updates it as it appends, replays and drains; other workers bring theirs up
+to date by reading only the bytes appended to the segments since their last
+lookup, and forget segments once they are drained.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.prediction import Prediction as PredictionModel
+from app.utils.prediction_stats import record_predictions
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking, run a single worker
+    fcntl = None
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+REJECTED_FILE = "rejected.jsonl"
+
+# Columns the drain needs back to update the statistics
+_STATS_COLUMNS = [
+    PredictionModel.created_at,
+    PredictionModel.doctor_id,
+    PredictionModel.patient_id,
+    PredictionModel.risk_level,
+    PredictionModel.risk_probability,
+]
+
+
+def _encode(values: Dict[str, Any]) -> str:
+    record = dict(values, created_at=values["created_at"].isoformat())
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def _decode(line: str) -> Dict[str, Any]:
+    record = json.loads(line)
+    record["created_at"] = datetime.fromisoformat(record["created_at"])
+    return record
+
+
+class PredictionJournal:
+    """Local durable journal of predictions waiting to be inserted"""
+
+    def __init__(self, path: str, batch_size: int, flush_seconds: float):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.enabled = False
+
+        # _lock guards the open segment and counters; _sync_lock serializes
+        # fsync so one call covers every record written before it
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._segment = None
+        self._written = 0
+        self._synced = 0
+
+        # Journaled records not drained yet, by id, and the ids (and, in
+        # workers that do not own the journal, bytes read) of each segment
+        self._index_lock = threading.Lock()
+        self._catch_up_lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._segment_ids: Dict[str, List[int]] = {}
+        self._offsets: Dict[str, int] = {}
+
+        self._ids: deque = deque()
+        self._id_lock = asyncio.Lock()
+        self._lock_file = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.backlog = 0
+        self.max_backlog = 0
+        self.drained = 0
+        self.rejected = 0
+
+    # Segment files
+
+    def _segment_paths(self) -> List[str]:
+        if not os.path.isdir(self.path):
+            return []
+        names = sorted(
+            name
+            for name in os.listdir(self.path)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        return [os.path.join(self.path, name) for name in names]
+
+    def _open_segment(self):
+        paths = self._segment_paths()
+        index = 0
+        if paths:
+            last = os.path.basename(paths[-1])
+            index = int(last[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]) + 1
+        name = f"{SEGMENT_PREFIX}{index:012d}{SEGMENT_SUFFIX}"
+        self._segment = open(os.path.join(self.path, name), "a", encoding="utf-8")
+
+    def _rotate(self) -> bool:
+        """Close the open segment if it has records; True when rotated"""
+        with self._sync_lock, self._lock:
+            if self._segment is None or self._segment.tell() == 0:
+                return False
+            os.fsync(self._segment.fileno())
+            self._synced = self._written
+            self._segment.close()
+            self._open_segment()
+            return True
+
+    @staticmethod
+    def _read_segment(path: str) -> List[Dict[str, Any]]:
+        records = []
+        with open(path, encoding="utf-8") as segment:
+            for line in segment:
+                try:
+                    records.append(_decode(line))
+                except ValueError:
+                    # Torn write of a record that was never acknowledged
+                    continue
+        return records
+
+    # Index of pending records
+
+    def _index(self, path: str, records: List[Dict[str, Any]]):
+        with self._index_lock:
+            ids = self._segment_ids.setdefault(path, [])
+            for record in records:
+                self._pending[record["id"]] = record
+                ids.append(record["id"])
+
+    def _forget(self, path: str):
+        """Drop the records of a drained segment from the index"""
+        with self._index_lock:
+            for prediction_id in self._segment_ids.pop(path, ()):
+                self._pending.pop(prediction_id, None)
+            self._offsets.pop(path, None)
+
+    def _catch_up(self):
+        """Index what the owning worker appended since the last call"""
+        with self._catch_up_lock:
+            paths = self._segment_paths()
+            for path in set(self._segment_ids) - set(paths):
+                self._forget(path)
+
+            for path in paths:
+                offset = self._offsets.get(path, 0)
+                try:
+                    with open(path, "rb") as segment:
+                        segment.seek(offset)
+                        data = segment.read()
+                except FileNotFoundError:
+                    continue  # drained meanwhile
+                # Leave a partly written last line for the next call
+                end = data.rfind(b"\n") + 1
+                if not end:
+                    continue
+                records = []
+                for line in data[:end].decode("utf-8").splitlines():
+                    try:
+                        records.append(_decode(line))
+                    except ValueError:
+                        continue
+                self._index(path, records)
+                self._offsets[path] = offset + end
+
+    def _append(self, line: str, record: Dict[str, Any]):
+        with self._lock:
+            self._segment.write(line)
+            self._segment.flush()
+            self._index(self._segment.name, [record])
+            self._written += 1
+            ticket = self._written
+            self.backlog += 1
+            self.max_backlog = max(self.max_backlog, self.backlog)
+
+        with self._sync_lock:
+            if self._synced >= ticket:
+                return  # another thread's fsync already covered this record
+            with self._lock:
+                target = self._written
+                fileno = self._segment.fileno()
+            os.fsync(fileno)
+            self._synced = target
+
+    def find(self, prediction_id: int) -> Optional[Dict[str, Any]]:
+        """Journaled record with this id, if it has not been drained yet"""
+        if not self.enabled:
+            # Follow the owning worker's appends and drains since our last look
+            self._catch_up()
+        with self._index_lock:
+            return self._pending.get(prediction_id)
+
+    # Writing
+
+    async def _next_id(self, db: AsyncSession) -> int:
+        async with self._id_lock:
+            if not self._ids:
+                ids = await db.scalars(
+                    text(
+                        "SELECT nextval(pg_get_serial_sequence('predictions', 'id')) "
+                        "FROM generate_series(1, :count)"
+                    ),
+                    {"count": settings.PREDICTION_ID_BLOCK_SIZE},
+                )
+                self._ids.extend(sorted(ids))
+            return self._ids.popleft()
+
+    async def append(self, db: AsyncSession, values: Dict[str, Any]) -> PredictionModel:
+        """
+        Durably journal a new prediction
+
+        Args:
+            db: Request session, used to reserve id blocks
+            values: Column values of the prediction, including created_at
+
+        Returns:
+            Transient Prediction with its final id
+        """
+        values = dict(values, id=await self._next_id(db))
+        await run_in_threadpool(self._append, _encode(values), values)
+        return PredictionModel(**values)
+
+    # Draining
+
+    async def _insert(self, records: List[Dict[str, Any]]) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                postgresql.insert(PredictionModel)
+                .on_conflict_do_nothing()
+                .returning(*_STATS_COLUMNS),
+                records,
+            )
+            await record_predictions(db, result.all())
+            await db.commit()
+        return len(records)
+
+    async def _insert_batch(self, records: List[Dict[str, Any]]):
+        try:
+            await self._insert(records)
+            return
+        except IntegrityError:
+            pass
+
+        # Find the offending rows one by one
+        for record in records:
+            try:
+                await self._insert([record])
+            except IntegrityError as e:
+                print(f"⚠️ Rejected journaled prediction {record['id']}: {e.orig}")
+                with open(
+                    os.path.join(self.path, REJECTED_FILE), "a", encoding="utf-8"
+                ) as rejected:
+                    rejected.write(_encode(record))
+                self.rejected += 1
+
+    async def drain(self) -> int:
+        """Insert every closed segment and delete it; returns records drained"""
+        await run_in_threadpool(self._rotate)
+        closed = [
+            path
+            for path in self._segment_paths()
+            if self._segment is None or path != self._segment.name
+        ]
+
+        drained = 0
+        for path in closed:
+            records = await run_in_threadpool(self._read_segment, path)
+            if path not in self._segment_ids:
+                # Left behind by an earlier process: findable while replayed
+                self._index(path, records)
+            for start in range(0, len(records), self.batch_size):
+                await self._insert_batch(records[start : start + self.batch_size])
+            os.remove(path)
+            self._forget(path)
+            drained += len(records)
+            with self._lock:
+                self.backlog = max(self.backlog - len(records), 0)
+        self.drained += drained
+        return drained
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.drain()
+            except Exception as e:
+                print(f"Warning: prediction journal drain failed: {e}")
+
+    # Lifecycle
+
+    async def start(self):
+        """Replay leftover segments and start draining, when enabled"""
+        if not settings.PREDICTION_WRITE_BEHIND:
+            return
+        if async_engine.dialect.name != "postgresql":
+            print("Warning: prediction write-behind needs PostgreSQL, disabled")
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        lock_file = open(os.path.join(self.path, "journal.lock"), "w")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                print("Prediction journal owned by another worker, writing directly")
+                return
+        self._lock_file = lock_file
+
+        replayed = await self.drain()
+        if replayed:
+            print(f"✅ Replayed {replayed} journaled predictions")
+        self._open_segment()
+        self.enabled = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and drain what is left"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        try:
+            await self.drain()
+        finally:
+            self._segment.close()
+            self._segment = None
+            self._lock_file.close()
+            self._lock_file = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backlog": self.backlog,
+            "max_backlog": self.max_backlog,
+            "drained": self.drained,
+            "rejected": self.rejected,
+            "reserved_ids": len(self._ids),
+            "indexed": len(self._pending),
+        }
+
+
+prediction_journal = PredictionJournal(
+    settings.PREDICTION_JOURNAL_PATH,
+    batch_size=settings.PREDICTION_JOURNAL_BATCH_SIZE,
+    flush_seconds=settings.PREDICTION_JOURNAL_FLUSH_SECONDS,
+)
+
+
+async def get_pending_prediction(
+    db: AsyncSession, prediction_id: int
+) -> Optional[PredictionModel]:
+    """Look up a prediction that may still be waiting in the journal"""
+    if not settings.PREDICTION_WRITE_BEHIND:
+        return None
+    if prediction_journal.enabled:
+        record = prediction_journal.find(prediction_id)
+    else:
+        record = await run_in_threadpool(prediction_journal.find, prediction_id)
+    if record is not None:
+        # Transient instance, never added to the session
+        return PredictionModel(**record)
+    # It may have been drained between the caller's lookup and the scan
+    return await db.get(PredictionModel, prediction_id)
@@ -0,0 +1,256 @@
+"""
+Incrementally maintained prediction statistics
+
+Every prediction insert adds its risk level and probability to per-day
+counters in ``prediction_daily_stats`` for three scopes: global, its doctor
+and its patient. Statistics are then read from a handful of summary rows per
+day instead of scanning ``predictions``.
+
+The counters can be rebuilt from scratch (e.g. after manual data fixes):
+
+    python -m app.utils.prediction_stats
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.prediction import RISK_LEVELS, Prediction as PredictionModel
+from app.models.prediction_stats import PredictionDailyStats
+
+SCOPE_GLOBAL = "global"
+SCOPE_DOCTOR = "doctor"
+SCOPE_PATIENT = "patient"
+
+StatsKey = Tuple[str, int, date, str]
+
+
+def _day(created_at: datetime) -> date:
+    """UTC calendar day of a prediction timestamp"""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def aggregate_deltas(rows: Iterable[Any], sign: int = 1) -> Dict[StatsKey, List[float]]:
+    """
+    Fold prediction rows into counter deltas per (scope, day, risk level)
+
+    Args:
+        rows: Objects with created_at, doctor_id, patient_id, risk_level
+            and risk_probability attributes
+        sign: 1 for inserted predictions, -1 for deleted ones
+
+    Returns:
+        Mapping of summary key to [count delta, probability sum delta]
+    """
+    deltas: Dict[StatsKey, List[float]] = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        day = _day(row.created_at)
+        scopes = [(SCOPE_GLOBAL, 0)]
+        if row.doctor_id is not None:
+            scopes.append((SCOPE_DOCTOR, row.doctor_id))
+        if row.patient_id is not None:
+            scopes.append((SCOPE_PATIENT, row.patient_id))
+
+        for scope_type, scope_id in scopes:
+            delta = deltas[(scope_type, scope_id, day, row.risk_level)]
+            delta[0] += sign
+            delta[1] += sign * row.risk_probability
+    return deltas
+
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _upsert_statement(dialect_name: str):
+    """INSERT that adds to existing counters on conflict"""
+    table = PredictionDailyStats.__table__
+    statement = UPSERT_INSERTS[dialect_name](table)
+
+    return statement.on_conflict_do_update(
+        index_elements=[column for column in table.primary_key.columns],
+        set_={
+            "prediction_count": table.c.prediction_count
+            + statement.excluded.prediction_count,
+            "probability_sum": table.c.probability_sum
+            + statement.excluded.probability_sum,
+        },
+    )
+
+
+def _delta_params(deltas: Dict[StatsKey, List[float]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "scope_type": scope_type,
+            "scope_id": scope_id,
+            "day": day,
+            "risk_level": risk_level,
+            "prediction_count": count,
+            "probability_sum": probability_sum,
+        }
+        # Sorted so concurrent writers lock summary rows in the same order
+        for (scope_type, scope_id, day, risk_level), (count, probability_sum) in sorted(
+            deltas.items()
+        )
+    ]
+
+
+async def _add_to_counters(db: AsyncSession, params: List[Dict[str, Any]]):
+    """
+    Apply counter deltas one summary row at a time, for other databases
+
+    Each row is locked with SELECT ... FOR UPDATE, then updated, or inserted
+    when missing. An insert that loses a race with a concurrent one for the
+    same new row is rolled back to its savepoint and retried as an update.
+    """
+    table = PredictionDailyStats.__table__
+    for row in params:
+        key = [column == row[column.key] for column in table.primary_key.columns]
+        add = (
+            update(table)
+            .where(*key)
+            .values(
+                prediction_count=table.c.prediction_count + row["prediction_count"],
+                probability_sum=table.c.probability_sum + row["probability_sum"],
+            )
+        )
+
+        existing = await db.scalar(
+            select(table.c.prediction_count).where(*key).with_for_update()
+        )
+        if existing is not None:
+            await db.execute(add)
+            continue
+
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(table).values(**row))
+        except IntegrityError:
+            await db.execute(add)
+
+
+async def record_predictions(db: AsyncSession, rows: Iterable[Any], sign: int = 1):
+    """
+    Apply inserted (or, with sign=-1, deleted) predictions to the counters
+
+    Runs in the caller's transaction so the counters commit together with
+    the predictions themselves.
+    """
+    params = _delta_params(aggregate_deltas(rows, sign))
+    if not params:
+        return
+
+    dialect_name = db.bind.dialect.name
+    if dialect_name in UPSERT_INSERTS:
+        await db.execute(_upsert_statement(dialect_name), params)
+    else:
+        await _add_to_counters(db, params)
+
+
+async def get_prediction_stats(
+    db: AsyncSession, scope_type: str, scope_id: int, days: int
+) -> Dict[str, Any]:
+    """
+    Read risk statistics for one scope from the summary table
+
+    Args:
+        db: Database session
+        scope_type: global, doctor or patient
+        scope_id: Doctor or patient id (0 for global)
+        days: Number of most recent days to include in the daily volumes
+
+    Returns:
+        Dictionary matching the PredictionStats schema
+    """
+    result = await db.execute(
+        select(
+            PredictionDailyStats.day,
+            PredictionDailyStats.risk_level,
+            PredictionDailyStats.prediction_count,
+            PredictionDailyStats.probability_sum,
+        ).where(
+            PredictionDailyStats.scope_type == scope_type,
+            PredictionDailyStats.scope_id == scope_id,
+        )
+    )
+
+    risk_counts = {level: 0 for level in RISK_LEVELS}
+    daily_counts: Dict[date, int] = defaultdict(int)
+    probability_sum = 0.0
+    first_day = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+
+    for row in result:
+        risk_counts[row.risk_level] = (
+            risk_counts.get(row.risk_level, 0) + row.prediction_count
+        )
+        probability_sum += row.probability_sum
+        if row.day >= first_day:
+            daily_counts[row.day] += row.prediction_count
+
+    total = sum(risk_counts.values())
+    return {
+        "scope": scope_type,
+        "scope_id": scope_id if scope_type != SCOPE_GLOBAL else None,
+        "total": total,
+        "risk_counts": risk_counts,
+        "mean_probability": round(probability_sum / total, 2) if total else None,
+        "daily_volumes": [
+            {"day": day, "count": count}
+            for day, count in sorted(daily_counts.items())
+            if count
+        ],
+    }
+
+
+def rebuild_prediction_stats(db: Session, batch_size: int = 10000) -> int:
+    """
+    Recompute all counters from the predictions table
+
+    Args:
+        db: Sync database session
+        batch_size: Rows streamed from the database at a time
+
+    Returns:
+        Number of predictions counted
+    """
+    rows = db.execute(
+        select(
+            PredictionModel.created_at,
+            PredictionModel.doctor_id,
+            PredictionModel.patient_id,
+            PredictionModel.risk_level,
+            PredictionModel.risk_probability,
+        ).execution_options(yield_per=batch_size)
+    )
+
+    deltas = aggregate_deltas(rows)
+    params = _delta_params(deltas)
+
+    db.execute(delete(PredictionDailyStats))
+    if params:
+        db.execute(insert(PredictionDailyStats), params)
+    db.commit()
+
+    return sum(
+        int(count)
+        for (scope_type, _, _, _), (count, _) in deltas.items()
+        if scope_type == SCOPE_GLOBAL
+    )
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        count = rebuild_prediction_stats(db)
+        print(f"✅ Prediction statistics rebuilt from {count} predictions")
+    finally:
+        db.close()
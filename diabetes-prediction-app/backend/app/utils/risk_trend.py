@@ -0,0 +1,96 @@
+"""
+Downsampled risk trends
+
+A patient's predictions within a time range are grouped into at most
+``points`` equal-width time buckets, and each metric is summarised by its
+mean, minimum and maximum per bucket. Empty buckets are left out, so the
+payload is bounded by ``points`` however long the history is, and the
+min/max keep the spikes a plain average would hide.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Metrics charted by the trend endpoint, all Prediction columns
+TREND_METRICS = ("risk_probability", "hba1c", "glucose_fasting")
+
+
+def _epoch_seconds(value: datetime) -> float:
+    # SQLite returns naive UTC timestamps
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _to_datetime(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def bucket_series(
+    timestamps: Sequence[datetime],
+    series: Dict[str, Sequence[Optional[float]]],
+    points: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Summarise time series into equal-width time buckets
+
+    Args:
+        timestamps: Time of each observation (any order)
+        series: Metric name -> value of each observation (None when missing)
+        points: Maximum number of buckets
+        start: Start of the first bucket (defaults to the earliest timestamp)
+        end: End of the last bucket (defaults to the latest timestamp)
+
+    Returns:
+        Non-empty buckets in time order, with start, end, count and per
+        metric a mean/min/max dictionary (None without values)
+    """
+    if not timestamps:
+        return []
+
+    times = np.array([_epoch_seconds(t) for t in timestamps])
+    low = _epoch_seconds(start) if start is not None else times.min()
+    high = _epoch_seconds(end) if end is not None else times.max()
+    width = max(high - low, 1.0) / points
+
+    index = np.clip(((times - low) // width).astype(np.int64), 0, points - 1)
+    counts = np.bincount(index, minlength=points)
+    occupied = np.flatnonzero(counts)
+
+    summaries = {}
+    for name, values in series.items():
+        values = np.array(values, dtype=float)
+        valid = ~np.isnan(values)
+        bucket, values = index[valid], values[valid]
+
+        sizes = np.bincount(bucket, minlength=points)
+        sums = np.bincount(bucket, weights=values, minlength=points)
+        minimums = np.full(points, np.inf)
+        np.minimum.at(minimums, bucket, values)
+        maximums = np.full(points, -np.inf)
+        np.maximum.at(maximums, bucket, values)
+        summaries[name] = (sizes, sums, minimums, maximums)
+
+    buckets = []
+    for i in occupied:
+        bucket = {
+            "start": _to_datetime(low + i * width),
+            "end": _to_datetime(low + (i + 1) * width),
+            "count": int(counts[i]),
+        }
+        for name, (sizes, sums, minimums, maximums) in summaries.items():
+            bucket[name] = (
+                {
+                    "mean": float(sums[i] / sizes[i]),
+                    "min": float(minimums[i]),
+                    "max": float(maximums[i]),
+                }
+                if sizes[i]
+                else None
+            )
+        buckets.append(bucket)
+    return buckets
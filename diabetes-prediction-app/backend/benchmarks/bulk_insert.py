@@ -0,0 +1,138 @@
+"""
+Insert throughput of bulk_insert versus one ORM add/commit/refresh per row
+
+Writes the same prediction rows per row through the ORM (the write path
+before bulk inserts), then with bulk_insert returning ids (the batch
+endpoint) and without returning anything. On PostgreSQL with asyncpg, runs
+of at least BULK_COPY_THRESHOLD rows use COPY. Uses DATABASE_URL, so point it
+at the database to measure; the rows and their patient are deleted
+afterwards. Run from the backend directory:
+
+    python -m benchmarks.bulk_insert --rows 5000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import delete
+
+from app.core.bulk_insert import bulk_insert
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.patient import Patient as PatientModel
+from app.models.prediction import Prediction as PredictionModel
+
+SAMPLE_INPUT = {
+    "age": 52,
+    "gender": "Female",
+    "ethnicity": "White",
+    "education_level": "Graduate",
+    "income_level": "Middle",
+    "employment_status": "Employed",
+    "smoking_status": "Never",
+    "alcohol_consumption_per_week": 2.0,
+    "physical_activity_minutes_per_week": 120,
+    "diet_score": 6.0,
+    "sleep_hours_per_day": 7.0,
+    "screen_time_hours_per_day": 4.0,
+    "family_history_diabetes": True,
+    "hypertension_history": False,
+    "cardiovascular_history": False,
+    "bmi": 29.0,
+    "waist_to_hip_ratio": 0.9,
+    "systolic_bp": 128,
+    "diastolic_bp": 82,
+    "heart_rate": 72,
+    "cholesterol_total": 200.0,
+    "hdl_cholesterol": 50.0,
+    "ldl_cholesterol": 120.0,
+    "triglycerides": 150.0,
+    "glucose_fasting": 110.0,
+    "glucose_postprandial": 160.0,
+    "insulin_level": 12.0,
+    "hba1c": 6.1,
+    "diabetes_risk_score": 35.0,
+}
+
+
+def make_rows(patient_id: int, count: int) -> List[Dict[str, Any]]:
+    created_at = datetime.now(timezone.utc)
+    return [
+        {
+            "patient_id": patient_id,
+            "created_at": created_at,
+            **SAMPLE_INPUT,
+            "risk_probability": 42.0,
+            "risk_level": "Medium",
+            "prediction_class": 0,
+        }
+        for _ in range(count)
+    ]
+
+
+async def per_row(rows: List[Dict[str, Any]]):
+    async with AsyncSessionLocal() as db:
+        for row in rows:
+            prediction = PredictionModel(**row)
+            db.add(prediction)
+            await db.commit()
+            await db.refresh(prediction)
+
+
+async def bulk(rows: List[Dict[str, Any]], returning):
+    async with AsyncSessionLocal() as db:
+        await bulk_insert(db, PredictionModel, rows, returning=returning)
+        await db.commit()
+
+
+async def run(count: int, per_row_count: int):
+    async with AsyncSessionLocal() as db:
+        patient = PatientModel(patient_code=f"BENCH-{time.time_ns()}")
+        db.add(patient)
+        await db.commit()
+        patient_id = patient.id
+
+    modes = [
+        ("per-row ORM add/commit/refresh", per_row, per_row_count),
+        ("bulk_insert returning ids", lambda rows: bulk(rows, ["id"]), count),
+        ("bulk_insert, nothing returned", lambda rows: bulk(rows, None), count),
+    ]
+    results = []
+    try:
+        for name, insert, rows in modes:
+            start = time.perf_counter()
+            await insert(make_rows(patient_id, rows))
+            results.append((name, rows / (time.perf_counter() - start)))
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                delete(PredictionModel).where(PredictionModel.patient_id == patient_id)
+            )
+            await db.execute(delete(PatientModel).where(PatientModel.id == patient_id))
+            await db.commit()
+        await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument(
+        "--per-row", type=int, default=500, help="rows for the slow per-row mode"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.rows, args.per_row))
+
+    print(async_engine.url.render_as_string(hide_password=True))
+    print(f"COPY from {settings.BULK_COPY_THRESHOLD} rows where supported")
+    print(f"{'mode':<34}{'rows/s':>12}")
+    for name, rate in results:
+        print(f"{name:<34}{rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Throughput of async sessions versus sync sessions in a threadpool
+
+Issues the prediction list query at a fixed concurrency, first through the
+sync engine from a thread pool (the request model before the async port,
+capped at AnyIO's default of 40 worker threads), then through the async
+engine from as many concurrent tasks. Uses DATABASE_URL, so point it at the
+database to measure. Run from the backend directory:
+
+    python -m benchmarks.db_access --requests 5000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.prediction import Prediction as PredictionModel
+
+# AnyIO's default thread limiter, which sync FastAPI handlers queue for
+THREADPOOL_SIZE = 40
+
+LIST_QUERY = (
+    select(
+        PredictionModel.id,
+        PredictionModel.patient_id,
+        PredictionModel.risk_level,
+        PredictionModel.risk_probability,
+        PredictionModel.created_at,
+    )
+    .order_by(PredictionModel.created_at.desc(), PredictionModel.id.desc())
+    .limit(50)
+)
+
+
+def summarize(name: str, latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "mode": name,
+        "requests": len(latencies),
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def run_threadpool(requests: int, concurrency: int) -> Dict[str, float]:
+    def one_request() -> float:
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            db.execute(LIST_QUERY).all()
+        finally:
+            db.close()
+        return time.perf_counter() - start
+
+    workers = min(concurrency, THREADPOOL_SIZE)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(lambda _: one_request(), range(requests)))
+    return summarize(f"sync, {workers} threads", latencies, time.perf_counter() - start)
+
+
+async def run_async(requests: int, concurrency: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request() -> float:
+        async with semaphore:
+            start = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                (await db.execute(LIST_QUERY)).all()
+            return time.perf_counter() - start
+
+    # Warm the pool so connection setup is not measured
+    await asyncio.gather(*(one_request() for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one_request() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await async_engine.dispose()
+    return summarize(f"async, {concurrency} tasks", latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    # Warm the sync pool so connection setup is not measured
+    run_threadpool(THREADPOOL_SIZE, THREADPOOL_SIZE)
+
+    results = [
+        run_threadpool(args.requests, args.concurrency),
+        asyncio.run(run_async(args.requests, args.concurrency)),
+    ]
+    engine.dispose()
+
+    print(engine.url.render_as_string(hide_password=True))
+    print(f"{'mode':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for result in results:
+        print(
+            f"{result['mode']:<22}{result['req_per_s']:>10}{result['p50_ms']:>10}"
+            f"{result['p95_ms']:>10}{result['max_ms']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
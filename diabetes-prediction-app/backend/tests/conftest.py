@@ -0,0 +1,146 @@
+"""
+Shared test fixtures
+
+The suite runs against an embedded SQLite database in a temporary directory,
+so no database server is needed. Set TEST_DATABASE_URL to run it against an
+empty PostgreSQL database instead. Settings are read when ``app`` is first
+imported, hence the environment is set up at the top of this module.
+"""
+
+import os
+import shutil
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix="diabetes-tests-")
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(TEST_DIR, 'app.db')}"
+)
+os.environ["PREDICTION_ARCHIVE_PATH"] = os.path.join(TEST_DIR, "archive")
+os.environ["PREDICTION_JOURNAL_PATH"] = os.path.join(TEST_DIR, "journal")
+os.environ["QUERY_BUDGET_STRICT"] = "true"
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.identity_cache import authentications, patient_ids, users
+from app.main import app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Child tables first, so foreign keys never block the cleanup
+TABLES = [
+    "predictions",
+    "patients",
+    "users",
+    "prediction_daily_stats",
+    "prediction_archives",
+    "cohort_quantiles",
+]
+
+SAMPLE_INPUT = {
+    "age": 52,
+    "gender": "Female",
+    "ethnicity": "White",
+    "education_level": "Graduate",
+    "income_level": "Middle",
+    "employment_status": "Employed",
+    "smoking_status": "Never",
+    "alcohol_consumption_per_week": 2.0,
+    "physical_activity_minutes_per_week": 120,
+    "diet_score": 6.0,
+    "sleep_hours_per_day": 7.0,
+    "screen_time_hours_per_day": 4.0,
+    "family_history_diabetes": True,
+    "hypertension_history": False,
+    "cardiovascular_history": False,
+    "bmi": 29.0,
+    "waist_to_hip_ratio": 0.9,
+    "systolic_bp": 128,
+    "diastolic_bp": 82,
+    "heart_rate": 72,
+    "cholesterol_total": 200.0,
+    "hdl_cholesterol": 50.0,
+    "ldl_cholesterol": 120.0,
+    "triglycerides": 150.0,
+    "glucose_fasting": 110.0,
+    "glucose_postprandial": 160.0,
+    "insulin_level": 12.0,
+    "hba1c": 6.1,
+    "diabetes_risk_score": 35.0,
+}
+
+
+def alembic_config(url: str = None) -> Config:
+    """Migration config for DATABASE_URL, or for ``url`` when given"""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    if url is not None:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Schema built from the migration history, as in production"""
+    command.upgrade(alembic_config(), "head")
+    yield engine
+
+
+@pytest.fixture(autouse=True)
+def clean_database(database):
+    """Empty every table and the identity caches after each test"""
+    yield
+    with database.begin() as connection:
+        for table in TABLES:
+            connection.execute(text(f"DELETE FROM {table}"))
+    shutil.rmtree(settings.PREDICTION_ARCHIVE_PATH, ignore_errors=True)
+    users.clear()
+    patient_ids.clear()
+    authentications.clear()
+
+
+@pytest.fixture
+def client():
+    """API client; startup jobs (journal, cohort refresh) are not started"""
+    return TestClient(app)
+
+
+def register(client, email, role="doctor", password="secret-pass"):
+    response = client.post(
+        "/api/auth/register",
+        json={
+            "email": email,
+            "full_name": email.split("@")[0].title(),
+            "role": role,
+            "password": password,
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def login(client, email, password="secret-pass"):
+    response = client.post(
+        "/api/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def doctor(client):
+    """Authorization headers of a registered doctor"""
+    register(client, "doctor@example.com")
+    return login(client, "doctor@example.com")
+
+
+@pytest.fixture
+def patient_user(client):
+    """Authorization headers of a registered patient user"""
+    register(client, "patient@example.com", role="patient")
+    return login(client, "patient@example.com")
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from conftest import SAMPLE_INPUT
+
+from app.core.bulk_insert import bulk_insert
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.patient import Patient as PatientModel
+from app.utils.prediction_stats import SCOPE_GLOBAL, get_prediction_stats
+
+
+def create_patient(client, headers, code="P-0001"):
+    response = client.post(
+        "/api/patients/", headers=headers, json={"patient_code": code}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def insert(rows, **kwargs):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            returned = await bulk_insert(db, PatientModel, rows, **kwargs)
+            await db.commit()
+            count = await db.scalar(select(func.count(PatientModel.id)))
+        return returned, count
+
+    return asyncio.run(run())
+
+
+def patient_rows(count):
+    return [{"patient_code": f"B-{number:05d}"} for number in range(count)]
+
+
+def test_returning_rows_in_input_order():
+    rows = patient_rows(25)
+    returned, count = insert(rows, returning=["id", "patient_code"], batch_size=10)
+    assert count == 25
+    assert [row.patient_code for row in returned] == [
+        row["patient_code"] for row in rows
+    ]
+    assert len({row.id for row in returned}) == 25
+
+
+def test_without_returning():
+    returned, count = insert(patient_rows(25), batch_size=10)
+    assert returned == []
+    assert count == 25
+
+
+def test_empty_input():
+    assert insert([]) == ([], 0)
+
+
+def test_batch_endpoint_stores_and_counts_predictions(client, doctor):
+    patient_id = create_patient(client, doctor)
+    payload = [dict(SAMPLE_INPUT, patient_id=patient_id)] * 3
+
+    response = client.post("/api/predictions/batch", headers=doctor, json=payload)
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert len({prediction["id"] for prediction in body}) == 3
+    single = client.post("/api/predictions/", headers=doctor, json=payload[0]).json()
+    assert {prediction["risk_probability"] for prediction in body} == {
+        single["risk_probability"]
+    }
+
+    listed = client.get(f"/api/predictions/patient/{patient_id}", headers=doctor).json()
+    assert {prediction["id"] for prediction in body} < {
+        prediction["id"] for prediction in listed
+    }
+
+    async def total():
+        async with AsyncSessionLocal() as db:
+            return (await get_prediction_stats(db, SCOPE_GLOBAL, 0, days=30))["total"]
+
+    assert asyncio.run(total()) == 4
+
+
+def test_batch_endpoint_limits(client, doctor, patient_user, monkeypatch):
+    patient_id = create_patient(client, doctor)
+    payload = [dict(SAMPLE_INPUT, patient_id=patient_id)] * 3
+
+    response = client.post("/api/predictions/batch", headers=patient_user, json=payload)
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "MAX_PREDICTION_BATCH", 2)
+    response = client.post("/api/predictions/batch", headers=doctor, json=payload)
+    assert response.status_code == 413
+
+
+@pytest.mark.skipif(
+    async_engine.dialect.driver != "asyncpg", reason="COPY needs PostgreSQL/asyncpg"
+)
+def test_copy_reserves_ids(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_COPY_THRESHOLD", 1)
+    rows = patient_rows(5)
+    for row in rows:
+        row["created_at"] = datetime.now(timezone.utc)
+    returned, count = insert(rows, returning=["id", "created_at"])
+    assert count == 5
+    assert len({row.id for row in returned}) == 5
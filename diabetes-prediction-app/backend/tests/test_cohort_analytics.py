@@ -0,0 +1,190 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from conftest import SAMPLE_INPUT
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models.cohort_quantiles import CohortQuantiles
+from app.utils import cohort_analytics as cohort_module
+from app.utils.cohort_analytics import (
+    ALL,
+    CohortAnalytics,
+    age_band,
+    percentile_rank,
+    refresh_cohort_quantiles,
+)
+
+
+def test_age_band():
+    assert age_band(None) is None
+    assert age_band(17) is None
+    assert age_band(18) == "18-29"
+    assert age_band(29) == "18-29"
+    assert age_band(30) == "30-39"
+    assert age_band(79) == "70-79"
+    assert age_band(80) == "80+"
+    assert age_band(104) == "80+"
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (-1, 0.0),  # below the table
+        (0, 0.0),
+        (5, 12.5),  # interpolated between the first two quantiles
+        (10, 25.0),
+        (40, 100.0),
+        (41, 100.0),  # above the table
+    ],
+)
+def test_percentile_rank(value, expected):
+    assert percentile_rank([0, 10, 20, 30, 40], value) == pytest.approx(expected)
+
+
+def test_percentile_rank_of_tied_quantiles_is_the_middle_of_the_run():
+    # Quantiles 1 to 3 (25%, 50%, 75%) are all 10
+    assert percentile_rank([0, 10, 10, 10, 40], 10) == pytest.approx(50.0)
+    assert percentile_rank([5, 5, 5], 5) == pytest.approx(50.0)
+
+
+def test_percentile_rank_with_a_single_quantile():
+    assert percentile_rank([10], 5) == 0.0
+    assert percentile_rank([10], 10) == 50.0
+    assert percentile_rank([10], 15) == 100.0
+
+
+def test_rank_falls_back_to_the_population_for_small_cohorts():
+    analytics = CohortAnalytics(reload_seconds=60, refresh_seconds=0)
+    analytics._tables = {
+        ("hba1c", "40-49", "Female"): ([5.0, 6.0, 7.0], 40),
+        ("hba1c", ALL, ALL): ([4.0, 5.0, 6.0, 7.0, 8.0], 500),
+    }
+
+    rank = analytics.rank("hba1c", 6.0, 45, "Female")
+    assert rank == {
+        "metric": "hba1c",
+        "value": 6.0,
+        "percentile": 50.0,
+        "cohort": "Female, 40-49",
+        "observations": 40,
+    }
+
+    # No table stored for this cohort (fewer than COHORT_MIN_SIZE rows)
+    rank = analytics.rank("hba1c", 6.0, 45, "Male")
+    assert rank["cohort"] == ALL
+    assert rank["percentile"] == 50.0
+    assert rank["observations"] == 500
+
+    assert analytics.rank("hba1c", None, 45, "Female") is None
+    assert analytics.rank("bmi", 30.0, 45, "Female") is None
+
+
+def create_predictions(client, headers, inputs):
+    response = client.post(
+        "/api/patients/", headers=headers, json={"patient_code": "P-0001"}
+    )
+    patient_id = response.json()["id"]
+    payload = [dict(SAMPLE_INPUT, patient_id=patient_id, **values) for values in inputs]
+    response = client.post("/api/predictions/batch", headers=headers, json=payload)
+    assert response.status_code == 201, response.text
+    return [prediction["id"] for prediction in response.json()]
+
+
+def refresh():
+    db = SessionLocal()
+    try:
+        return refresh_cohort_quantiles(db)
+    finally:
+        db.close()
+
+
+def stored_tables():
+    db = SessionLocal()
+    try:
+        return {
+            (row.metric, row.age_band, row.gender): row
+            for row in db.scalars(select(CohortQuantiles))
+        }
+    finally:
+        db.close()
+
+
+def test_refresh_computes_cohort_and_population_quantiles(client, doctor, monkeypatch):
+    monkeypatch.setattr(settings, "COHORT_MIN_SIZE", 3)
+    monkeypatch.setattr(settings, "COHORT_QUANTILES", 5)
+    # Three women in their fifties, one man: his cohort is too small to store
+    create_predictions(
+        client,
+        doctor,
+        [
+            {"age": 52, "gender": "Female", "hba1c": 5.0},
+            {"age": 55, "gender": "Female", "hba1c": 6.0},
+            {"age": 58, "gender": "Female", "hba1c": 7.0},
+            {"age": 52, "gender": "Male", "hba1c": 9.0},
+        ],
+    )
+
+    # The rows are read in batches
+    compute = cohort_module._compute_in_python
+    monkeypatch.setattr(
+        cohort_module,
+        "_compute_in_python",
+        lambda db: compute(db, batch_size=2),
+    )
+    stored = refresh()
+
+    tables = stored_tables()
+    assert stored == len(tables) == 2 * len(cohort_module.COHORT_METRICS)
+    women = tables[("hba1c", "50-59", "Female")]
+    assert women.observations == 3
+    assert women.quantiles == pytest.approx([5.0, 5.5, 6.0, 6.5, 7.0])
+    population = tables[("hba1c", ALL, ALL)]
+    assert population.observations == 4
+    assert population.quantiles[0] == 5.0 and population.quantiles[-1] == 9.0
+    assert ("hba1c", "50-59", "Male") not in tables
+
+    # Refreshing replaces the tables
+    assert refresh() == stored
+
+
+def test_cohort_endpoint(client, doctor, monkeypatch):
+    monkeypatch.setattr(settings, "COHORT_MIN_SIZE", 3)
+    monkeypatch.setattr(settings, "COHORT_QUANTILES", 5)
+    ids = create_predictions(
+        client,
+        doctor,
+        [{"age": 52, "gender": "Female", "hba1c": hba1c} for hba1c in (5.0, 6.0, 7.0)]
+        + [{"age": 25, "gender": "Male", "hba1c": 6.0}],
+    )
+    refresh()
+
+    analytics = cohort_module.cohort_analytics
+    monkeypatch.setattr(analytics, "_tables", {})
+    monkeypatch.setattr(analytics, "computed_at", None)
+
+    async def reload():
+        async with AsyncSessionLocal() as db:
+            await analytics.reload(db)
+
+    asyncio.run(reload())
+
+    response = client.get(f"/api/predictions/{ids[2]}/cohort", headers=doctor)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["prediction_id"] == ids[2]
+    assert body["computed_at"] is not None
+    ranks = {rank["metric"]: rank for rank in body["ranks"]}
+    assert ranks["hba1c"]["cohort"] == "Female, 50-59"
+    assert ranks["hba1c"]["percentile"] == 100.0
+
+    # The only man in his twenties is ranked within the population
+    response = client.get(f"/api/predictions/{ids[3]}/cohort", headers=doctor)
+    ranks = {rank["metric"]: rank for rank in response.json()["ranks"]}
+    assert ranks["hba1c"]["cohort"] == ALL
+    assert ranks["hba1c"]["observations"] == 4
+
+    response = client.get("/api/predictions/999999/cohort", headers=doctor)
+    assert response.status_code == 404
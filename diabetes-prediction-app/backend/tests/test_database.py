@@ -0,0 +1,107 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import (
+    AsyncSessionLocal,
+    async_engine,
+    engine,
+    get_async_database_url,
+)
+from app.core.db_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    pool_metrics,
+)
+from app.models.user import User as UserModel, UserRole
+
+
+def test_async_database_url_uses_async_drivers():
+    assert (
+        get_async_database_url("postgresql://u:p@db:5432/app")
+        == "postgresql+asyncpg://u:p@db:5432/app"
+    )
+    assert get_async_database_url("sqlite:///data/app.db") == (
+        "sqlite+aiosqlite:///data/app.db"
+    )
+    assert async_engine.dialect.driver == "aiosqlite"
+
+
+def test_sync_and_async_engines_use_configured_instrumented_pools():
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert engine.pool.size() == settings.DB_POOL_SIZE
+    assert isinstance(async_engine.pool, InstrumentedAsyncQueuePool)
+
+
+def test_each_engine_counts_its_own_checkouts():
+    sync_checkouts = pool_metrics["sync"].checkouts
+    async_checkouts = pool_metrics["async"].checkouts
+    with engine.connect():
+        pass
+    assert pool_metrics["sync"].checkouts == sync_checkouts + 1
+    assert pool_metrics["sync"].in_use == 0
+    assert pool_metrics["async"].checkouts == async_checkouts
+
+    async def checkout():
+        async with async_engine.connect():
+            pass
+
+    asyncio.run(checkout())
+    assert pool_metrics["async"].checkouts == async_checkouts + 1
+    assert pool_metrics["sync"].checkouts == sync_checkouts + 1
+
+
+def test_pool_metrics_survive_dispose():
+    metrics = engine.pool.metrics
+    engine.dispose()
+    assert engine.pool.metrics is metrics
+
+    waits = metrics.waits
+    with engine.connect():
+        pass
+    assert metrics.waits == waits + 1
+
+
+def test_pool_metrics_endpoint_reports_each_engine(client, doctor):
+    response = client.get("/api/metrics/db-pool", headers=doctor)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["sync"]["size"] == settings.DB_POOL_SIZE
+    assert body["sync"]["checkouts"] == pool_metrics["sync"].checkouts
+    assert body["async"]["checkouts"] == pool_metrics["async"].checkouts
+    assert "read_replicas" in body
+
+
+def test_async_session_round_trip():
+    async def round_trip():
+        async with AsyncSessionLocal() as db:
+            db.add(
+                UserModel(
+                    email="async@example.com",
+                    hashed_password="x",
+                    full_name="Async",
+                    role=UserRole.DOCTOR,
+                )
+            )
+            await db.commit()
+
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                select(func.count())
+                .select_from(UserModel)
+                .where(UserModel.email == "async@example.com")
+            )
+
+    assert asyncio.run(round_trip()) == 1
+
+
+def test_api_requests_run_on_async_sessions(client, doctor):
+    response = client.post(
+        "/api/patients/", json={"patient_code": "PAT-ASYNC"}, headers=doctor
+    )
+    assert response.status_code == 201, response.text
+
+    response = client.get("/api/patients/", headers=doctor)
+    assert response.status_code == 200
+    assert [p["patient_code"] for p in response.json()] == ["PAT-ASYNC"]
@@ -0,0 +1,175 @@
+import asyncio
+
+from sqlalchemy import select
+
+from conftest import login, register
+
+from app.core import identity_cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.identity_cache import TTLCache, authentications, patient_ids, users
+from app.core.query_metrics import count_queries
+from app.core.security import create_access_token
+from app.models.user import User as UserModel, UserRole
+
+DOCTOR_ONLY = "/api/metrics/identity-cache"
+
+
+def change_user(current_email, **values):
+    """Update (or with delete=True, delete) a user through the ORM"""
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            user = await db.scalar(
+                select(UserModel).where(UserModel.email == current_email)
+            )
+            if values.pop("delete", False):
+                await db.delete(user)
+            for key, value in values.items():
+                setattr(user, key, value)
+            await db.commit()
+
+    asyncio.run(run())
+
+
+# TTLCache
+
+
+def test_ttl_cache_counts_hits_and_misses(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(identity_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.status()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+# Cached users
+
+
+def test_user_is_looked_up_once(client, doctor):
+    users.clear()
+    with count_queries() as queries:
+        client.get("/api/auth/me", headers=doctor)
+        client.get("/api/auth/me", headers=doctor)
+    assert queries.count == 1
+    assert authentications["cache"] >= 1
+
+
+def test_role_change_evicts_the_cached_user(client, doctor):
+    assert client.get(DOCTOR_ONLY, headers=doctor).status_code == 200
+    assert users.get("doctor@example.com") is not None
+
+    change_user("doctor@example.com", role=UserRole.PATIENT)
+    assert users.get("doctor@example.com") is None
+    assert client.get(DOCTOR_ONLY, headers=doctor).status_code == 403
+    assert client.get("/api/auth/me", headers=doctor).json()["role"] == "patient"
+
+
+def test_deleted_user_is_rejected_right_away(client, doctor):
+    assert client.get("/api/auth/me", headers=doctor).status_code == 200
+
+    change_user("doctor@example.com", delete=True)
+    assert client.get("/api/auth/me", headers=doctor).status_code == 401
+
+
+def test_email_change_evicts_the_old_subject(client, doctor):
+    assert client.get("/api/auth/me", headers=doctor).status_code == 200
+
+    change_user("doctor@example.com", email="renamed@example.com")
+    # The token's subject no longer exists
+    assert client.get("/api/auth/me", headers=doctor).status_code == 401
+
+
+def test_sync_session_changes_evict_too(client, doctor):
+    assert client.get(DOCTOR_ONLY, headers=doctor).status_code == 200
+
+    db = SessionLocal()
+    try:
+        user = db.scalar(
+            select(UserModel).where(UserModel.email == "doctor@example.com")
+        )
+        user.full_name = "Renamed"
+        db.commit()
+    finally:
+        db.close()
+    assert client.get("/api/auth/me", headers=doctor).json()["full_name"] == "Renamed"
+
+
+# Stateless tokens
+
+
+def test_stateless_tokens_skip_the_lookup(client, doctor, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+    users.clear()
+    claims = authentications["claims"]
+
+    with count_queries(max_queries=0):
+        assert client.get(DOCTOR_ONLY, headers=doctor).status_code == 200
+    assert authentications["claims"] == claims + 1
+
+    # The claims carry no profile: /me fetches it
+    with count_queries(max_queries=1):
+        body = client.get("/api/auth/me", headers=doctor).json()
+    assert body["email"] == "doctor@example.com"
+    assert body["full_name"] == "Doctor"
+
+    body = client.get(DOCTOR_ONLY, headers=doctor).json()
+    assert body["stateless"] is True
+    assert body["authentications"]["claims"] == authentications["claims"]
+
+
+def test_stateless_tokens_keep_their_role_until_they_expire(
+    client, doctor, monkeypatch
+):
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+    change_user("doctor@example.com", role=UserRole.PATIENT)
+    # Documented trade-off: the signed role is trusted
+    assert client.get(DOCTOR_ONLY, headers=doctor).status_code == 200
+
+    # A new token carries the new role
+    assert (
+        client.get(DOCTOR_ONLY, headers=login(client, "doctor@example.com")).status_code
+        == 403
+    )
+
+
+# Cached patient ids
+
+
+def test_user_and_patient_id_are_both_cached(client, patient_user):
+    patient_ids.clear()
+    users.clear()
+    with count_queries() as first:
+        assert (
+            client.get("/api/predictions/stats", headers=patient_user).status_code
+            == 200
+        )
+    with count_queries() as second:
+        assert (
+            client.get("/api/predictions/stats", headers=patient_user).status_code
+            == 200
+        )
+    # The user and patient id lookups are both cached
+    assert second.count == first.count - 2
+
+
+def test_user_changes_evict_their_patient_id(client, patient_user):
+    client.get("/api/predictions/stats", headers=patient_user)
+    user_id = client.get("/api/auth/me", headers=patient_user).json()["id"]
+    assert patient_ids.get(user_id) is not None
+
+    change_user("patient@example.com", full_name="Renamed")
+    assert patient_ids.get(user_id) is None
+
+
+def test_missing_users_are_not_cached(client):
+    token = create_access_token(data={"sub": "late@example.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+    register(client, "late@example.com")
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
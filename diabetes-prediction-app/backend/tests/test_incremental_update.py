@@ -0,0 +1,120 @@
+import copy
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from conftest import SAMPLE_INPUT
+
+from app.ml import incremental_update
+from app.ml.incremental_update import fit_anchored, holdout_loss
+from app.ml.predictor import get_predictor
+
+
+def make_data(n, coef, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, len(coef)))
+    y = (rng.random(n) < 1 / (1 + np.exp(-(X @ coef)))).astype(int)
+    return X, y
+
+
+def test_fit_anchored_stays_near_previous_coefficients():
+    coef = np.array([2.0, -1.0, 0.5, 0.0])
+    X, y = make_data(5000, coef, seed=0)
+    base = LogisticRegression(class_weight="balanced", C=10.0).fit(X, y)
+
+    # A small, noisy delta on its own would move the weights a long way
+    X_new, y_new = make_data(60, coef, seed=1)
+    y_new[:15] = 1 - y_new[:15]
+    refit = LogisticRegression(class_weight="balanced", C=10.0).fit(X_new, y_new)
+    anchored = fit_anchored(base, X_new, y_new, C=0.05, max_iter=100)
+
+    drift = np.linalg.norm(anchored.coef_ - base.coef_)
+    assert drift < np.linalg.norm(refit.coef_ - base.coef_)
+    assert drift < 0.5
+    assert anchored.coef_.shape == base.coef_.shape
+    # The active model is never modified in place
+    assert base.coef_ is not anchored.coef_
+
+
+def test_fit_anchored_learns_from_new_data_when_weighted_up():
+    X, y = make_data(2000, np.array([1.0, 0.0]), seed=2)
+    base = LogisticRegression(class_weight="balanced").fit(X, y)
+
+    # The relationship has changed: the second feature now drives the label
+    X_new, y_new = make_data(2000, np.array([0.0, 2.0]), seed=3)
+    X_hold, y_hold = make_data(1000, np.array([0.0, 2.0]), seed=4)
+    updated = fit_anchored(base, X_new, y_new, C=1.0, max_iter=100)
+
+    assert holdout_loss(updated, X_hold, y_hold) < holdout_loss(base, X_hold, y_hold)
+
+
+def labelled_rows(n, seed):
+    """Fake labelled predictions, confirmed as the active model predicted"""
+    rng = np.random.default_rng(seed)
+    records = [
+        {
+            **SAMPLE_INPUT,
+            "hba1c": float(rng.uniform(4.5, 9.0)),
+            "glucose_fasting": float(rng.uniform(80, 180)),
+            "bmi": float(rng.uniform(19, 38)),
+        }
+        for _ in range(n)
+    ]
+    results = get_predictor().predict_batch(records)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i + 1,
+            confirmed_at=start + timedelta(minutes=i),
+            confirmed_diagnosis=bool(result["prediction_class"]),
+            **record,
+        )
+        for i, (record, result) in enumerate(zip(records, results))
+    ]
+
+
+@pytest.fixture
+def update_job(monkeypatch):
+    """Run the update against fake rows, recording artifact writes"""
+    written = []
+    monkeypatch.setattr(
+        incremental_update, "fetch_labelled_delta", lambda *a: labelled_rows(80, 0)
+    )
+    monkeypatch.setattr(incremental_update, "fetch_replay_sample", lambda *a: [])
+    monkeypatch.setattr(
+        incremental_update,
+        "write_artifact_set",
+        lambda model, manifest: written.append((model, manifest)) or "unused",
+    )
+    return written
+
+
+def test_update_keeps_active_model_when_candidate_is_worse(update_job, monkeypatch):
+    def flipped(model, X, y, C, max_iter):
+        worse = copy.deepcopy(model)
+        worse.coef_ = -model.coef_
+        worse.intercept_ = -model.intercept_
+        return worse
+
+    monkeypatch.setattr(incremental_update, "fit_anchored", flipped)
+
+    assert incremental_update.run_incremental_update(db=None) is None
+    assert update_job == []
+
+
+def test_update_writes_candidate_that_scores_at_least_as_well(update_job, monkeypatch):
+    monkeypatch.setattr(
+        incremental_update,
+        "fit_anchored",
+        lambda model, X, y, C, max_iter: copy.deepcopy(model),
+    )
+
+    version = incremental_update.run_incremental_update(db=None)
+
+    assert version is not None
+    [(model, manifest)] = update_job
+    assert manifest["rows"] == 80
+    assert manifest["holdout_log_loss"] <= manifest["parent_holdout_log_loss"]
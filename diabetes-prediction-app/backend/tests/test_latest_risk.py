@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from conftest import SAMPLE_INPUT, login, register
+
+from app.core.database import SessionLocal
+from app.core.query_metrics import count_queries
+from app.models.prediction import Prediction as PredictionModel
+
+URL = "/api/patients/with-latest-risk"
+
+
+def create_patient(client, headers, code):
+    response = client.post(
+        "/api/patients/", headers=headers, json={"patient_code": code}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def add_prediction(patient_id, risk_level, created_at):
+    db = SessionLocal()
+    try:
+        prediction = PredictionModel(
+            **SAMPLE_INPUT,
+            patient_id=patient_id,
+            risk_probability={"Low": 10.0, "Medium": 50.0, "High": 90.0}[risk_level],
+            risk_level=risk_level,
+            prediction_class=int(risk_level == "High"),
+            created_at=created_at,
+        )
+        db.add(prediction)
+        db.commit()
+        return prediction.id
+    finally:
+        db.close()
+
+
+def at(day):
+    return datetime(2024, 1, day, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def roster(client, doctor):
+    """Patients with histories; returns patient code -> (id, latest prediction id)"""
+    history = {
+        "P-A": [("High", at(1)), ("Low", at(5)), ("Medium", at(3))],
+        "P-B": [("Medium", at(2))],
+        # Same created_at: the higher id is the latest
+        "P-C": [("Low", at(4)), ("High", at(4))],
+        "P-D": [],
+    }
+    roster = {}
+    for code, predictions in history.items():
+        patient_id = create_patient(client, doctor, code)
+        latest = None
+        for risk_level, created_at in predictions:
+            prediction_id = add_prediction(patient_id, risk_level, created_at)
+            if latest is None or created_at >= latest[1]:
+                latest = (prediction_id, created_at)
+        roster[code] = (patient_id, latest and latest[0])
+    return roster
+
+
+def latest_by_code(response):
+    assert response.status_code == 200, response.text
+    return {
+        patient["patient_code"]: patient["latest_prediction"]
+        for patient in response.json()
+    }
+
+
+def test_each_patient_gets_their_latest_prediction(client, doctor, roster):
+    latest = latest_by_code(client.get(URL, headers=doctor))
+    assert set(latest) == set(roster)
+    for code, (_, prediction_id) in roster.items():
+        if prediction_id is None:
+            assert latest[code] is None
+        else:
+            assert latest[code]["id"] == prediction_id
+    assert latest["P-A"]["risk_level"] == "Low"
+    assert latest["P-C"]["risk_level"] == "High"
+
+
+def test_filter_by_latest_risk_level(client, doctor, roster):
+    # P-A had a High prediction, but not as its latest
+    latest = latest_by_code(
+        client.get(URL, params={"risk_level": "High"}, headers=doctor)
+    )
+    assert set(latest) == {"P-C"}
+
+
+def test_roster_is_one_query_per_page(client, doctor, roster):
+    with count_queries(max_queries=2):
+        response = client.get(URL, params={"limit": 2}, headers=doctor)
+    assert len(response.json()) == 2
+
+    codes = [patient["patient_code"] for patient in response.json()]
+    with count_queries(max_queries=2):
+        response = client.get(
+            URL,
+            params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]},
+            headers=doctor,
+        )
+    codes += [patient["patient_code"] for patient in response.json()]
+    assert sorted(codes) == sorted(roster)
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_patients_only_see_themselves(client, doctor, roster):
+    register(client, "patient@example.com", role="patient")
+    headers = login(client, "patient@example.com")
+    latest = latest_by_code(client.get(URL, headers=headers))
+    assert len(latest) == 1
+    assert not set(latest) & set(roster)
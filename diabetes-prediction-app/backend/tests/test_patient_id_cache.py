@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import identity_cache
+from app.core.config import settings
+from app.core.identity_cache import TTLCache, patient_ids
+
+
+@pytest.fixture
+def statements():
+    """Text of every statement issued on any engine while the test runs"""
+    issued = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        issued.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield issued
+    event.remove(Engine, "before_cursor_execute", record)
+
+
+def patient_lookups(statements):
+    return [
+        statement
+        for statement in statements
+        if "FROM patients" in statement and "patients.user_id =" in statement
+    ]
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(identity_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now[0] += 61
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_patient_id_is_looked_up_once(client, patient_user, statements):
+    patient_ids.clear()
+    for _ in range(2):
+        response = client.get("/api/predictions/stats", headers=patient_user)
+        assert response.status_code == 200
+    assert len(patient_lookups(statements)) == 1
+
+
+def test_patient_id_expires(client, patient_user, monkeypatch):
+    client.get("/api/predictions/stats", headers=patient_user)
+    user_id = client.get("/api/auth/me", headers=patient_user).json()["id"]
+    assert patient_ids.get(user_id) is not None
+
+    now = identity_cache.time.monotonic()
+    monkeypatch.setattr(
+        identity_cache.time,
+        "monotonic",
+        lambda: now + settings.PATIENT_ID_CACHE_SECONDS + 1,
+    )
+    assert patient_ids.get(user_id) is None
+
+
+def test_deleting_the_patient_record_evicts_the_patient_id(
+    client, doctor, patient_user
+):
+    assert client.get("/api/predictions/stats", headers=patient_user).status_code == 200
+    user_id = client.get("/api/auth/me", headers=patient_user).json()["id"]
+    patient_id = patient_ids.get(user_id)
+    assert patient_id is not None
+
+    response = client.delete(f"/api/patients/{patient_id}", headers=doctor)
+    assert response.status_code in (200, 204), response.text
+    assert patient_ids.get(user_id) is None
+    # Without a patient record the statistics are refused, not served stale
+    assert client.get("/api/predictions/stats", headers=patient_user).status_code == 403
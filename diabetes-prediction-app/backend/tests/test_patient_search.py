@@ -0,0 +1,118 @@
+from conftest import login
+
+from app.core.query_metrics import count_queries
+
+URL = "/api/patients/search"
+
+
+def create_patient(client, headers, code, phone=None):
+    response = client.post(
+        "/api/patients/", headers=headers, json={"patient_code": code, "phone": phone}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def register_patient(client, email, full_name):
+    response = client.post(
+        "/api/auth/register",
+        json={
+            "email": email,
+            "full_name": full_name,
+            "role": "patient",
+            "password": "secret-pass",
+        },
+    )
+    assert response.status_code == 201, response.text
+
+
+def search(client, headers, q, **params):
+    response = client.get(URL, params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [patient["patient_code"] for patient in response.json()]
+
+
+def test_matches_code_phone_and_name(client, doctor):
+    create_patient(client, doctor, "DM-0001", phone="555-0100")
+    create_patient(client, doctor, "DM-0002", phone="555-0199")
+    create_patient(client, doctor, "HT-0001")
+    register_patient(client, "maria@example.com", "Maria Lopez")
+
+    assert search(client, doctor, "dm-") == ["DM-0001", "DM-0002"]
+    assert search(client, doctor, "555-0199") == ["DM-0002"]
+
+    # By the linked user's name, prefix or substring, case-insensitive
+    found = client.get(URL, params={"q": "LOPEZ"}, headers=doctor).json()
+    assert [patient["full_name"] for patient in found] == ["Maria Lopez"]
+    assert search(client, doctor, "mar") == [found[0]["patient_code"]]
+
+    # Substrings need SEARCH_SUBSTRING_MIN_LENGTH characters
+    assert search(client, doctor, "0001") == ["DM-0001", "HT-0001"]
+    assert search(client, doctor, "01") == []
+    assert search(client, doctor, "nobody") == []
+
+
+def test_wildcards_are_matched_literally(client, doctor):
+    create_patient(client, doctor, "AB%12")
+    create_patient(client, doctor, "AB_12")
+    create_patient(client, doctor, "ABX12")
+    create_patient(client, doctor, "AB\\12")
+
+    assert search(client, doctor, "b%1") == ["AB%12"]
+    assert search(client, doctor, "b_1") == ["AB_12"]
+    assert search(client, doctor, "b\\1") == ["AB\\12"]
+    assert search(client, doctor, "ab%") == ["AB%12"]
+    assert search(client, doctor, "ab_") == ["AB_12"]
+
+
+def test_prefix_matches_come_first_and_limit_applies(client, doctor):
+    for code in ["X-KEY-2", "KEY-3", "X-KEY-1", "KEY-1", "KEY-2"]:
+        create_patient(client, doctor, code)
+
+    assert search(client, doctor, "key") == [
+        "KEY-1",
+        "KEY-2",
+        "KEY-3",
+        "X-KEY-1",
+        "X-KEY-2",
+    ]
+    assert search(client, doctor, "key", limit=2) == ["KEY-1", "KEY-2"]
+    assert search(client, doctor, "key", limit=4) == [
+        "KEY-1",
+        "KEY-2",
+        "KEY-3",
+        "X-KEY-1",
+    ]
+
+    response = client.get(URL, params={"q": "key", "limit": 0}, headers=doctor)
+    assert response.status_code == 422
+
+
+def test_search_is_one_query(client, doctor):
+    for number in range(5):
+        create_patient(client, doctor, f"Q-{number}")
+    with count_queries(max_queries=2):
+        assert len(search(client, doctor, "q-")) == 5
+
+
+def test_only_doctors_can_search(client, doctor):
+    # Patients have no owning doctor: every doctor sees every patient, as in
+    # the patient list, and patient users cannot search at all
+    create_patient(client, doctor, "DM-0001")
+    client.post(
+        "/api/auth/register",
+        json={
+            "email": "other@example.com",
+            "full_name": "Other",
+            "role": "doctor",
+            "password": "secret-pass",
+        },
+    )
+    other = login(client, "other@example.com")
+    assert search(client, other, "dm-") == search(client, doctor, "dm-")
+
+    register_patient(client, "maria@example.com", "Maria Lopez")
+    response = client.get(
+        URL, params={"q": "dm-"}, headers=login(client, "maria@example.com")
+    )
+    assert response.status_code == 403
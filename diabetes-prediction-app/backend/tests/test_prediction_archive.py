@@ -0,0 +1,137 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models.prediction import Prediction as PredictionModel
+from app.models.prediction_archive import PredictionArchive
+from app.utils.prediction_archive import ARCHIVE_COLUMNS, ARCHIVE_SCHEMA
+from app.utils.prediction_stats import record_predictions
+from conftest import SAMPLE_INPUT
+
+ARCHIVED_AT = [
+    datetime(2023, 1, 20, 9, 0, tzinfo=timezone.utc),
+    datetime(2023, 1, 10, 9, 0, tzinfo=timezone.utc),
+]
+
+
+def archive_predictions(patient_id, doctor_id):
+    """Write two January 2023 predictions to an archive file, as archival would"""
+    records = [
+        {
+            **{column: None for column in ARCHIVE_COLUMNS},
+            **SAMPLE_INPUT,
+            "id": 1000 + i,
+            "patient_id": patient_id,
+            "doctor_id": doctor_id,
+            "risk_probability": 42.0,
+            "risk_level": "Medium",
+            "prediction_class": 0,
+            "created_at": created_at,
+        }
+        for i, created_at in enumerate(ARCHIVED_AT)
+    ]
+    os.makedirs(settings.PREDICTION_ARCHIVE_PATH, exist_ok=True)
+    pq.write_table(
+        pa.Table.from_pylist(records, schema=ARCHIVE_SCHEMA),
+        os.path.join(settings.PREDICTION_ARCHIVE_PATH, "predictions_y2023m01.parquet"),
+    )
+
+    db = SessionLocal()
+    try:
+        db.add(
+            PredictionArchive(
+                partition_name="predictions_y2023m01",
+                path="predictions_y2023m01.parquet",
+                range_start=datetime(2023, 1, 1, tzinfo=timezone.utc),
+                range_end=datetime(2023, 2, 1, tzinfo=timezone.utc),
+                min_id=1000,
+                max_id=1000 + len(records) - 1,
+                row_count=len(records),
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    # The statistics counted them when they were inserted
+    async def count():
+        async with AsyncSessionLocal() as session:
+            await record_predictions(
+                session, [PredictionModel(**record) for record in records]
+            )
+            await session.commit()
+
+    asyncio.run(count())
+    return [record["id"] for record in records]
+
+
+@pytest.fixture
+def patient_with_archive(client, doctor):
+    patient = client.post(
+        "/api/patients/", json={"patient_code": "PAT-ARCHIVE"}, headers=doctor
+    ).json()
+    me = client.get("/api/auth/me", headers=doctor).json()
+    archived_ids = archive_predictions(patient["id"], me["id"])
+
+    response = client.post(
+        "/api/predictions/",
+        json={**SAMPLE_INPUT, "patient_id": patient["id"]},
+        headers=doctor,
+    )
+    assert response.status_code == 201, response.text
+    return patient["id"], response.json()["id"], archived_ids
+
+
+def test_history_continues_from_database_rows_into_the_archive(
+    client, doctor, patient_with_archive
+):
+    patient_id, live_id, archived_ids = patient_with_archive
+
+    response = client.get(f"/api/predictions/patient/{patient_id}", headers=doctor)
+
+    assert response.status_code == 200, response.text
+    assert [p["id"] for p in response.json()] == [live_id, *archived_ids]
+
+
+def test_history_pages_into_the_archive_with_a_cursor(
+    client, doctor, patient_with_archive
+):
+    patient_id, live_id, archived_ids = patient_with_archive
+    url = f"/api/predictions/patient/{patient_id}?limit=1"
+
+    ids, headers = [], {}
+    while True:
+        response = client.get(url, headers={**doctor, **headers})
+        assert response.status_code == 200, response.text
+        ids += [p["id"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        url = f"/api/predictions/patient/{patient_id}?limit=1&cursor={cursor}"
+
+    assert ids == [live_id, *archived_ids]
+
+
+def test_deleted_patients_archived_predictions_are_hidden_and_uncounted(
+    client, doctor, patient_with_archive
+):
+    patient_id, _, archived_ids = patient_with_archive
+    response = client.get(f"/api/predictions/{archived_ids[0]}", headers=doctor)
+    assert response.status_code == 200, response.text
+    assert client.get("/api/predictions/stats", headers=doctor).json()["total"] == 3
+
+    response = client.delete(f"/api/patients/{patient_id}", headers=doctor)
+    assert response.status_code == 204, response.text
+
+    response = client.get(f"/api/predictions/{archived_ids[0]}", headers=doctor)
+    assert response.status_code == 404
+    response = client.get(f"/api/predictions/patient/{patient_id}", headers=doctor)
+    assert response.json() == []
+    stats = client.get("/api/predictions/stats", headers=doctor).json()
+    assert stats["total"] == 0
@@ -0,0 +1,117 @@
+import importlib.util
+import os
+
+import pytest
+from sqlalchemy import exc, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from conftest import BACKEND_DIR, SAMPLE_INPUT
+
+from app.core.database import CodedString, SessionLocal
+from app.models import prediction as prediction_module
+from app.models.prediction import Prediction as PredictionModel
+
+MIGRATION = os.path.join(
+    BACKEND_DIR, "alembic", "versions", "0005_compact_prediction_columns.py"
+)
+
+
+def coded_columns():
+    return {
+        column.name: column.type.values
+        for column in PredictionModel.__table__.columns
+        if isinstance(column.type, CodedString)
+    }
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("compact_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("dialect", [postgresql.dialect(), sqlite.dialect()])
+def test_every_value_maps_to_its_code_and_back(dialect):
+    for name, values in coded_columns().items():
+        coded = CodedString(values)
+        process_result = coded.result_processor(dialect, None)
+        for code, value in enumerate(values):
+            assert coded.process_bind_param(value, dialect) == code, name
+            assert coded.process_result_value(code, dialect) == value, name
+            assert process_result(code) == value, name
+        assert coded.process_bind_param(None, dialect) is None
+        assert process_result(None) is None
+
+
+def test_unknown_value_is_refused():
+    coded = CodedString(prediction_module.GENDERS)
+    with pytest.raises(ValueError):
+        coded.process_bind_param("Unknown", postgresql.dialect())
+    # Case matters: stored codes are exact
+    with pytest.raises(ValueError):
+        coded.process_bind_param("female", postgresql.dialect())
+
+
+def add_prediction(**values):
+    db = SessionLocal()
+    try:
+        prediction = PredictionModel(
+            **{
+                **SAMPLE_INPUT,
+                "risk_probability": 50.0,
+                "risk_level": "Medium",
+                "prediction_class": 0,
+                **values,
+            }
+        )
+        db.add(prediction)
+        db.commit()
+        return prediction.id
+    finally:
+        db.close()
+
+
+def test_values_round_trip_through_the_database():
+    columns = coded_columns()
+    longest = max(len(values) for values in columns.values())
+    ids = []
+    for index in range(longest):
+        ids.append(
+            add_prediction(
+                **{
+                    name: values[index % len(values)]
+                    for name, values in columns.items()
+                }
+            )
+        )
+
+    db = SessionLocal()
+    try:
+        for index, prediction_id in enumerate(ids):
+            stored = db.get(PredictionModel, prediction_id)
+            raw = db.execute(
+                text(f"SELECT {', '.join(columns)} FROM predictions WHERE id = :id"),
+                {"id": prediction_id},
+            ).one()
+            for name, values in columns.items():
+                code = index % len(values)
+                assert getattr(stored, name) == values[code]
+                assert getattr(raw, name) == code
+    finally:
+        db.close()
+
+
+def test_unknown_value_is_not_stored_as_null():
+    with pytest.raises(exc.StatementError):
+        add_prediction(gender="Unknown")
+
+    db = SessionLocal()
+    try:
+        assert db.scalars(select(PredictionModel.id)).all() == []
+    finally:
+        db.close()
+
+
+def test_migration_vocabularies_match_the_model():
+    assert load_migration().CODED_COLUMNS == coded_columns()
@@ -0,0 +1,90 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+from app.utils.prediction_journal import PredictionJournal, _encode
+
+
+def record(prediction_id):
+    return {
+        "id": prediction_id,
+        "patient_id": 1,
+        "doctor_id": 2,
+        "risk_level": "Low",
+        "risk_probability": 0.1,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def owner(path):
+    journal = PredictionJournal(path, batch_size=10, flush_seconds=60)
+    os.makedirs(path, exist_ok=True)
+    journal._open_segment()
+    journal.enabled = True
+    return journal
+
+
+def append(journal, prediction_id):
+    values = record(prediction_id)
+    journal._append(_encode(values), values)
+
+
+def test_owner_finds_appended_records_without_reading_segments(tmp_path, monkeypatch):
+    journal = owner(str(tmp_path))
+    append(journal, 1)
+    append(journal, 2)
+
+    def no_reads(path):
+        raise AssertionError(f"read {path}")
+
+    monkeypatch.setattr(journal, "_read_segment", no_reads)
+    monkeypatch.setattr(journal, "_catch_up", lambda: no_reads(journal.path))
+    assert journal.find(2)["id"] == 2
+    assert journal.find(3) is None
+    journal._segment.close()
+
+
+def test_drain_indexes_replayed_segments_until_inserted(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    earlier = owner(path)
+    append(earlier, 1)
+    earlier._segment.close()
+
+    journal = PredictionJournal(path, batch_size=10, flush_seconds=60)
+    found = []
+
+    async def insert_batch(records):
+        found.append(journal.find(1))
+
+    monkeypatch.setattr(journal, "_insert_batch", insert_batch)
+    assert asyncio.run(journal.drain()) == 1
+    assert found[0]["id"] == 1
+    assert journal.find(1) is None
+    assert journal.status()["indexed"] == 0
+
+
+def test_other_workers_only_read_new_bytes(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    journal = owner(path)
+    append(journal, 1)
+
+    worker = PredictionJournal(path, batch_size=10, flush_seconds=60)
+    assert worker.find(1)["id"] == 1
+    segment = journal._segment.name
+    assert worker._offsets[segment] == os.path.getsize(segment)
+
+    # A half written record is picked up once it is complete
+    line = _encode(record(2))
+    journal._segment.write(line[:10])
+    journal._segment.flush()
+    assert worker.find(2) is None
+    journal._segment.write(line[10:])
+    journal._segment.flush()
+    assert worker.find(2)["id"] == 2
+    assert list(worker._pending) == [1, 2]
+
+    # Drained segments are forgotten
+    journal._segment.close()
+    os.remove(segment)
+    assert worker.find(1) is None
+    assert worker.status()["indexed"] == 0
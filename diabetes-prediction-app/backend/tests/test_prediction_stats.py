@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.database import AsyncSessionLocal
+from app.utils import prediction_stats
+from app.utils.prediction_stats import (
+    SCOPE_DOCTOR,
+    SCOPE_GLOBAL,
+    SCOPE_PATIENT,
+    get_prediction_stats,
+    record_predictions,
+)
+
+
+def prediction(risk_level, risk_probability, patient_id=1, doctor_id=2):
+    return SimpleNamespace(
+        created_at=datetime.now(timezone.utc),
+        doctor_id=doctor_id,
+        patient_id=patient_id,
+        risk_level=risk_level,
+        risk_probability=risk_probability,
+    )
+
+
+def record_and_read(batches, scope_type, scope_id):
+    async def run():
+        for rows, sign in batches:
+            async with AsyncSessionLocal() as db:
+                await record_predictions(db, rows, sign)
+                await db.commit()
+        async with AsyncSessionLocal() as db:
+            return await get_prediction_stats(db, scope_type, scope_id, days=30)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(params=["upsert", "select-then-write"])
+def counter_path(request, monkeypatch):
+    """Run each test through ON CONFLICT and through the generic fallback"""
+    if request.param == "select-then-write":
+        monkeypatch.setattr(prediction_stats, "UPSERT_INSERTS", {})
+    return request.param
+
+
+def test_counters_add_up_across_transactions(counter_path):
+    stats = record_and_read(
+        [
+            ([prediction("High", 80.0), prediction("Low", 10.0)], 1),
+            ([prediction("High", 90.0)], 1),
+        ],
+        SCOPE_GLOBAL,
+        0,
+    )
+    assert stats["total"] == 3
+    assert stats["risk_counts"] == {"Low": 1, "Medium": 0, "High": 2}
+    assert stats["mean_probability"] == 60.0
+
+
+def test_deleted_predictions_are_subtracted(counter_path):
+    high = prediction("High", 80.0, patient_id=5)
+    stats = record_and_read(
+        [([high, prediction("Medium", 50.0, patient_id=5)], 1), ([high], -1)],
+        SCOPE_PATIENT,
+        5,
+    )
+    assert stats["risk_counts"] == {"Low": 0, "Medium": 1, "High": 0}
+    assert stats["mean_probability"] == 50.0
+
+
+def test_doctor_scope_is_counted(counter_path):
+    stats = record_and_read(
+        [([prediction("Low", 20.0, doctor_id=9)], 1)], SCOPE_DOCTOR, 9
+    )
+    assert stats["total"] == 1
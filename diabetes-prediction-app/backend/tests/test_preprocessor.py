@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SAMPLE_INPUT
+
+from app.core.config import settings
+from app.ml.load_models import get_ml_models
+from app.ml.preprocessor import (
+    DiabetesPreprocessor,
+    clip_outliers,
+    compute_clip_bounds,
+)
+
+# Far outside the training range of either feature
+EXTREME_INPUT = dict(SAMPLE_INPUT, bmi=95.0, glucose_fasting=10.0)
+
+
+def test_compute_clip_bounds():
+    df = pd.DataFrame({"a": np.arange(101.0), "b": np.arange(101.0) * 2})
+    bounds = compute_clip_bounds(df, ["a", "b"])
+    assert list(bounds.columns) == ["a", "b"]
+    assert bounds["a"].tolist() == pytest.approx([1.0, 99.0])
+    assert bounds["b"].tolist() == pytest.approx([2.0, 198.0])
+
+
+def test_values_outside_the_bounds_are_clipped():
+    df = pd.DataFrame(
+        {"a": [-5.0, 3.0, 50.0], "b": [1, 2, 3], "label": ["x", "y", "z"]}
+    )
+    bounds = pd.DataFrame({"a": [0.0, 10.0], "b": [2.0, 2.5]}, index=[0.01, 0.99])
+    clipped = clip_outliers(df, bounds)
+    assert clipped["a"].tolist() == [0.0, 3.0, 10.0]
+    assert clipped["b"].tolist() == [2.0, 2.0, 2.5]
+    # Columns without bounds are left alone
+    assert clipped["label"].tolist() == ["x", "y", "z"]
+
+
+def test_without_bounds_nothing_is_clipped():
+    df = pd.DataFrame({"a": [-5.0, 50.0]})
+    assert clip_outliers(df, None)["a"].tolist() == [-5.0, 50.0]
+
+
+def test_preprocessor_clips_with_the_training_bounds():
+    ml_models = get_ml_models()
+    bounds = pd.DataFrame(
+        {"bmi": [18.0, 45.0], "glucose_fasting": [70.0, 200.0]}, index=[0.01, 0.99]
+    )
+    preprocessor = DiabetesPreprocessor(
+        encoder=ml_models.encoder, poly=ml_models.poly, clip_bounds=bounds
+    )
+    row = preprocessor.preprocess(dict(EXTREME_INPUT)).iloc[0]
+    assert row["bmi"] == 45.0
+    assert row["glucose_fasting"] == 70.0
+    assert row["bmi_glucose"] == pytest.approx(45.0 * 70.0)
+
+
+def test_serving_is_unchanged_without_clip_bounds():
+    # The bundled artifact set predates clip_bounds.pkl
+    assert not os.path.exists(os.path.join(settings.ML_MODELS_PATH, "clip_bounds.pkl"))
+    ml_models = get_ml_models()
+    assert ml_models.clip_bounds is None
+
+    preprocessor = DiabetesPreprocessor(encoder=ml_models.encoder, poly=ml_models.poly)
+    row = preprocessor.preprocess(dict(EXTREME_INPUT)).iloc[0]
+    assert row["bmi"] == 95.0
+    assert row["glucose_fasting"] == 10.0
+    assert row["bmi_glucose"] == pytest.approx(95.0 * 10.0)
@@ -0,0 +1,92 @@
+"""Statements issued per endpoint; identity caches are cleared for cold counts"""
+
+from conftest import SAMPLE_INPUT, login, register
+
+from app.core.identity_cache import patient_ids, users
+from app.core.query_metrics import count_queries
+
+
+def create_patient(client, headers, code="P-0001"):
+    response = client.post(
+        "/api/patients/", headers=headers, json={"patient_code": code}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_register_doctor_is_one_insert(client):
+    with count_queries(max_queries=1):
+        register(client, "doctor@example.com")
+
+
+def test_register_patient_inserts_user_and_patient(client):
+    with count_queries(max_queries=2):
+        register(client, "patient@example.com", role="patient")
+
+
+def test_duplicate_email_relies_on_the_unique_constraint(client):
+    register(client, "doctor@example.com")
+    with count_queries(max_queries=1) as queries:
+        response = client.post(
+            "/api/auth/register",
+            json={
+                "email": "doctor@example.com",
+                "full_name": "Doctor",
+                "role": "doctor",
+                "password": "secret-pass",
+            },
+        )
+    assert response.status_code == 400
+    assert not any(shape.startswith("SELECT") for shape in queries.shapes)
+
+
+def test_login_is_one_lookup(client):
+    register(client, "doctor@example.com")
+    with count_queries(max_queries=1):
+        login(client, "doctor@example.com")
+
+
+def test_create_patient(client, doctor):
+    users.clear()
+    with count_queries(max_queries=2):
+        create_patient(client, doctor)
+
+    # Duplicate codes fail on the constraint, without a pre-check
+    with count_queries(max_queries=1):
+        response = client.post(
+            "/api/patients/", headers=doctor, json={"patient_code": "P-0001"}
+        )
+    assert response.status_code == 400
+
+
+def test_create_prediction(client, doctor):
+    patient_id = create_patient(client, doctor)
+    payload = dict(SAMPLE_INPUT, patient_id=patient_id)
+
+    users.clear()
+    with count_queries(max_queries=3):
+        response = client.post("/api/predictions/", headers=doctor, json=payload)
+    assert response.status_code == 201, response.text
+
+    # Warm identity cache: the INSERT ... RETURNING and the statistics
+    with count_queries(max_queries=2):
+        response = client.post("/api/predictions/", headers=doctor, json=payload)
+    assert response.status_code == 201, response.text
+
+
+def test_ensure_patient_of_registered_patient(client, patient_user):
+    users.clear()
+    patient_ids.clear()
+    with count_queries(max_queries=2):
+        response = client.post("/api/auth/me/ensure-patient", headers=patient_user)
+    assert response.status_code == 200, response.text
+
+
+def test_patient_list(client, doctor):
+    for number in range(3):
+        create_patient(client, doctor, code=f"P-{number:04d}")
+
+    users.clear()
+    with count_queries(max_queries=2):
+        response = client.get("/api/patients/", headers=doctor)
+    assert len(response.json()) == 3
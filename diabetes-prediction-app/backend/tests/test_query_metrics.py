@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app.core import query_metrics
+from app.core.config import settings
+from app.core.database import engine
+from app.core.query_metrics import QueryBudgetExceeded, count_queries
+
+
+def run_twice(statement="SELECT 1"):
+    with engine.connect() as connection:
+        connection.execute(text(statement))
+        connection.execute(text(statement))
+
+
+def test_strict_mode_fails_routes_over_budget(client, doctor, monkeypatch):
+    assert settings.QUERY_BUDGET_STRICT
+    client.get("/api/patients/", headers=doctor)
+
+    monkeypatch.setitem(query_metrics.QUERY_BUDGETS, "GET /api/patients/", 0)
+    with pytest.raises(QueryBudgetExceeded, match="budget is 0"):
+        client.get("/api/patients/", headers=doctor)
+
+
+def test_routes_over_budget_are_only_counted_without_strict_mode(
+    client, doctor, monkeypatch
+):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", False)
+    monkeypatch.setitem(query_metrics.QUERY_BUDGETS, "GET /api/patients/", 0)
+    query_metrics.query_metrics.reset()
+
+    assert client.get("/api/patients/", headers=doctor).status_code == 200
+    routes = query_metrics.query_metrics.snapshot()["routes"]
+    assert routes["GET /api/patients/"]["over_budget_requests"] == 1
+
+
+def test_strict_mode_fails_repeated_statements(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 2)
+    with caplog.at_level(logging.WARNING, logger=query_metrics.__name__):
+        with pytest.raises(QueryBudgetExceeded, match="same statement 2 times"):
+            with count_queries(max_queries=10):
+                run_twice()
+    assert "Possible N+1" in caplog.text
+
+
+def test_repeated_statements_are_logged_without_a_budget(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 2)
+    with caplog.at_level(logging.WARNING, logger=query_metrics.__name__):
+        with count_queries() as queries:
+            run_twice()
+    assert queries.count == 2
+    assert queries.repeated == {"SELECT 1"}
+    assert "Possible N+1" in caplog.text
+
+
+def test_count_queries_enforces_max_queries():
+    with count_queries(max_queries=2) as queries:
+        run_twice()
+    assert queries.count == 2
+
+    with pytest.raises(QueryBudgetExceeded, match="3 statements"):
+        with count_queries(max_queries=2):
+            run_twice("SELECT 2")
+            run_twice("SELECT 3")
+
+
+def test_slow_queries_are_logged(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger=query_metrics.__name__):
+        run_twice()
+    assert "Slow query" in caplog.text
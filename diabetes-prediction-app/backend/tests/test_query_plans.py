@@ -0,0 +1,109 @@
+"""
+EXPLAIN checks for the hot queries
+
+Each test builds the statement the way its endpoint does and asserts that the
+database answers it from the access-pattern index created by the migrations
+(0002_access_pattern_indexes), rather than by scanning and sorting the table.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, text, tuple_
+
+from app.api.endpoints.predictions import PREDICTION_LIST_COLUMNS
+from app.models.patient import Patient as PatientModel
+from app.models.prediction import Prediction as PredictionModel
+from app.models.prediction_stats import PredictionDailyStats
+from app.utils.pagination import encode_cursor, keyset_paginate
+from app.utils.prediction_stats import SCOPE_PATIENT
+
+
+def query_plan(connection, statement) -> str:
+    """The database's plan for ``statement``, one line per plan node"""
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    if connection.dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+        return "\n".join(row.detail for row in rows)
+
+    # Tiny test tables would otherwise always be scanned
+    connection.execute(text("SET LOCAL enable_seqscan = off"))
+    rows = connection.execute(text(f"EXPLAIN {compiled}"))
+    return "\n".join(row[0] for row in rows)
+
+
+def assert_uses_index(plan: str, index_name: str):
+    assert index_name in plan, plan
+    # No separate sort step: the index already returns rows in order
+    assert "TEMP B-TREE" not in plan and "Sort" not in plan, plan
+
+
+@pytest.fixture
+def connection(database):
+    with database.connect() as connection:
+        with connection.begin():
+            yield connection
+
+
+def test_prediction_list_uses_created_at_index(connection):
+    query = keyset_paginate(select(*PREDICTION_LIST_COLUMNS), PredictionModel, None, 50)
+    assert_uses_index(query_plan(connection, query), "ix_predictions_created_at_id")
+
+
+def test_prediction_list_next_page_uses_created_at_index(connection):
+    cursor = encode_cursor(datetime(2026, 1, 1, tzinfo=timezone.utc), 100)
+    query = keyset_paginate(
+        select(*PREDICTION_LIST_COLUMNS), PredictionModel, cursor, 50
+    )
+    assert_uses_index(query_plan(connection, query), "ix_predictions_created_at_id")
+
+
+def test_patient_history_uses_patient_index(connection):
+    query = keyset_paginate(
+        select(*PREDICTION_LIST_COLUMNS).where(PredictionModel.patient_id == 7),
+        PredictionModel,
+        None,
+        50,
+    )
+    assert_uses_index(
+        query_plan(connection, query), "ix_predictions_patient_id_created_at_id"
+    )
+
+
+def test_patient_lookup_by_user_uses_user_index(connection):
+    query = select(PatientModel.id).where(PatientModel.user_id == 3)
+    assert "ix_patients_user_id" in query_plan(connection, query)
+
+
+def test_stats_read_uses_summary_primary_key(connection):
+    query = select(
+        PredictionDailyStats.day,
+        PredictionDailyStats.risk_level,
+        PredictionDailyStats.prediction_count,
+        PredictionDailyStats.probability_sum,
+    ).where(
+        PredictionDailyStats.scope_type == SCOPE_PATIENT,
+        PredictionDailyStats.scope_id == 7,
+    )
+    plan = query_plan(connection, query)
+    if connection.dialect.name == "sqlite":
+        assert "USING INDEX sqlite_autoindex_prediction_daily_stats_1" in plan, plan
+    else:
+        assert "prediction_daily_stats_pkey" in plan, plan
+
+
+def test_incremental_update_delta_uses_watermark_index(connection):
+    key = tuple_(PredictionModel.confirmed_at, PredictionModel.id)
+    bound = tuple_(
+        datetime(2026, 1, 1, tzinfo=timezone.utc),
+        100,
+        types=[c.type for c in key.clauses],
+    )
+    query = (
+        select(PredictionModel.id)
+        .where(PredictionModel.confirmed_diagnosis.isnot(None), key > bound)
+        .order_by(PredictionModel.confirmed_at, PredictionModel.id)
+    )
+    assert_uses_index(query_plan(connection, query), "ix_predictions_confirmed_at_id")
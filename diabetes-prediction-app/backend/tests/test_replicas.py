@@ -0,0 +1,95 @@
+"""
+Read replica routing against two local databases
+
+The test database is the primary; a second migrated SQLite file stands in
+for the replica. Nothing replicates between them, so a row that exists in
+only one of them shows which database served a read.
+"""
+
+import os
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import get_async_database_url, replica_router
+from conftest import TEST_DIR, alembic_config, login, register
+
+REPLICA_URL = f"sqlite:///{os.path.join(TEST_DIR, 'replica.db')}"
+
+
+@pytest.fixture(scope="module")
+def replica_url():
+    command.upgrade(alembic_config(REPLICA_URL), "head")
+    return REPLICA_URL
+
+
+@pytest.fixture
+def replica(replica_url, monkeypatch):
+    """Route read-only handlers to the replica database"""
+    replica_engine = create_async_engine(get_async_database_url(replica_url))
+    monkeypatch.setattr(replica_router, "engines", [replica_engine])
+    monkeypatch.setattr(replica_router, "_down_until", {})
+    monkeypatch.setattr(replica_router, "_pins", {})
+
+    # A patient that exists only on the replica
+    sync_engine = create_engine(replica_url)
+    with sync_engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO patients (patient_code) VALUES ('PAT-REPLICA')")
+        )
+    yield replica_engine
+
+    with sync_engine.begin() as connection:
+        connection.execute(text("DELETE FROM patients"))
+    sync_engine.dispose()
+
+
+def patient_codes(client, headers):
+    response = client.get("/api/patients/", headers=headers)
+    assert response.status_code == 200, response.text
+    return [patient["patient_code"] for patient in response.json()]
+
+
+def test_reads_go_to_the_replica(client, doctor, replica):
+    assert patient_codes(client, doctor) == ["PAT-REPLICA"]
+
+
+def test_writes_go_to_the_primary_and_pin_reads(client, doctor, replica):
+    response = client.post(
+        "/api/patients/", json={"patient_code": "PAT-PRIMARY"}, headers=doctor
+    )
+    assert response.status_code == 201, response.text
+
+    # Read-your-writes: the writer's next reads stay on the primary
+    assert replica_router.is_pinned(doctor["Authorization"])
+    assert patient_codes(client, doctor) == ["PAT-PRIMARY"]
+
+    # Once the window has passed, reads return to the replica
+    replica_router._pins.clear()
+    assert patient_codes(client, doctor) == ["PAT-REPLICA"]
+
+
+def test_unreachable_replica_falls_back_to_the_primary(client, doctor, monkeypatch):
+    missing = os.path.join(TEST_DIR, "missing", "replica.db")
+    down_engine = create_async_engine(f"sqlite+aiosqlite:///{missing}")
+    monkeypatch.setattr(replica_router, "engines", [down_engine])
+    monkeypatch.setattr(replica_router, "_down_until", {})
+    monkeypatch.setattr(replica_router, "_pins", {})
+
+    client.post("/api/patients/", json={"patient_code": "PAT-PRIMARY"}, headers=doctor)
+    replica_router._pins.clear()
+
+    assert patient_codes(client, doctor) == ["PAT-PRIMARY"]
+    assert replica_router.status()[0]["healthy"] is False
+
+
+def test_pins_are_per_client(client, doctor, replica):
+    register(client, "second@example.com")
+    second = login(client, "second@example.com")
+
+    client.post("/api/patients/", json={"patient_code": "PAT-PRIMARY"}, headers=doctor)
+
+    assert patient_codes(client, doctor) == ["PAT-PRIMARY"]
+    assert patient_codes(client, second) == ["PAT-REPLICA"]
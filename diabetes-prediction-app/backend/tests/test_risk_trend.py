@@ -0,0 +1,122 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import SAMPLE_INPUT
+from test_prediction_archive import ARCHIVED_AT, archive_predictions
+
+from app.utils.risk_trend import bucket_series
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def hours(count):
+    return [START + timedelta(hours=hour) for hour in range(count)]
+
+
+def test_buckets_stay_within_points():
+    timestamps = hours(1000)
+    buckets = bucket_series(timestamps, {"risk": list(range(1000))}, points=24)
+    assert len(buckets) == 24
+    assert sum(bucket["count"] for bucket in buckets) == 1000
+    assert buckets[0]["start"] == START
+    assert buckets[-1]["end"] == timestamps[-1]
+    assert [bucket["start"] for bucket in buckets] == sorted(
+        bucket["start"] for bucket in buckets
+    )
+
+
+def test_min_and_max_keep_spikes():
+    values = [10.0] * 100
+    values[37] = 95.0
+    buckets = bucket_series(hours(100), {"risk": values}, points=4)
+    spiked = [bucket for bucket in buckets if bucket["risk"]["max"] == 95.0]
+    assert len(spiked) == 1
+    assert spiked[0]["risk"]["min"] == 10.0
+    assert spiked[0]["risk"]["mean"] < 15.0
+
+
+def test_empty_buckets_are_dropped():
+    timestamps = [START, START + timedelta(hours=1), START + timedelta(days=9)]
+    buckets = bucket_series(timestamps, {"risk": [1.0, 3.0, 5.0]}, points=10)
+    assert [bucket["count"] for bucket in buckets] == [2, 1]
+    assert buckets[0]["risk"] == {"mean": 2.0, "min": 1.0, "max": 3.0}
+
+
+def test_missing_values_are_skipped():
+    buckets = bucket_series(
+        hours(4),
+        {"risk": [1.0, None, math.nan, 3.0], "hba1c": [None, None, None, None]},
+        points=1,
+    )
+    assert buckets[0]["count"] == 4
+    assert buckets[0]["risk"] == {"mean": 2.0, "min": 1.0, "max": 3.0}
+    assert buckets[0]["hba1c"] is None
+
+
+def test_single_timestamp():
+    buckets = bucket_series([START, START], {"risk": [1.0, 2.0]}, points=50)
+    assert len(buckets) == 1
+    assert buckets[0]["count"] == 2
+    assert buckets[0]["start"] == START
+    assert buckets[0]["end"] > START
+
+
+def test_no_observations():
+    assert bucket_series([], {"risk": []}, points=10) == []
+
+
+def test_naive_timestamps_are_utc():
+    naive = [t.replace(tzinfo=None) for t in hours(2)]
+    assert bucket_series(naive, {"risk": [1.0, 2.0]}, points=1)[0]["start"] == START
+
+
+def test_risk_trend_endpoint_includes_archived_predictions(client, doctor):
+    response = client.post(
+        "/api/patients/", headers=doctor, json={"patient_code": "P-0001"}
+    )
+    patient_id = response.json()["id"]
+    doctor_id = client.get("/api/auth/me", headers=doctor).json()["id"]
+    archive_predictions(patient_id, doctor_id)
+    for hba1c in (6.0, 7.0):
+        response = client.post(
+            "/api/predictions/",
+            headers=doctor,
+            json=dict(SAMPLE_INPUT, patient_id=patient_id, hba1c=hba1c),
+        )
+        assert response.status_code == 201, response.text
+
+    url = f"/api/patients/{patient_id}/risk-trend"
+    body = client.get(url, params={"points": 5}, headers=doctor).json()
+    assert body["total"] == 4
+    assert 2 <= len(body["buckets"]) <= 5
+    assert body["buckets"][0]["start"].startswith("2023-01-10")
+    assert body["buckets"][-1]["hba1c"]["max"] == 7.0
+
+    # Only the archived month
+    body = client.get(
+        url,
+        params={"from": "2023-01-01T00:00:00Z", "to": "2023-02-01T00:00:00Z"},
+        headers=doctor,
+    ).json()
+    assert body["total"] == len(ARCHIVED_AT)
+
+    response = client.get(
+        url,
+        params={"from": "2023-02-01T00:00:00Z", "to": "2023-01-01T00:00:00Z"},
+        headers=doctor,
+    )
+    assert response.status_code == 400
+    assert (
+        client.get("/api/patients/999999/risk-trend", headers=doctor).status_code == 404
+    )
+
+
+@pytest.mark.parametrize("points", [0, 10**6])
+def test_risk_trend_points_are_bounded(client, doctor, points):
+    response = client.post(
+        "/api/patients/", headers=doctor, json={"patient_code": "P-0001"}
+    )
+    url = f"/api/patients/{response.json()['id']}/risk-trend"
+    assert client.get(url, params={"points": points}, headers=doctor).status_code == 422
@@ -0,0 +1,92 @@
+"""
+Columnar on-disk cache for the training dataset
+
+The first read of a CSV converts it into a typed Feather file (string columns
+stored as dictionary-encoded categoricals) keyed by the hash of the source
+file. Later reads memory-map the Feather file and load only the requested
+columns instead of re-parsing the CSV.
+"""
+
+import hashlib
+import os
+import time
+from typing import List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+
+def _file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash the source file contents so the cache is invalidated on change"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cache_path_for(csv_path: str, cache_dir: Optional[str] = None) -> str:
+    """Return the Feather cache path for a CSV file"""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(csv_path), ".cache")
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}-{_file_hash(csv_path)}.feather")
+
+
+def load_dataset(
+    csv_path: str,
+    columns: Optional[List[str]] = None,
+    cache_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Load a CSV dataset through the columnar cache
+
+    Args:
+        csv_path: Path to the source CSV file
+        columns: Columns to load (all columns when None)
+        cache_dir: Cache directory (defaults to ``.cache`` next to the CSV)
+
+    Returns:
+        DataFrame with string columns as categoricals
+    """
+    start = time.perf_counter()
+
+    if feather is None:
+        df = pd.read_csv(csv_path, usecols=columns)
+        print(
+            f"pyarrow not installed, read {csv_path} without cache "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return df
+
+    cache_path = cache_path_for(csv_path, cache_dir)
+
+    if os.path.exists(cache_path):
+        table = feather.read_table(cache_path, columns=columns, memory_map=True)
+        df = table.to_pandas()
+        print(
+            f"Loaded {len(df.columns)} columns from cache {cache_path} "
+            f"in {time.perf_counter() - start:.2f}s (warm)"
+        )
+        return df
+
+    df = pd.read_csv(csv_path)
+    df = df.astype({col: "category" for col in df.select_dtypes("object").columns})
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    # Uncompressed so later reads can memory-map the columns directly
+    feather.write_feather(df, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, cache_path)
+
+    if columns is not None:
+        df = df[columns]
+
+    print(
+        f"Parsed {csv_path} and wrote cache {cache_path} "
+        f"in {time.perf_counter() - start:.2f}s (cold)"
+    )
+    return df
@@ -0,0 +1,242 @@
+"""
+Headless EDA report for the training script
+
+Figures are described by small pre-aggregated payloads (histogram counts and
+the box plot statistics derived from them, ROC points, ...) computed once in
+the parent process, then rendered to PNG in parallel worker processes on the
+non-interactive Agg backend. The images are embedded in a single static HTML
+file.
+"""
+
+import base64
+import html
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+HISTOGRAM_BINS = 30
+# Each histogram bar is pre-aggregated from this many finer bins; box plot
+# statistics are read off the fine counts (quantile error below 1/480 of the
+# column's range) instead of sorting the raw values
+BIN_SUBDIVISIONS = 16
+MAX_ROC_POINTS = 500
+
+
+def _fine_histogram(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Counts and edges over HISTOGRAM_BINS * BIN_SUBDIVISIONS equal bins"""
+    return np.histogram(values, bins=HISTOGRAM_BINS * BIN_SUBDIVISIONS)
+
+
+def _coarse_histogram(
+    counts: np.ndarray, edges: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge fine bins into the HISTOGRAM_BINS bars that are drawn"""
+    return (
+        counts.reshape(HISTOGRAM_BINS, BIN_SUBDIVISIONS).sum(axis=1),
+        edges[::BIN_SUBDIVISIONS],
+    )
+
+
+def _box_stats(counts: np.ndarray, edges: np.ndarray, label: str) -> Dict[str, Any]:
+    """
+    Box plot statistics in the format expected by ``Axes.bxp``
+
+    Quartiles interpolate linearly within the bin holding them. Whiskers end
+    at the outermost occupied bins inside 1.5 IQR, and each occupied bin
+    beyond them is drawn as one flier at its centre.
+    """
+    cumulative = np.concatenate([[0], np.cumsum(counts)])
+    total = cumulative[-1]
+
+    def quantile(q: float) -> float:
+        rank = q * total
+        i = min(np.searchsorted(cumulative, rank, side="right") - 1, len(counts) - 1)
+        fraction = (rank - cumulative[i]) / counts[i] if counts[i] else 0.0
+        return edges[i] + fraction * (edges[i + 1] - edges[i])
+
+    q1, med, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    low_limit, high_limit = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    occupied = counts > 0
+    left, right = edges[:-1], edges[1:]
+    inside = occupied & (right >= low_limit) & (left <= high_limit)
+    outside = occupied & ~inside
+    return {
+        "label": label,
+        "q1": q1,
+        "med": med,
+        "q3": q3,
+        "whislo": max(left[inside].min(), low_limit) if inside.any() else q1,
+        "whishi": min(right[inside].max(), high_limit) if inside.any() else q3,
+        "fliers": ((left + right) / 2)[outside],
+    }
+
+
+def _render_figure(task: Tuple[str, str, Dict[str, Any]]) -> Tuple[str, str]:
+    """Render one figure payload to a base64-encoded PNG (runs in a worker)"""
+    # A bare Figure renders through Agg without touching pyplot or a GUI backend
+    from matplotlib.figure import Figure
+
+    kind, title, payload = task
+    fig = Figure(figsize=(4.5, 3), dpi=80)
+    fig.subplots_adjust(left=0.12, right=0.96, bottom=0.15, top=0.88)
+    ax = fig.add_subplot()
+
+    if kind == "box":
+        ax.bxp([payload["stats"]], vert=False, showfliers=True)
+        ax.set_yticklabels([])
+    elif kind == "hist":
+        ax.stairs(payload["counts"], payload["edges"], fill=True)
+    elif kind == "confusion_matrix":
+        cm = payload["matrix"]
+        ax.imshow(cm, cmap="Blues")
+        for (i, j), value in np.ndenumerate(cm):
+            ax.text(j, i, str(value), ha="center", va="center")
+        ax.set_xticks(range(cm.shape[1]))
+        ax.set_yticks(range(cm.shape[0]))
+        ax.set_xlabel("Predicted")
+        ax.set_ylabel("Actual")
+    elif kind == "roc":
+        ax.plot([0, 1], [0, 1], "k--")
+        ax.plot(payload["fpr"], payload["tpr"])
+        ax.set_xlabel("False Positive Rate")
+        ax.set_ylabel("True Positive Rate")
+    elif kind == "coefficients":
+        fig.set_size_inches(6, 4.5)
+        fig.subplots_adjust(left=0.35)
+        positions = range(len(payload["features"]))
+        ax.barh(positions, payload["coefficients"])
+        ax.set_yticks(positions, labels=payload["features"], fontsize=7)
+        ax.set_xlabel("Coefficient")
+        ax.grid(alpha=0.3)
+
+    ax.set_title(title, fontsize=9)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return title, base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+class EDAReport:
+    """Collects figure payloads and renders them into one HTML report"""
+
+    def __init__(self, title: str = "Diabetes Dataset EDA Report"):
+        self.title = title
+        self.sections: List[Tuple[str, List[Tuple[str, str, Dict[str, Any]]]]] = []
+
+    def add_box_plots(self, section: str, data: pd.DataFrame):
+        """Add one box plot per numeric column"""
+        tasks = []
+        for col in data.select_dtypes("number").columns:
+            counts, edges = _fine_histogram(data[col].dropna().to_numpy(dtype=float))
+            tasks.append(("box", col, {"stats": _box_stats(counts, edges, col)}))
+        self.sections.append((section, tasks))
+
+    def add_histograms(self, section: str, data: pd.DataFrame):
+        """Add one histogram per numeric column"""
+        tasks = []
+        for col in data.select_dtypes("number").columns:
+            fine = _fine_histogram(data[col].dropna().to_numpy(dtype=float))
+            counts, edges = _coarse_histogram(*fine)
+            tasks.append(("hist", col, {"counts": counts, "edges": edges}))
+        self.sections.append((section, tasks))
+
+    def add_confusion_matrix(self, matrix: np.ndarray):
+        self.sections.append(
+            (
+                "Confusion Matrix",
+                [("confusion_matrix", "Confusion Matrix", {"matrix": matrix})],
+            )
+        )
+
+    def add_roc_curve(self, fpr: np.ndarray, tpr: np.ndarray, auc: float):
+        # Thin the curve to a bounded number of points
+        if len(fpr) > MAX_ROC_POINTS:
+            idx = np.linspace(0, len(fpr) - 1, MAX_ROC_POINTS).astype(int)
+            fpr, tpr = fpr[idx], tpr[idx]
+        self.sections.append(
+            (
+                "ROC Curve",
+                [("roc", f"ROC Curve (AUC = {auc:.3f})", {"fpr": fpr, "tpr": tpr})],
+            )
+        )
+
+    def add_coefficients(self, features: Sequence[str], coefficients: Sequence[float]):
+        self.sections.append(
+            (
+                "Feature Importance",
+                [
+                    (
+                        "coefficients",
+                        "Feature Importance",
+                        {
+                            "features": list(features),
+                            "coefficients": list(coefficients),
+                        },
+                    )
+                ],
+            )
+        )
+
+    def render(self, path: str, workers: Optional[int] = None) -> str:
+        """
+        Render all figures and write the HTML report
+
+        Args:
+            path: Output HTML file path
+            workers: Number of worker processes (defaults to CPU count)
+
+        Returns:
+            The path of the written report
+        """
+        start = time.perf_counter()
+        tasks = [task for _, section_tasks in self.sections for task in section_tasks]
+
+        # Fork keeps workers from re-running the calling script; platforms
+        # without fork render in-process instead
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                images = list(pool.map(_render_figure, tasks, chunksize=4))
+        else:
+            images = [_render_figure(task) for task in tasks]
+
+        parts = [
+            "<!DOCTYPE html>",
+            "<html><head><meta charset='utf-8'>",
+            f"<title>{html.escape(self.title)}</title>",
+            "<style>body{font-family:sans-serif;margin:2em}"
+            ".grid{display:flex;flex-wrap:wrap;gap:8px}"
+            "img{border:1px solid #ddd}</style>",
+            f"</head><body><h1>{html.escape(self.title)}</h1>",
+        ]
+        image_iter = iter(images)
+        for section, section_tasks in self.sections:
+            parts.append(f"<h2>{html.escape(section)}</h2><div class='grid'>")
+            for _ in section_tasks:
+                title, encoded = next(image_iter)
+                parts.append(
+                    f"<img alt='{html.escape(title)}' "
+                    f"src='data:image/png;base64,{encoded}'>"
+                )
+            parts.append("</div>")
+        parts.append("</body></html>")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(parts))
+
+        print(
+            f"EDA report with {len(tasks)} figures written to {path} "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return path
@@ -14,12 +14,21 @@ interface Prediction {
     created_at: string;
 }
 
+interface PredictionStats {
+    total: number;
+    risk_counts: Record<string, number>;
+    mean_probability: number | null;
+}
+
 export default function HistoryPage() {
     const [predictions, setPredictions] = useState<Prediction[]>([]);
+    const [stats, setStats] = useState<PredictionStats | null>(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
     const [downloading, setDownloading] = useState<number | null>(null);
     const [userRole, setUserRole] = useState<string>('');
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         fetchUserAndHistory();
@@ -33,8 +42,13 @@ export default function HistoryPage() {
             setUserRole(userResponse.data.role);
 
             // Then fetch predictions
-            const response = await predictionsAPI.list();
-            setPredictions(response.data);
+            const [page, statsResponse] = await Promise.all([
+                predictionsAPI.list(),
+                predictionsAPI.stats(),
+            ]);
+            setPredictions(page.data);
+            setNextCursor(page.nextCursor);
+            setStats(statsResponse.data);
             setError('');
         } catch (err: any) {
             setError(err.response?.data?.detail || 'Failed to load history');
@@ -43,11 +57,30 @@ export default function HistoryPage() {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        try {
+            setLoadingMore(true);
+            const page = await predictionsAPI.list(nextCursor);
+            setPredictions((current) => [...current, ...page.data]);
+            setNextCursor(page.nextCursor);
+        } catch (err: any) {
+            setError(err.response?.data?.detail || 'Failed to load more predictions');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const fetchHistory = async () => {
         try {
             setLoading(true);
-            const response = await predictionsAPI.list();
-            setPredictions(response.data);
+            const [page, statsResponse] = await Promise.all([
+                predictionsAPI.list(),
+                predictionsAPI.stats(),
+            ]);
+            setPredictions(page.data);
+            setNextCursor(page.nextCursor);
+            setStats(statsResponse.data);
             setError('');
         } catch (err: any) {
             setError(err.response?.data?.detail || 'Failed to load history');
@@ -197,7 +230,19 @@ export default function HistoryPage() {
                     </tbody>
                 </table>
 
-                {predictions.length > 0 && (
+                {nextCursor && (
+                    <div style={{ marginTop: '1rem', textAlign: 'center' }}>
+                        <button
+                            className="btn btn-secondary"
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                        >
+                            {loadingMore ? '⏳ Loading...' : 'Load more'}
+                        </button>
+                    </div>
+                )}
+
+                {stats && stats.total > 0 && (
                     <div style={{
                         marginTop: '1.5rem',
                         padding: '1rem',
@@ -208,7 +253,7 @@ export default function HistoryPage() {
                         alignItems: 'center'
                     }}>
                         <div>
-                            <strong>Total Predictions:</strong> {predictions.length}
+                            <strong>Total Predictions:</strong> {stats.total}
                         </div>
                         <div style={{ display: 'flex', gap: '1rem', fontSize: '0.9rem' }}>
                             <div>
@@ -220,7 +265,7 @@ export default function HistoryPage() {
                                     borderRadius: '50%',
                                     marginRight: '0.5rem'
                                 }}></span>
-                                Low Risk: {predictions.filter(p => p.risk_level.toLowerCase() === 'low').length}
+                                Low Risk: {stats.risk_counts.Low ?? 0}
                             </div>
                             <div>
                                 <span style={{
@@ -231,7 +276,7 @@ export default function HistoryPage() {
                                     borderRadius: '50%',
                                     marginRight: '0.5rem'
                                 }}></span>
-                                Medium Risk: {predictions.filter(p => p.risk_level.toLowerCase() === 'medium').length}
+                                Medium Risk: {stats.risk_counts.Medium ?? 0}
                             </div>
                             <div>
                                 <span style={{
@@ -242,7 +287,7 @@ export default function HistoryPage() {
                                     borderRadius: '50%',
                                     marginRight: '0.5rem'
                                 }}></span>
-                                High Risk: {predictions.filter(p => p.risk_level.toLowerCase() === 'high').length}
+                                High Risk: {stats.risk_counts.High ?? 0}
                             </div>
                         </div>
                     </div>
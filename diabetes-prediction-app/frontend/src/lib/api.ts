@@ -21,6 +21,32 @@ api.interceptors.request.use((config) => {
     return config;
 });
 
+// List endpoints return one page, newest first; the token of the next page
+// comes back in the X-Next-Cursor header (absent on the last page)
+const MAX_PAGE_SIZE = 200;
+
+export interface Page<T = any> {
+    data: T[];
+    nextCursor: string | null;
+}
+
+const getPage = async (url: string, cursor?: string | null, limit?: number): Promise<Page> => {
+    const response = await api.get(url, { params: { cursor: cursor || undefined, limit } });
+    return { data: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
+};
+
+// Follow the cursor to the last page
+const getAllPages = async (url: string): Promise<{ data: any[] }> => {
+    const data: any[] = [];
+    let cursor: string | null = null;
+    do {
+        const page = await getPage(url, cursor, MAX_PAGE_SIZE);
+        data.push(...page.data);
+        cursor = page.nextCursor;
+    } while (cursor);
+    return { data };
+};
+
 // Auth API
 export const authAPI = {
     register: (data: any) => api.post('/auth/register', data),
@@ -31,7 +57,7 @@ export const authAPI = {
 
 // Patients API
 export const patientsAPI = {
-    list: () => api.get('/patients/'),
+    list: () => getAllPages('/patients/'),
     create: (data: any) => api.post('/patients/', data),
     get: (id: number) => api.get(`/patients/${id}/`),
     update: (id: number, data: any) => api.put(`/patients/${id}/`, data),
@@ -41,9 +67,11 @@ export const patientsAPI = {
 // Predictions API
 export const predictionsAPI = {
     create: (data: any) => api.post('/predictions/', data),
-    list: () => api.get('/predictions/'),
+    list: (cursor?: string | null) => getPage('/predictions/', cursor),
+    stats: (params?: { doctor_id?: number; patient_id?: number; days?: number }) =>
+        api.get('/predictions/stats', { params }),
     get: (id: number) => api.get(`/predictions/${id}/`),
-    getByPatient: (patientId: number) => api.get(`/predictions/patient/${patientId}/`),
+    getByPatient: (patientId: number) => getAllPages(`/predictions/patient/${patientId}/`),
     downloadReport: (id: number) => api.get(`/predictions/${id}/report`, { responseType: 'blob' }),
 };
 
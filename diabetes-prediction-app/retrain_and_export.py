@@ -2,70 +2,135 @@
 Script to retrain the model and export all artifacts with correct feature count
 """
 
-import pandas as pd
+import os
+import sys
 import numpy as np
 from sklearn.preprocessing import OneHotEncoder, RobustScaler, PolynomialFeatures
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 import joblib
 import warnings
+from dataset_cache import load_dataset
+from stage_profiler import StageProfiler
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from app.ml.preprocessor import clip_outliers, compute_clip_bounds
 
 warnings.filterwarnings("ignore")
 
+profiler = StageProfiler()
+
+# Raw input fields (same order as the CSV and the API schema) plus the target;
+# other columns such as diabetes_stage are dropped once duplicates are removed
+input_columns = [
+    "age",
+    "gender",
+    "ethnicity",
+    "education_level",
+    "income_level",
+    "employment_status",
+    "smoking_status",
+    "alcohol_consumption_per_week",
+    "physical_activity_minutes_per_week",
+    "diet_score",
+    "sleep_hours_per_day",
+    "screen_time_hours_per_day",
+    "family_history_diabetes",
+    "hypertension_history",
+    "cardiovascular_history",
+    "bmi",
+    "waist_to_hip_ratio",
+    "systolic_bp",
+    "diastolic_bp",
+    "heart_rate",
+    "cholesterol_total",
+    "hdl_cholesterol",
+    "ldl_cholesterol",
+    "triglycerides",
+    "glucose_fasting",
+    "glucose_postprandial",
+    "insulin_level",
+    "hba1c",
+    "diabetes_risk_score",
+]
+target_column = "diagnosed_diabetes"
+
 # Load dataset
 print("Loading dataset...")
-diabetes_dataset = pd.read_csv("data/diabetes_dataset.csv")
-diabetes_dataset.drop_duplicates(inplace=True)
+with profiler.stage("load") as stage:
+    diabetes_dataset = load_dataset("data/diabetes_dataset.csv")
+    stage.set_output(diabetes_dataset)
+
+# Duplicates are whole rows, as in model.py: rows that differ only in an
+# unused column are kept, then the unused columns are dropped
+with profiler.stage("drop_duplicates", diabetes_dataset) as stage:
+    diabetes_dataset.drop_duplicates(inplace=True)
+    diabetes_dataset = diabetes_dataset[input_columns + [target_column]]
+    stage.set_output(diabetes_dataset)
 
 # Handle outliers
-numerical_data = diabetes_dataset.select_dtypes("number")
-for col in numerical_data.columns:
-    lower_bound = diabetes_dataset[col].quantile(0.01)
-    upper_bound = diabetes_dataset[col].quantile(0.99)
-    diabetes_dataset[col] = np.clip(diabetes_dataset[col], lower_bound, upper_bound)
+# Bounds and clipping come from the serving preprocessor; the bounds are
+# exported so live inputs are clipped the same way.
+with profiler.stage("clip_outliers", diabetes_dataset) as stage:
+    clip_cols = (
+        diabetes_dataset.select_dtypes("number").drop(columns=[target_column]).columns
+    )
+    clip_bounds = compute_clip_bounds(diabetes_dataset, clip_cols)
+    diabetes_dataset = clip_outliers(diabetes_dataset, clip_bounds)
+    stage.set_output(diabetes_dataset)
 
 print("Performing feature engineering...")
 
-# Feature Engineering
-diabetes_dataset["hba1c_glucose_interaction"] = (
-    diabetes_dataset["hba1c"] * diabetes_dataset["glucose_postprandial"]
-)
-diabetes_dataset["age_bmi"] = diabetes_dataset["age"] * diabetes_dataset["bmi"]
-diabetes_dataset["insulin_resistance_proxy"] = (
-    diabetes_dataset["glucose_fasting"] * diabetes_dataset["insulin_level"] / 405
-)
-diabetes_dataset["bmi_glucose"] = (
-    diabetes_dataset["bmi"] * diabetes_dataset["glucose_fasting"]
-)
-
-# Log transformations
-skewed = [
-    "insulin_level",
-    "triglycerides",
-    "ldl_cholesterol",
-    "glucose_postprandial",
-    "hba1c",
-]
-for col in skewed:
-    diabetes_dataset[col + "_log"] = np.log1p(diabetes_dataset[col])
-
-# Onehot encoding
-onehot_encoding_columns = ["gender", "ethnicity", "employment_status"]
-onehot_encoding = OneHotEncoder(sparse_output=False)
-encoded_data = onehot_encoding.fit_transform(diabetes_dataset[onehot_encoding_columns])
-encoded_col = onehot_encoding.get_feature_names_out(onehot_encoding_columns)
-diabetes_dataset[encoded_col] = encoded_data
-
-# Ordinal encoding
-diabetes_dataset["education_level_encoded"] = diabetes_dataset["education_level"].map(
-    {"No formal": 0, "Highschool": 1, "Graduate": 2, "Postgraduate": 3}
-)
-diabetes_dataset["income_level_encoded"] = diabetes_dataset["income_level"].map(
-    {"Low": 0, "Lower-Middle": 1, "Middle": 2, "Upper-Middle": 3, "High": 4}
-)
-diabetes_dataset["smoking_status_encoded"] = diabetes_dataset["smoking_status"].map(
-    {"Never": 0, "Former": 1, "Current": 2}
-)
+with profiler.stage("feature_engineering", diabetes_dataset) as stage:
+    # Feature Engineering
+    diabetes_dataset["hba1c_glucose_interaction"] = (
+        diabetes_dataset["hba1c"] * diabetes_dataset["glucose_postprandial"]
+    )
+    diabetes_dataset["age_bmi"] = diabetes_dataset["age"] * diabetes_dataset["bmi"]
+    diabetes_dataset["insulin_resistance_proxy"] = (
+        diabetes_dataset["glucose_fasting"] * diabetes_dataset["insulin_level"] / 405
+    )
+    diabetes_dataset["bmi_glucose"] = (
+        diabetes_dataset["bmi"] * diabetes_dataset["glucose_fasting"]
+    )
+
+    # Log transformations
+    skewed = [
+        "insulin_level",
+        "triglycerides",
+        "ldl_cholesterol",
+        "glucose_postprandial",
+        "hba1c",
+    ]
+    for col in skewed:
+        diabetes_dataset[col + "_log"] = np.log1p(diabetes_dataset[col])
+
+    # Onehot encoding
+    onehot_encoding_columns = ["gender", "ethnicity", "employment_status"]
+    onehot_encoding = OneHotEncoder(sparse_output=False)
+    encoded_data = onehot_encoding.fit_transform(
+        diabetes_dataset[onehot_encoding_columns]
+    )
+    encoded_col = onehot_encoding.get_feature_names_out(onehot_encoding_columns)
+    diabetes_dataset[encoded_col] = encoded_data
+
+    # Ordinal encoding
+    diabetes_dataset["education_level_encoded"] = (
+        diabetes_dataset["education_level"]
+        .map({"No formal": 0, "Highschool": 1, "Graduate": 2, "Postgraduate": 3})
+        .astype(int)
+    )
+    diabetes_dataset["income_level_encoded"] = (
+        diabetes_dataset["income_level"]
+        .map({"Low": 0, "Lower-Middle": 1, "Middle": 2, "Upper-Middle": 3, "High": 4})
+        .astype(int)
+    )
+    diabetes_dataset["smoking_status_encoded"] = (
+        diabetes_dataset["smoking_status"]
+        .map({"Never": 0, "Former": 1, "Current": 2})
+        .astype(int)
+    )
+    stage.set_output(diabetes_dataset)
 
 # Polynomial features
 important_cols = [
@@ -81,30 +146,36 @@ important_cols = [
     "insulin_resistance_proxy",
 ]
 
-poly = PolynomialFeatures(degree=2, include_bias=False, interaction_only=True)
-poly_features = poly.fit_transform(diabetes_dataset[important_cols])
-poly_col_names = poly.get_feature_names_out(important_cols)
-diabetes_dataset[poly_col_names] = poly_features
+with profiler.stage("polynomial_features", diabetes_dataset[important_cols]) as stage:
+    poly = PolynomialFeatures(degree=2, include_bias=False, interaction_only=True)
+    poly_features = poly.fit_transform(diabetes_dataset[important_cols])
+    poly_col_names = poly.get_feature_names_out(important_cols)
+    diabetes_dataset[poly_col_names] = poly_features
+    stage.set_output(poly_features)
 
 # Prepare X and y
-drop_cols = diabetes_dataset.select_dtypes("object").columns.tolist()
-drop_cols.extend(["diagnosed_diabetes", "diabetes_risk_score"])
+drop_cols = diabetes_dataset.select_dtypes(["object", "category"]).columns.tolist()
+drop_cols.extend([target_column, "diabetes_risk_score"])
 
 X = diabetes_dataset.drop(drop_cols, axis=1)
-y = diabetes_dataset["diagnosed_diabetes"]
+y = diabetes_dataset[target_column]
 
 print(f"Total features in X: {len(X.columns)}")
 print(f"Feature list: {X.columns.tolist()[:10]}...")
 
 # Train/test split
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
+with profiler.stage("train_test_split", X) as stage:
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    stage.set_output(X_train)
 
 # Scaling
-robust_scaler = RobustScaler()
-X_train_scaled = robust_scaler.fit_transform(X_train)
-X_test_scaled = robust_scaler.transform(X_test)
+with profiler.stage("scaling", X_train) as stage:
+    robust_scaler = RobustScaler()
+    X_train_scaled = robust_scaler.fit_transform(X_train)
+    X_test_scaled = robust_scaler.transform(X_test)
+    stage.set_output(X_train_scaled)
 
 # Train model with best parameters from original training
 print("Training model...")
@@ -117,33 +188,50 @@ best_model_LoR = LogisticRegression(
     solver="newton-cholesky",
     penalty="l2",
 )
-best_model_LoR.fit(X_train_scaled, y_train)
+with profiler.stage("fit", X_train_scaled):
+    best_model_LoR.fit(X_train_scaled, y_train)
 
 # Evaluate
-train_score = best_model_LoR.score(X_train_scaled, y_train)
-test_score = best_model_LoR.score(X_test_scaled, y_test)
+with profiler.stage("evaluate", X_test_scaled):
+    train_score = best_model_LoR.score(X_train_scaled, y_train)
+    test_score = best_model_LoR.score(X_test_scaled, y_test)
 print(f"Training Score: {train_score}")
 print(f"Testing Score: {test_score}")
 
 # Save everything
 print("Saving model artifacts...")
-joblib.dump(
-    best_model_LoR,
-    "diabetes-prediction-app/backend/ml_models/logistic_regression_diabetes_model.pkl",
-)
-joblib.dump(
-    robust_scaler, "diabetes-prediction-app/backend/ml_models/robust_scaler.pkl"
-)
-joblib.dump(
-    X.columns.tolist(), "diabetes-prediction-app/backend/ml_models/feature_columns.pkl"
-)
-joblib.dump(
-    onehot_encoding, "diabetes-prediction-app/backend/ml_models/onehot_encoder.pkl"
+with profiler.stage("export"):
+    joblib.dump(
+        best_model_LoR,
+        "diabetes-prediction-app/backend/ml_models/logistic_regression_diabetes_model.pkl",
+    )
+    joblib.dump(
+        robust_scaler, "diabetes-prediction-app/backend/ml_models/robust_scaler.pkl"
+    )
+    joblib.dump(
+        X.columns.tolist(),
+        "diabetes-prediction-app/backend/ml_models/feature_columns.pkl",
+    )
+    joblib.dump(
+        onehot_encoding, "diabetes-prediction-app/backend/ml_models/onehot_encoder.pkl"
+    )
+    # IMPORTANT: Save the fitted poly object!
+    joblib.dump(poly, "diabetes-prediction-app/backend/ml_models/poly.pkl")
+    # Outlier clip bounds applied to raw inputs at serving time
+    joblib.dump(
+        clip_bounds, "diabetes-prediction-app/backend/ml_models/clip_bounds.pkl"
+    )
+
+# Training cost profile for this model version
+print(f"\n{profiler.report()}")
+profiler.save(
+    "diabetes-prediction-app/backend/ml_models/training_profile.json",
+    feature_count=len(X.columns),
+    train_score=train_score,
+    test_score=test_score,
 )
-# IMPORTANT: Save the fitted poly object!
-joblib.dump(poly, "diabetes-prediction-app/backend/ml_models/poly.pkl")
 
-print(f"\n✅ Model saved successfully!")
+print("\n✅ Model saved successfully!")
 print(f"Feature count: {len(X.columns)}")
 print(f"Model expects: {best_model_LoR.n_features_in_} features")
 print("All artifacts saved to diabetes-prediction-app/backend/ml_models/")
@@ -0,0 +1,124 @@
+"""
+Lightweight stage timer and memory tracker for the training pipeline
+
+Each stage records wall time, CPU time, peak RSS and the shape of its input
+and output data. The collected stages are printed as a table and saved as a
+JSON artifact next to the exported models.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the process in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def _shape(data: Any) -> Optional[List[int]]:
+    """Return [rows, cols] for DataFrames/arrays, None otherwise"""
+    shape = getattr(data, "shape", None)
+    if shape is None:
+        return None
+    if len(shape) == 1:
+        return [int(shape[0]), 1]
+    return [int(shape[0]), int(shape[1])]
+
+
+class Stage:
+    """Measurements for a single pipeline stage"""
+
+    def __init__(self, name: str, data_in: Any = None):
+        self.name = name
+        self.shape_in = _shape(data_in)
+        self.shape_out = None
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_rss_mb = None
+
+    def set_output(self, data: Any):
+        """Record the shape of the data produced by this stage"""
+        self.shape_out = _shape(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "wall_time_s": round(self.wall_time, 4),
+            "cpu_time_s": round(self.cpu_time, 4),
+            "peak_rss_mb": self.peak_rss_mb,
+            "shape_in": self.shape_in,
+            "shape_out": self.shape_out,
+        }
+
+
+class StageProfiler:
+    """Collects per-stage timings for one pipeline run"""
+
+    def __init__(self):
+        self.stages: List[Stage] = []
+        self.started_at = datetime.now(timezone.utc)
+
+    @contextmanager
+    def stage(self, name: str, data_in: Any = None):
+        """Time the enclosed block as a named stage"""
+        record = Stage(name, data_in)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - wall_start
+            record.cpu_time = time.process_time() - cpu_start
+            record.peak_rss_mb = _peak_rss_mb()
+            self.stages.append(record)
+
+    def report(self) -> str:
+        """Format the collected stages as a text table"""
+
+        def fmt_shape(shape):
+            return "-" if shape is None else f"{shape[0]}x{shape[1]}"
+
+        header = (
+            f"{'Stage':<24}{'Wall (s)':>10}{'CPU (s)':>10}"
+            f"{'Peak RSS (MB)':>15}{'In':>14}{'Out':>14}"
+        )
+        lines = [header, "-" * len(header)]
+        for s in self.stages:
+            rss = "-" if s.peak_rss_mb is None else f"{s.peak_rss_mb:.1f}"
+            lines.append(
+                f"{s.name:<24}{s.wall_time:>10.3f}{s.cpu_time:>10.3f}"
+                f"{rss:>15}{fmt_shape(s.shape_in):>14}{fmt_shape(s.shape_out):>14}"
+            )
+        lines.append("-" * len(header))
+        lines.append(
+            f"{'Total':<24}{sum(s.wall_time for s in self.stages):>10.3f}"
+            f"{sum(s.cpu_time for s in self.stages):>10.3f}"
+        )
+        return "\n".join(lines)
+
+    def save(self, path: str, **metadata):
+        """Write the profile as a JSON artifact"""
+        profile = {
+            "started_at": self.started_at.isoformat(),
+            "python_version": sys.version.split()[0],
+            "total_wall_time_s": round(sum(s.wall_time for s in self.stages), 4),
+            "total_cpu_time_s": round(sum(s.cpu_time for s in self.stages), 4),
+            **metadata,
+            "stages": [s.to_dict() for s in self.stages],
+        }
+        with open(path, "w") as f:
+            json.dump(profile, f, indent=2)
@@ -1,14 +1,33 @@
+import sys
 import pandas as pd
 import numpy as np
+import matplotlib
+
+# Headless mode: render all figures into a static HTML report instead of
+# opening interactive windows (python model.py --report). The report fits the
+# tuned model below directly, skipping the hyperparameter search, and saves
+# no artifacts.
+EDA_REPORT = "--report" in sys.argv
+if EDA_REPORT:
+    matplotlib.use("Agg")
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.preprocessing import OneHotEncoder
 
+sys.path.append("diabetes-prediction-app")
+sys.path.append("diabetes-prediction-app/backend")
+from dataset_cache import load_dataset
+from eda_report import EDAReport
+from app.ml.preprocessor import clip_outliers, compute_clip_bounds
+
+report = EDAReport()
+
 import warnings
 warnings.filterwarnings("ignore")
 
 # Dataset Link: https://www.kaggle.com/datasets/mohankrishnathalla/diabetes-health-indicators-dataset
-diabetes_dataset = pd.read_csv("data\diabetes_dataset.csv")
+diabetes_dataset = load_dataset("data/diabetes_dataset.csv")
 
 # diabetes_dataset Exploration
 print(diabetes_dataset.shape)
@@ -23,7 +42,10 @@ print(diabetes_dataset.isna().sum())
 diabetes_dataset.drop_duplicates(inplace=True)
 
 # Function to visualize the outliers
-def visualize_outliers(data):
+def visualize_outliers(data, title="Outliers"):
+    if EDA_REPORT:
+        report.add_box_plots(title, data)
+        return
     numerical_data = data.select_dtypes("number")
     fig, ax = plt.subplots(len(numerical_data.columns), 1, figsize=(7, 18), dpi=95)
     for i, col in enumerate(numerical_data.columns):
@@ -33,7 +55,10 @@ def visualize_outliers(data):
     plt.show()
 
 # Function to visualize the distribution
-def visualize_distribution(data):
+def visualize_distribution(data, title="Distribution"):
+    if EDA_REPORT:
+        report.add_histograms(title, data)
+        return
     numerical_data = data.select_dtypes("number")
     fig, ax = plt.subplots(len(numerical_data.columns), 1, figsize=(7, 18), dpi=95)
     for i, col in enumerate(numerical_data.columns):
@@ -43,19 +68,22 @@ def visualize_distribution(data):
     plt.show()
 
 # Before Handling Outliers
-visualize_outliers(diabetes_dataset)
-visualize_distribution(diabetes_dataset)
-
-# Handling outliers
-numerical_data = diabetes_dataset.select_dtypes("number")
-for col in numerical_data.columns:
-    lower_bound = diabetes_dataset[col].quantile(0.01)
-    upper_bound = diabetes_dataset[col].quantile(0.99)
-    diabetes_dataset[col] = np.clip(diabetes_dataset[col], lower_bound, upper_bound)
+visualize_outliers(diabetes_dataset, "Outliers (before handling)")
+visualize_distribution(diabetes_dataset, "Distribution (before handling)")
+
+# Handling outliers (all percentile bounds in one vectorized pass)
+clip_cols = (
+    diabetes_dataset.select_dtypes("number")
+    .drop(columns=["diagnosed_diabetes"])
+    .columns
+)
+# Same bounds and clipping as the serving preprocessor
+clip_bounds = compute_clip_bounds(diabetes_dataset, clip_cols)
+diabetes_dataset = clip_outliers(diabetes_dataset, clip_bounds)
 
 # After Handling Outliers
-visualize_outliers(diabetes_dataset)
-visualize_distribution(diabetes_dataset)
+visualize_outliers(diabetes_dataset, "Outliers (after handling)")
+visualize_distribution(diabetes_dataset, "Distribution (after handling)")
 
 # =======================================================================================================
 
@@ -84,7 +112,7 @@ for col in skewed:
     diabetes_dataset[col + "_log"] = np.log1p(diabetes_dataset[col])
 
 # Visualization after converting
-visualize_distribution(diabetes_dataset[skewed])
+visualize_distribution(diabetes_dataset[skewed], "Skewed features")
 
 # Feature Encoding
 onehot_encoding_cloumns = ["gender", "ethnicity", "employment_status"]
@@ -95,13 +123,13 @@ diabetes_dataset[encoded_col] = encoded_data
 
 diabetes_dataset["education_level_encoded"] = diabetes_dataset["education_level"].map(
     {"No formal": 0, "Highschool": 1, "Graduate": 2, "Postgraduate": 3}
-)
+).astype(int)
 diabetes_dataset["income_level_encoded"] = diabetes_dataset["income_level"].map(
     {"Low": 0, "Lower-Middle": 1, "Middle": 2, "Upper-Middle": 3, "High": 4}
-)
+).astype(int)
 diabetes_dataset["smoking_status_encoded"] = diabetes_dataset["smoking_status"].map(
     {"Never": 0, "Former": 1, "Current": 2}
-)
+).astype(int)
 
 # To detect columns probably cause dataleakage
 for col in (
@@ -149,7 +177,7 @@ poly_features = poly.fit_transform(diabetes_dataset[important_cols])
 poly_col_names = poly.get_feature_names_out(important_cols)
 diabetes_dataset[poly_col_names] = poly_features
 
-drop_cols = diabetes_dataset.select_dtypes("object").columns.tolist()
+drop_cols = diabetes_dataset.select_dtypes(["object", "category"]).columns.tolist()
 drop_cols.extend(["diagnosed_diabetes", "diabetes_risk_score"])
 
 X = diabetes_dataset.drop(drop_cols, axis=1)
@@ -173,17 +201,29 @@ params = {
     "penalty": ["l2"],
 }
 
-# Logistic Regression Algorithm
-model_LoR = LogisticRegression()
-
-# Hyperimeter Tuning
-randomized_search = RandomizedSearchCV(
-    model_LoR, params, cv=5, n_jobs=-1, n_iter=100, random_state=42
-)
-randomized_search.fit(X_train, y_train)
-
 # The Best Model --> LogisticRegression(tol=0.01, C=10.0, class_weight='balanced', intercept_scaling=2, max_iter=1000, solver='newton-cholesky', penalty="l2")
-best_model_LoR = randomized_search.best_estimator_
+best_params = {
+    "tol": 0.01,
+    "C": 10.0,
+    "class_weight": "balanced",
+    "intercept_scaling": 2,
+    "max_iter": 1000,
+    "solver": "newton-cholesky",
+    "penalty": "l2",
+}
+
+if EDA_REPORT:
+    best_model_LoR = LogisticRegression(**best_params)
+else:
+    # Logistic Regression Algorithm
+    model_LoR = LogisticRegression()
+
+    # Hyperimeter Tuning
+    randomized_search = RandomizedSearchCV(
+        model_LoR, params, cv=5, n_jobs=-1, n_iter=100, random_state=42
+    )
+    randomized_search.fit(X_train, y_train)
+    best_model_LoR = randomized_search.best_estimator_
 print(f"The Best Logistic Regression Model: {best_model_LoR}")
 best_model_LoR.fit(X_train, y_train)
 
@@ -203,11 +243,14 @@ print(f"Classification Report:\n{classification_report(y_test, y_pred)}")
 
 # Confusion Matrix
 cm = confusion_matrix(y_test, y_pred)
-sns.heatmap(cm, annot=True, fmt="d", cmap="Blues")
-plt.xlabel("Predicted")
-plt.ylabel("Actual")
-plt.title("Confusion Matrix")
-plt.show()
+if EDA_REPORT:
+    report.add_confusion_matrix(cm)
+else:
+    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues")
+    plt.xlabel("Predicted")
+    plt.ylabel("Actual")
+    plt.title("Confusion Matrix")
+    plt.show()
 
 # ROC AUC Score
 rocauc_score = roc_auc_score(y_test, y_pred_propa)
@@ -215,24 +258,35 @@ print(f"ROC AUC Score: {rocauc_score}")
 
 # ROC Curve
 fpr, tpr, thresholds = roc_curve(y_test, y_pred_propa)
-plt.plot([0, 1], [0, 1], "k--")
-plt.plot(fpr, tpr)
-plt.xlabel("False Positive Rate")
-plt.ylabel("True Positive Rate")
-plt.title("Logistic Regression ROC Curve")
-plt.show()
+if EDA_REPORT:
+    report.add_roc_curve(fpr, tpr, rocauc_score)
+else:
+    plt.plot([0, 1], [0, 1], "k--")
+    plt.plot(fpr, tpr)
+    plt.xlabel("False Positive Rate")
+    plt.ylabel("True Positive Rate")
+    plt.title("Logistic Regression ROC Curve")
+    plt.show()
 
 # Feature Importance
 feature_importance = pd.DataFrame(
     {"feature": X.columns, "coefficient": best_model_LoR.coef_[0]}
 ).sort_values("coefficient", ascending=False, key=abs)
 feature_importance = feature_importance.head(15)
-plt.barh(range(len(feature_importance)), feature_importance["coefficient"])
-plt.yticks(range(len(feature_importance)), labels=feature_importance["feature"])
-plt.xlabel("Coefficient")
-plt.title("Feature Importance")
-plt.grid(alpha=0.3)
-plt.show()
+if EDA_REPORT:
+    report.add_coefficients(
+        feature_importance["feature"], feature_importance["coefficient"]
+    )
+    report.render("reports/eda_report.html")
+    # Report runs skip the search, so they leave the saved model alone
+    sys.exit(0)
+else:
+    plt.barh(range(len(feature_importance)), feature_importance["coefficient"])
+    plt.yticks(range(len(feature_importance)), labels=feature_importance["feature"])
+    plt.xlabel("Coefficient")
+    plt.title("Feature Importance")
+    plt.grid(alpha=0.3)
+    plt.show()
 
 # Saving the model
 import joblib
@@ -241,3 +295,4 @@ joblib.dump(best_model_LoR, "model/logistic_regression_diabetes_model.pkl")
 joblib.dump(robust_scaler, "model/robust_scaler.pkl")
 joblib.dump(X.columns.tolist(), "model/feature_columns.pkl")
 joblib.dump(onehot_encoding, "model/onehot_encoder.pkl")
+joblib.dump(clip_bounds, "model/clip_bounds.pkl")